@@ -0,0 +1,54 @@
+"""Archetype fitting, full assignment and incremental assignment at scale
+
+Run from the repository root:
+
+    python -m benchmarks.archetypes --sizes 100000 1000000 --new 1000
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.cooccurrence import make_compact
+from benchmarks.item_performance import time_call
+from tft_analytics.archetypes import ArchetypeIndex, ArchetypeModel, archetype_summary
+from tft_analytics.store import build_snapshot
+from tft_analytics.traits import concat_trait_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--traits', type=int, default=60)
+    parser.add_argument('--new', type=int, default=1_000, help='matches prepended for the incremental step')
+    parser.add_argument('--k', type=int, default=12)
+    args = parser.parse_args()
+
+    print(f"{'matches':>10} {'fit s':>7} {'assign s':>9} {'summary s':>10} {'incremental s':>14}")
+    for n_matches in args.sizes:
+        snapshot = build_snapshot(1, make_compact(n_matches, 40, args.traits))
+        positions = np.arange(n_matches)
+        fit = lambda: ArchetypeModel.fit(snapshot.trait_table, n_matches, k=args.k)
+        fit_seconds = time_call(fit)
+        model = fit()
+        assign_seconds = time_call(model.assign, snapshot.trait_table, n_matches)
+        labels, _ = model.assign(snapshot.trait_table, n_matches)
+        summary_seconds = time_call(archetype_summary, model, labels, snapshot.matches, positions)
+
+        # A newer snapshot with args.new matches prepended, as the refresh worker publishes it
+        index = ArchetypeIndex(k=args.k)
+        index.update(snapshot)
+        new = build_snapshot(2, make_compact(args.new, 40, args.traits, seed=1))
+        grown = snapshot._replace(
+            watermark=2,
+            df=pd.concat([new.df, snapshot.df], ignore_index=True),
+            trait_table=concat_trait_tables([new.trait_table, snapshot.trait_table], [0, args.new]),
+        )
+        incremental_seconds = time_call(index.update, grown, repeat=1)
+        print(f"{n_matches:>10} {fit_seconds:>7.2f} {assign_seconds:>9.2f} {summary_seconds:>10.2f} "
+              f"{incremental_seconds:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Memory per match: list-valued DataFrame vs CompactMatches
+
+Run from the repository root:
+
+    python -m benchmarks.compact_memory --sizes 10000 100000
+
+The list-valued frame is built the way MatchStore.load_since builds it
+(item and trait lists decoded from JSON text, so every string is its own
+object). Memory is what tracemalloc sees held after each build. Each size
+also asserts that to_frame(), take() and concat() round-trip the frame.
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_matches
+from tft_analytics.columnar import CompactMatches
+
+
+def held_bytes(build):
+    """(result, bytes still allocated by build once it returns, seconds)"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - before, seconds
+
+
+def check_take_and_concat(df, compact):
+    """Assert that take() and concat() of separately encoded halves decode back to df's rows"""
+    half = len(df) // 2
+    stacked = CompactMatches.concat([CompactMatches.from_frame(df.iloc[:half]),
+                                     CompactMatches.from_frame(df.iloc[half:])])
+    pd.testing.assert_frame_equal(stacked.to_frame()[df.columns], df, check_dtype=False)
+    positions = np.arange(len(df))[::-3]
+    pd.testing.assert_frame_equal(compact.take(positions).to_frame()[df.columns],
+                                  df.iloc[positions].reset_index(drop=True), check_dtype=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'matches':>10} {'frame B/match':>14} {'compact B/match':>16} {'ratio':>7} {'encode s':>9} {'decode s':>9}")
+    for n_matches in args.sizes:
+        source = make_matches(n_matches)
+        source['match_id'] = [f'NA1_{number:010d}' for number in range(n_matches)]
+        scalars = source.drop(columns=['items', 'traits'])
+        item_texts = [json.dumps(items) for items in source['items']]
+        trait_texts = [json.dumps(traits) for traits in source['traits']]
+        del source
+
+        tracemalloc.start()
+        df, frame_bytes, _ = held_bytes(lambda: scalars.assign(
+            traits=[json.loads(text) for text in trait_texts],
+            items=[json.loads(text) for text in item_texts],
+        ))
+        compact, compact_bytes, encode_seconds = held_bytes(lambda: CompactMatches.from_frame(df))
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        decoded = compact.to_frame()
+        decode_seconds = time.perf_counter() - start
+        pd.testing.assert_frame_equal(decoded[df.columns], df, check_dtype=False)
+        check_take_and_concat(df, compact)
+
+        print(f"{n_matches:>10} {frame_bytes / n_matches:>14.0f} {compact_bytes / n_matches:>16.0f} "
+              f"{frame_bytes / compact_bytes:>6.1f}x {encode_seconds:>9.3f} {decode_seconds:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
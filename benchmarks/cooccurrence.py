@@ -0,0 +1,74 @@
+"""Item-pair and item-trait co-occurrence at scale
+
+Run from the repository root:
+
+    python -m benchmarks.cooccurrence --sizes 100000 1000000 --items 40 5000
+
+Matches are generated directly in compact form (random item and trait
+codes over vocabularies of the given sizes), so large vocabularies and
+match counts are cheap to set up.
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.item_performance import time_call
+from tft_analytics.columnar import CompactMatches
+from tft_analytics.cooccurrence import item_pair_stats, item_trait_stats
+from tft_analytics.jsonstream import MISSING_VALUE, RaggedColumn
+from tft_analytics.store import build_snapshot
+
+
+def make_compact(n_matches, n_items, n_traits, seed=0, items_per_match=9, traits_per_match=5):
+    """CompactMatches with random items/traits drawn from n_items / n_traits ids"""
+    rng = np.random.default_rng(seed)
+
+    def ragged(per_match, n_values, label):
+        lengths = rng.integers(per_match - 3, per_match + 4, size=n_matches).clip(0)
+        vocab = np.asarray([label.format(code) for code in range(n_values)], dtype=object)
+        values = rng.integers(0, n_values, size=int(lengths.sum())).astype(np.int32)
+        return RaggedColumn(np.concatenate(([0], np.cumsum(lengths))), values, vocab)
+
+    scalars = {
+        'placement': rng.integers(1, 9, size=n_matches),
+        'level': rng.integers(6, 11, size=n_matches),
+        'gold_left': rng.integers(0, 50, size=n_matches),
+        'damage': rng.integers(0, 200, size=n_matches),
+        'units_count': rng.integers(6, 11, size=n_matches),
+        'game_datetime': np.full(n_matches, MISSING_VALUE),
+    }
+    return CompactMatches(
+        scalars,
+        (np.zeros(n_matches, dtype=np.int8), np.asarray(['Solo'], dtype=object)),
+        ragged(items_per_match, n_items, 'TFT_Item_{}'),
+        ragged(traits_per_match, n_traits, 'TFT15_Trait{}_2'),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--items', type=int, nargs='+', default=[40, 5_000])
+    parser.add_argument('--traits', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'matches':>10} {'items':>6} {'traits':>6} {'item pairs s':>13} {'pairs':>9} "
+          f"{'item-trait s':>13} {'pairs':>9}")
+    for n_matches in args.sizes:
+        for n_items in args.items:
+            snapshot = build_snapshot(0, make_compact(n_matches, n_items, args.traits))
+            positions = np.arange(n_matches)
+            pairs = item_pair_stats(snapshot.matches, positions)
+            item_traits = item_trait_stats(snapshot.matches, snapshot.trait_table, positions)
+            pair_seconds = time_call(item_pair_stats, snapshot.matches, positions, repeat=args.repeat)
+            trait_seconds = time_call(
+                item_trait_stats, snapshot.matches, snapshot.trait_table, positions, repeat=args.repeat
+            )
+            print(f"{n_matches:>10} {n_items:>6} {args.traits:>6} {pair_seconds:>13.2f} {len(pairs):>9} "
+                  f"{trait_seconds:>13.2f} {len(item_traits):>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Build and serialization time of the trend chart's Plotly figure
+
+Run from the repository root:
+
+    python -m benchmarks.figures --points 1000 10000 100000
+
+Each size builds a figure shaped like the dashboard's Performance Trends
+chart (five line traces over a rolling trend, one of them filled) with SVG
+Scatter and with WebGL Scattergl traces. "build" is constructing the
+figure, "validate" the to_dict() and re-validation st.plotly_chart does on
+every call, and "serialize" the plotly.io.to_json it then sends; "cached"
+is fetching an already built figure from an AggregateCache, which is what
+a rerun with unchanged data pays instead of "build". The "auto" column
+marks the trace type use_webgl picks for the size.
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.item_performance import time_call
+from tft_analytics import AggregateCache, RollingTrend, use_webgl
+
+
+def trend_frame(n_points, window=20, seed=0):
+    """A rolling trend over n_points synthetic placements, oldest first"""
+    trend = RollingTrend(window)
+    trend.extend(np.random.default_rng(seed).integers(1, 9, size=n_points))
+    return trend.frame()
+
+
+def trend_figure(frame, trace):
+    """The dashboard's trend chart over frame, drawn with trace (go.Scatter or go.Scattergl)"""
+    import plotly.graph_objects as go
+
+    spread = frame['variance'] ** 0.5
+    figure = go.Figure()
+    figure.add_trace(trace(x=frame['game_number'], y=frame['rolling_avg'] + spread, line=dict(width=0),
+                           hoverinfo='skip', showlegend=False))
+    figure.add_trace(trace(x=frame['game_number'], y=frame['rolling_avg'] - spread, line=dict(width=0),
+                           fill='tonexty', name="±1 std dev", hoverinfo='skip'))
+    figure.add_trace(trace(x=frame['game_number'], y=frame['rolling_avg'], name="average"))
+    figure.add_trace(trace(x=frame['game_number'], y=frame['ewma'], name="EWMA"))
+    figure.add_trace(trace(x=frame['game_number'], y=frame['top4_rate'], yaxis='y2', name="Top 4 rate"))
+    figure.add_hline(y=4.5, line_dash="dash")
+    figure.update_layout(yaxis=dict(autorange="reversed"), yaxis2=dict(overlaying='y', side='right'))
+    return figure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import plotly.graph_objects as go
+    import plotly.io
+    import plotly.tools
+
+    cache = AggregateCache(max_bytes=1 << 30)
+    print(f"{'points':>8} {'trace':>10} {'auto':>5} {'build s':>8} {'validate s':>11} {'serialize s':>12} "
+          f"{'JSON MB':>8} {'cached s':>9}")
+    for n_points in args.points:
+        frame = trend_frame(n_points)
+        for trace in (go.Scatter, go.Scattergl):
+            figure = trend_figure(frame, trace)
+            as_dict = plotly.tools.return_figure_from_figure_or_data(figure, validate_figure=True)
+            key = ('figure:trend', trace.__name__, n_points)
+            cache.put(key, figure)
+            seconds = [
+                time_call(trend_figure, frame, trace, repeat=args.repeat),
+                time_call(plotly.tools.return_figure_from_figure_or_data, figure, True, repeat=args.repeat),
+                time_call(lambda: plotly.io.to_json(as_dict, validate=False), repeat=args.repeat),
+                time_call(cache.get, key, repeat=args.repeat),
+            ]
+            json_mb = len(plotly.io.to_json(as_dict, validate=False)) / 2**20
+            auto = '*' if use_webgl(n_points) == (trace is go.Scattergl) else ''
+            print(f"{n_points:>8} {trace.__name__:>10} {auto:>5} {seconds[0]:>8.3f} {seconds[1]:>11.3f} "
+                  f"{seconds[2]:>12.3f} {json_mb:>8.2f} {seconds[3]:>9.6f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Throughput and rate-limit compliance of the Riot ingester against the mock server
+
+Run from the repository root (no network needed):
+
+    python -m benchmarks.ingest --players 4 --matches 50 --limits 20:1,100:120
+
+With Riot's development limits 100 requests take two minutes, so the
+default limits are scaled up to keep the run short; the check that no
+window ever exceeds its limit is the same either way.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import make_matches
+from tft_analytics.mock_riot import MockRiotServer, fixtures_from_export
+from tft_analytics.ratelimit import RateLimiter, parse_rate_limits
+from tft_analytics.riot import RiotClient, RiotIngester
+from tft_analytics.store import MatchStore
+
+
+def make_fixtures(n_players, n_matches, seed=0):
+    """Fixtures for n_players synthetic players with n_matches each"""
+    fixtures = None
+    for player in range(n_players):
+        rows = make_matches(n_matches, seed=seed + player).to_dict('records')
+        for number, row in enumerate(rows):
+            row['match_id'] = f'NA1_{player:03d}{number:06d}'
+        export = {'player_info': {'name': f'Bench{player}#NA1', 'puuid': f'bench-puuid-{player}'}, 'matches': rows}
+        fixtures = fixtures_from_export(export, fixtures)
+    return fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--matches', type=int, default=50, help='matches per player')
+    parser.add_argument('--limits', default='50:1,300:10', help='server and client app limits')
+    parser.add_argument('--client-limits', help='client limits, if different (the client adopts the server header)')
+    parser.add_argument('--latency', type=float, default=0.02, help='server seconds per response')
+    parser.add_argument('--max-connections', type=int, default=10)
+    args = parser.parse_args()
+
+    limits = parse_rate_limits(args.limits)
+    client_limits = parse_rate_limits(args.client_limits) if args.client_limits else limits
+    fixtures = make_fixtures(args.players, args.matches)
+    riot_ids = [f'Bench{player}#NA1' for player in range(args.players)]
+
+    with tempfile.TemporaryDirectory() as tmp, MockRiotServer(fixtures, limits, latency=args.latency) as server:
+        client = RiotClient('benchmark', base_url=server.base_url, limiter=RateLimiter(client_limits),
+                            max_connections=args.max_connections)
+        store = MatchStore(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        added = asyncio.run(RiotIngester(client, store).ingest_riot_ids(riot_ids, count=args.matches))
+        seconds = time.perf_counter() - start
+        client.close()
+        store.close()
+
+    print(f"{sum(added.values())} matches, {client.requests} requests in {seconds:.2f}s "
+          f"({client.requests / seconds:.1f} req/s), {client.throttled} throttled")
+    for (limit, period), seen in zip(limits, server.max_window_counts()):
+        status = 'ok' if seen <= limit else 'EXCEEDED'
+        print(f"  limit {limit:>5} per {period:g}s: peak {seen:>5} ({status})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Timing of placement_intervals for many entities at once
+
+Run from the repository root:
+
+    python -m benchmarks.intervals --entities 500 5000 --resamples 1000
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.item_performance import time_call
+from tft_analytics.confidence import placement_intervals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entities', type=int, nargs='+', default=[500, 5_000])
+    parser.add_argument('--resamples', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'entities':>9} {'resamples':>10} {'bayes s':>8} {'bootstrap s':>12}")
+    for n_entities in args.entities:
+        games = rng.integers(1, 200, size=n_entities)
+        histograms = np.stack([rng.multinomial(n, np.full(8, 1 / 8)) for n in games])
+        seconds = [
+            time_call(lambda: placement_intervals(histograms, method=method, n_resamples=args.resamples),
+                      repeat=args.repeat)
+            for method in ('bayes', 'bootstrap')
+        ]
+        print(f"{n_entities:>9} {args.resamples:>10} {seconds[0]:>8.3f} {seconds[1]:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Scaling benchmark for analyze_item_performance
+
+Run from the repository root:
+
+    python -m benchmarks.item_performance --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetic import make_matches
+from tft_analytics import analyze_item_performance
+
+
+def time_call(fn, *args, repeat=3):
+    """Best-of-N wall time in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'matches':>10} {'seconds':>10} {'us/match':>10}")
+    for n_matches in args.sizes:
+        df = make_matches(n_matches)
+        seconds = time_call(analyze_item_performance, df, repeat=args.repeat)
+        print(f"{n_matches:>10} {seconds:>10.3f} {seconds / n_matches * 1e6:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
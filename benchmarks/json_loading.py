@@ -0,0 +1,134 @@
+"""Peak RSS and load time of the streaming JSON loader vs json.load
+
+Run from the repository root:
+
+    python -m benchmarks.json_loading --sizes 100000 1000000
+
+Each loader runs in a fresh interpreter so its peak RSS is measured in
+isolation; "added" is the peak minus the RSS right before loading (the
+high-water mark is reset through /proc/self/clear_refs, so Linux only).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_matches
+
+GENERATE_BATCH = 100_000
+# Synthetic match times: newest first from here, one match every ten minutes,
+# with a new patch every two weeks
+NEWEST_MATCH_MS = 1_735_689_600_000  # 2025-01-01 UTC
+MATCH_SPACING_MS = 10 * 60 * 1000
+PATCH_MS = 14 * 24 * 60 * 60 * 1000
+
+
+def write_export(path, n_matches, seed=0):
+    """Write a synthetic tft_dashboard_data.json with n_matches, batch by batch"""
+    with open(path, 'w') as f:
+        f.write('{"player_info": {"name": "Benchmark#NA1", "puuid": "bench-puuid"}, "matches": [')
+        first = True
+        for start in range(0, n_matches, GENERATE_BATCH):
+            batch = make_matches(min(GENERATE_BATCH, n_matches - start), seed=seed + start)
+            for number, row in enumerate(batch.to_dict('records'), start=start):
+                row = {key: value.item() if hasattr(value, 'item') else value for key, value in row.items()}
+                row['match_id'] = f'NA1_{number:09d}'
+                row['game_datetime'] = NEWEST_MATCH_MS - number * MATCH_SPACING_MS
+                patch = 500 - number * MATCH_SPACING_MS // PATCH_MS
+                row['game_version'] = f'Version {patch // 24}.{patch % 24 + 1}.1.0 [PUBLIC]'
+                f.write(('' if first else ', ') + json.dumps(row))
+                first = False
+        f.write('], "summary": {}}')
+
+
+def _load_json_dataframe(path):
+    import pandas as pd
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return pd.DataFrame(data['matches'])
+
+
+def _load_stream_columns(path):
+    from tft_analytics.jsonstream import load_export_columns
+    return load_export_columns(path)
+
+
+def _import_store(path):
+    from tft_analytics.store import MatchStore
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MatchStore(os.path.join(tmp, 'bench.db'))
+        added = store.import_json(path)
+        store.close()
+    return added
+
+
+LOADERS = {
+    'json.load + DataFrame': _load_json_dataframe,
+    'streaming columns': _load_stream_columns,
+    'streaming store import': _import_store,
+}
+
+
+def _status_mb(field):
+    """VmRSS / VmHWM from /proc/self/status in MiB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def _reset_peak_rss():
+    """Start a new high-water mark (Linux); falls back to the process-lifetime peak"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def run_loader(name, path):
+    """Child-process entry point: load once and print the measurements as JSON"""
+    baseline = _status_mb('VmRSS')
+    _reset_peak_rss()
+    start = time.perf_counter()
+    result = LOADERS[name](path)
+    seconds = time.perf_counter() - start
+    peak = _status_mb('VmHWM')
+    del result
+    print(json.dumps({'seconds': seconds, 'peak_mb': peak, 'added_mb': peak - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--run', nargs=2, metavar=('LOADER', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_loader(*args.run)
+        return
+
+    print(f"{'matches':>10} {'file MB':>8}  {'loader':<24} {'seconds':>8} {'peak MB':>8} {'added MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_matches in args.sizes:
+            path = os.path.join(tmp, f'export_{n_matches}.json')
+            write_export(path, n_matches)
+            file_mb = os.path.getsize(path) / 1024 ** 2
+            for name in LOADERS:
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.json_loading', '--run', name, path],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{n_matches:>10} {file_mb:>8.1f}  {name:<24} {result['seconds']:>8.2f} "
+                      f"{result['peak_mb']:>8.1f} {result['added_mb']:>9.1f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
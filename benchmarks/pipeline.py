@@ -0,0 +1,276 @@
+"""Stage-by-stage timing and peak memory of the dashboard's analysis pipeline
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline --sizes 1000 100000 1000000 --output bench.json
+    python -m benchmarks.pipeline --sizes 1000 100000 --compare bench.json
+
+Each size writes a synthetic tft_dashboard_data.json-shaped export and
+runs every stage once, in order, in a fresh interpreter, the way one
+dashboard run would: load, trait parsing, filtering, the prefix and time indexes,
+item/trait/level/mode aggregates, rollups, the rolling trend, intervals, pairs and
+archetypes. Stage memory is the peak RSS above the RSS the stage started from (Linux, see
+benchmarks.json_loading; null elsewhere). Results are one JSON document
+on stdout or in --output; --compare prints each stage's time against a
+previous document. No Streamlit server or network is involved.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.json_loading import _reset_peak_rss, _status_mb, write_export
+
+GAME_MODE = 'Solo'
+# Window the windowed stages use, like the dashboard's "games to show"
+WINDOW_GAMES = 1_000
+# --compare flags a stage this much slower, unless it is within timer noise
+REGRESSION_RATIO = 1.2
+REGRESSION_MIN_SECONDS = 0.01
+
+
+def _current_rss():
+    """VmRSS in MiB, or None where /proc is not available"""
+    try:
+        return _status_mb('VmRSS')
+    except (OSError, KeyError):
+        return None
+
+
+def pipeline_stages(path):
+    """(stage name, callable) pairs; each callable takes and extends a shared state dict"""
+    import numpy as np
+
+    from tft_analytics import (
+        ArchetypeModel,
+        CompactMatches,
+        PrefixIndex,
+        TimeIndex,
+        TrendIndex,
+        analyze_item_performance,
+        analyze_level_performance,
+        analyze_mode_performance,
+        analyze_trait_performance,
+        archetype_summary,
+        build_rollups,
+        build_snapshot,
+        build_trait_table_from_ragged,
+        day_start_ms,
+        downsample_trend,
+        filter_positions,
+        item_pair_stats,
+        level_performance_from_rollups,
+        mode_performance_from_rollups,
+        placement_histogram,
+        with_intervals,
+    )
+
+    def load(state):
+        _, state['matches'] = CompactMatches.load_json(path)
+        return len(state['matches'])
+
+    def parse_traits(state):
+        state['trait_table'] = build_trait_table_from_ragged(state['matches'].traits)
+        return len(state['trait_table'])
+
+    def snapshot(state):
+        state['snapshot'] = build_snapshot(None, state['matches'], state['trait_table'])
+        return len(state['snapshot'].df)
+
+    def filter_mode(state):
+        state['positions'] = filter_positions(state['snapshot'].df, GAME_MODE)
+        state['window'] = state['positions'][:WINDOW_GAMES]
+        return len(state['positions'])
+
+    def prefix(state):
+        snapshot = state['snapshot']
+        state['prefix'] = PrefixIndex(snapshot.df, snapshot.trait_table, state['positions'], items=snapshot.matches.items)
+        return len(state['positions'])
+
+    def time_index(state):
+        state['time_index'] = TimeIndex(state['snapshot'].df, state['positions'])
+        return len(state['positions'])
+
+    def period(state):
+        # Last 30 days of the export and its newest patch, as the sidebar asks
+        index = state['time_index']
+        newest = int(state['snapshot'].df['game_datetime'].max())
+        since = day_start_ms(time.strftime('%Y-%m-%d', time.gmtime(newest / 1000 - 29 * 86400)))
+        start, stop = index.range(since=since)
+        patch_start, patch_stop = index.patch_range(index.patches()[0])
+        state['prefix'].summary(start, stop)
+        state['prefix'].item_stats(patch_start, patch_stop)
+        return stop - start
+
+    def item_stats(state):
+        state['item_stats'] = state['prefix'].item_stats()
+        return len(state['item_stats'])
+
+    def decode_lists(state):
+        state['frame'] = state['matches'].to_frame()
+        return len(state['frame'])
+
+    def item_stats_from_lists(state):
+        return len(analyze_item_performance(state['frame']))
+
+    def trait_stats(state):
+        snapshot = state['snapshot']
+        return len(analyze_trait_performance(snapshot.trait_table, snapshot.df['placement'].to_numpy()))
+
+    def levels(state):
+        return len(analyze_level_performance(state['snapshot'].df.iloc[state['positions']]))
+
+    def modes(state):
+        return len(analyze_mode_performance(state['snapshot'].df))
+
+    def rollups(state):
+        state['rollups'] = build_rollups(state['snapshot'].df)
+        return len(state['rollups'])
+
+    def from_rollups(state):
+        level_performance_from_rollups(state['rollups'], GAME_MODE)
+        return len(mode_performance_from_rollups(state['rollups']))
+
+    def trend(state):
+        # The dashboard's default window over the whole mode history, downsampled for plotting
+        rolling, length = TrendIndex().update(state['snapshot'], GAME_MODE, state['positions'], 20)
+        return len(downsample_trend(rolling.frame(0, length)))
+
+    def intervals(state):
+        prior = placement_histogram(state['snapshot'].df['placement'].to_numpy()[state['positions']])
+        return len(with_intervals(state['item_stats'], state['prefix'].item_histograms(), prior=prior))
+
+    def item_pairs(state):
+        return len(item_pair_stats(state['matches'], state['window']))
+
+    def archetypes(state):
+        snapshot = state['snapshot']
+        model = ArchetypeModel.fit(snapshot.trait_table, len(snapshot.df))
+        labels, _ = model.assign(snapshot.trait_table, len(snapshot.df))
+        return len(archetype_summary(model, labels, snapshot.matches, np.asarray(state['positions'])))
+
+    return [
+        ('load export', load),
+        ('trait parsing', parse_traits),
+        ('build snapshot', snapshot),
+        ('filter game mode', filter_mode),
+        ('prefix index', prefix),
+        ('time index', time_index),
+        ('period window', period),
+        ('item stats', item_stats),
+        ('decode item lists', decode_lists),
+        ('analyze_item_performance', item_stats_from_lists),
+        ('trait stats', trait_stats),
+        ('level groupby', levels),
+        ('mode groupby', modes),
+        ('build rollups', rollups),
+        ('level/mode from rollups', from_rollups),
+        ('rolling trend', trend),
+        ('placement intervals', intervals),
+        (f'item pairs (last {WINDOW_GAMES})', item_pairs),
+        ('archetypes', archetypes),
+    ]
+
+
+def run_pipeline(path):
+    """Child-process entry point: run every stage once and print the measurements as JSON"""
+    import tft_analytics  # noqa: F401  (import cost is not part of any stage)
+    state, results = {}, []
+    for name, stage in pipeline_stages(path):
+        baseline = _current_rss()
+        _reset_peak_rss()
+        start = time.perf_counter()
+        rows = stage(state)
+        seconds = time.perf_counter() - start
+        peak = _status_mb('VmHWM') if baseline is not None else None
+        results.append({
+            'stage': name,
+            'seconds': seconds,
+            'rows': int(rows),
+            'peak_mb': peak,
+            'added_mb': peak - baseline if peak is not None else None,
+        })
+    print(json.dumps(results))
+
+
+def environment():
+    """Interpreter, library and source versions the results were measured with"""
+    import numpy as np
+    import pandas as pd
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+    }
+
+
+def compare(results, baseline_path):
+    """Print each stage's time against the same stage and size in an earlier document"""
+    with open(baseline_path) as f:
+        baseline = {(row['matches'], row['stage']): row for row in json.load(f)['results']}
+    print(f"{'matches':>10}  {'stage':<28} {'before s':>9} {'after s':>9} {'ratio':>7}", file=sys.stderr)
+    for row in results:
+        before = baseline.get((row['matches'], row['stage']))
+        if before is None:
+            continue
+        ratio = row['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        slower = ratio > REGRESSION_RATIO and row['seconds'] - before['seconds'] > REGRESSION_MIN_SECONDS
+        flag = '  slower' if slower else ''
+        print(f"{row['matches']:>10}  {row['stage']:<28} {before['seconds']:>9.3f} {row['seconds']:>9.3f} "
+              f"{ratio:>6.2f}x{flag}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--run', metavar='PATH', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_pipeline(args.run)
+        return
+
+    # The readable table goes to stderr so stdout stays pure JSON
+    print(f"{'matches':>10}  {'stage':<28} {'seconds':>9} {'rows':>9} {'added MB':>9}", file=sys.stderr)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_matches in args.sizes:
+            path = os.path.join(tmp, f'export_{n_matches}.json')
+            write_export(path, n_matches)
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.pipeline', '--run', path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            for row in json.loads(output.strip().splitlines()[-1]):
+                results.append({'matches': n_matches, **row})
+                added = f"{row['added_mb']:>9.1f}" if row['added_mb'] is not None else f"{'-':>9}"
+                print(f"{n_matches:>10}  {row['stage']:<28} {row['seconds']:>9.3f} {row['rows']:>9} {added}",
+                      file=sys.stderr)
+            os.remove(path)
+
+    document = {'benchmark': 'pipeline', 'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    else:
+        print(json.dumps(document, indent=2))
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Dashboard startup: JSON export vs memory-mapped snapshot
+
+Run from the repository root:
+
+    python -m benchmarks.snapshot_loading --sizes 100000 1000000
+
+"startup" is what the dashboard needs before its first paint: the match
+snapshot plus the All-modes PrefixIndex and one headline summary. Each
+path runs in a fresh interpreter; "added MB" is the peak RSS increase
+(Linux only, see benchmarks.json_loading). Memory-mapped pages are file
+backed, so they are shared between processes and count toward RSS only
+once touched.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.json_loading import _reset_peak_rss, _status_mb, write_export
+
+
+def _startup_from_json(path):
+    from tft_analytics.columnar import CompactMatches
+    from tft_analytics.prefix import PrefixIndex
+    from tft_analytics.store import build_snapshot
+    _, matches = CompactMatches.load_json(path)
+    snapshot = build_snapshot(None, matches)
+    index = PrefixIndex(snapshot.df, snapshot.trait_table, range(len(snapshot.df)), items=matches.items)
+    return index.summary(0, 50)
+
+
+def _startup_from_snapshot(path):
+    from tft_analytics.snapshot import load_snapshot
+    _, snapshot = load_snapshot(path)
+    return snapshot.prefix['All'].summary(0, 50)
+
+
+LOADERS = {
+    'json export': _startup_from_json,
+    'mmap snapshot': _startup_from_snapshot,
+}
+
+
+def run_loader(name, path):
+    """Child-process entry point: start up once and print the measurements as JSON"""
+    import tft_analytics  # noqa: F401  (import cost is not part of the load)
+    baseline = _status_mb('VmRSS')
+    _reset_peak_rss()
+    start = time.perf_counter()
+    result = LOADERS[name](path)
+    seconds = time.perf_counter() - start
+    peak = _status_mb('VmHWM')
+    del result
+    print(json.dumps({'seconds': seconds, 'peak_mb': peak, 'added_mb': peak - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--run', nargs=2, metavar=('LOADER', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_loader(*args.run)
+        return
+
+    from tft_analytics.snapshot import convert_export
+
+    print(f"{'matches':>10} {'convert s':>10}  {'startup path':<16} {'seconds':>8} {'peak MB':>8} {'added MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_matches in args.sizes:
+            export_path = os.path.join(tmp, f'export_{n_matches}.json')
+            write_export(export_path, n_matches)
+            start = time.perf_counter()
+            snapshot_dir = convert_export(export_path, out_path=os.path.join(tmp, f'export_{n_matches}.tftsnap'))
+            convert_seconds = time.perf_counter() - start
+
+            for name in LOADERS:
+                path = snapshot_dir if name == 'mmap snapshot' else export_path
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.snapshot_loading', '--run', name, path],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{n_matches:>10} {convert_seconds:>10.2f}  {name:<16} {result['seconds']:>8.3f} "
+                      f"{result['peak_mb']:>8.1f} {result['added_mb']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Synthetic match data shaped like tft_dashboard_data.json"""
+
+import numpy as np
+import pandas as pd
+
+ITEM_POOL = [
+    'TFT_Item_InfinityEdge', 'TFT_Item_GuinsoosRageblade', 'TFT_Item_SpearOfShojin',
+    'TFT_Item_WarmogsArmor', 'TFT_Item_GargoyleStoneplate', 'TFT_Item_ThiefsGloves',
+    'TFT_Item_RedBuff', 'TFT_Item_BlueBuff', 'TFT_Item_RunaansHurricane',
+    'TFT_Item_JeweledGauntlet', 'TFT_Item_Morellonomicon', 'TFT_Item_DragonsClaw',
+    'TFT_Item_BrambleVest', 'TFT_Item_ArchangelsStaff', 'TFT_Item_HextechGunblade',
+    'TFT_Item_Bloodthirster', 'TFT_Item_LastWhisper', 'TFT_Item_IonicSpark',
+    'TFT_Item_Quicksilver', 'TFT_Item_TitansResolve', 'TFT_Item_AdaptiveHelm',
+    'TFT_Item_StatikkShiv', 'TFT_Item_RapidFireCannon', 'TFT_Item_GiantSlayer',
+    'TFT_Item_Deathblade', 'TFT_Item_RabadonsDeathcap', 'TFT_Item_SunfireCape',
+    'TFT_Item_FrozenHeart', 'TFT_Item_SpectralGauntlet', 'TFT_Item_Crownguard',
+    'TFT_Item_SteraksGage', 'TFT_Item_EdgeOfNight', 'TFT_Item_UnstableConcoction',
+    'TFT_Item_NightHarvester', 'TFT_Item_Redemption', 'TFT_Item_MadredsBloodrazor',
+    'TFT_Item_PowerGauntlet', 'TFT_Item_RecurveBow', 'TFT_Item_NegatronCloak',
+    'TFT9_Item_OrnnHullbreaker', 'TFT4_Item_OrnnMuramana', 'TFT15_RoboRanger_Core',
+]
+
+TRAIT_POOL = [
+    'Bastion', 'BattleAcademia', 'Prodigy', 'StarGuardian', 'Destroyer', 'OldMentor',
+    'SentaiRanger', 'Spellslinger', 'Strategist', 'Juggernaut', 'Duelist', 'Edgelord',
+    'Heavyweight', 'SoulFighter', 'Sniper', 'Protector', 'MentorTrait', 'Executioner',
+    'Crystal', 'Luchador', 'Mighty', 'Supreme', 'Wraith', 'TheChamp',
+]
+
+
+def make_matches(n_matches, seed=0, items_per_match=9, traits_per_match=5):
+    """Build a DataFrame of n_matches synthetic games with list-valued items/traits"""
+    rng = np.random.default_rng(seed)
+
+    item_counts = rng.integers(items_per_match - 3, items_per_match + 4, size=n_matches)
+    item_codes = rng.integers(0, len(ITEM_POOL), size=int(item_counts.sum()))
+    item_names = np.asarray(ITEM_POOL, dtype=object)[item_codes].tolist()
+
+    trait_counts = rng.integers(traits_per_match - 2, traits_per_match + 3, size=n_matches)
+    trait_codes = rng.integers(0, len(TRAIT_POOL), size=int(trait_counts.sum()))
+    trait_tiers = rng.integers(1, 5, size=len(trait_codes))
+    trait_names = [f"TFT15_{TRAIT_POOL[c]}_{t}" for c, t in zip(trait_codes.tolist(), trait_tiers.tolist())]
+
+    item_ends = np.cumsum(item_counts).tolist()
+    trait_ends = np.cumsum(trait_counts).tolist()
+    items, traits = [], []
+    item_start = trait_start = 0
+    for item_end, trait_end in zip(item_ends, trait_ends):
+        items.append(item_names[item_start:item_end])
+        traits.append(trait_names[trait_start:trait_end])
+        item_start, trait_start = item_end, trait_end
+
+    return pd.DataFrame({
+        'placement': rng.integers(1, 9, size=n_matches),
+        'level': rng.integers(6, 11, size=n_matches),
+        'gold_left': rng.integers(0, 50, size=n_matches),
+        'damage': rng.integers(0, 200, size=n_matches),
+        'traits': traits,
+        'items': items,
+        'units_count': rng.integers(6, 11, size=n_matches),
+        'game_mode': np.where(rng.random(n_matches) < 0.8, 'Solo', 'Double Up'),
+    })
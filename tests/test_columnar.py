@@ -0,0 +1,164 @@
+"""Round trips of CompactMatches and RaggedColumn, the format later stages build on"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tft_analytics.columnar import (
+    FRAME_COLUMNS,
+    SCALAR_DTYPES,
+    CompactMatches,
+    ragged_concat,
+    ragged_from_lists,
+    ragged_take,
+    ragged_to_lists,
+)
+from tft_analytics.jsonstream import MISSING_VALUE
+
+
+def make_frame(n, offset=0, modes=('Solo', 'Double Up'), items=('TFT_Item_A', 'TFT_Item_B', 'TFT_Item_C')):
+    """A list-valued match frame shaped like the store's, with repeated and empty lists"""
+    rng = np.random.default_rng(n + offset)
+    return pd.DataFrame({
+        'match_id': [f'NA1_{offset + i}' for i in range(n)],
+        'placement': rng.integers(1, 9, size=n),
+        'level': rng.integers(6, 11, size=n),
+        'gold_left': rng.integers(0, 50, size=n),
+        'damage': rng.integers(0, 200, size=n),
+        'units_count': rng.integers(6, 11, size=n),
+        'game_mode': [modes[i % len(modes)] for i in range(n)],
+        'game_datetime': 1_700_000_000_000 - np.arange(n, dtype=np.int64) * 3_600_000,
+        'patch': ['14.23' if i % 3 else '14.22' for i in range(n)],
+        'traits': [[f'TFT15_Trait{j}_{j + 1}' for j in range(i % 4)] for i in range(n)],
+        'items': [[items[(i + j) % len(items)] for j in range(i % 5)] + ([items[0]] if i % 7 == 0 else [])
+                  for i in range(n)],
+    }, columns=FRAME_COLUMNS)
+
+
+def assert_frames_equal(left, right):
+    pd.testing.assert_frame_equal(
+        left.reset_index(drop=True), right.reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_frame_round_trip():
+    df = make_frame(50)
+    matches = CompactMatches.from_frame(df)
+    assert len(matches) == 50
+    for field, dtype in SCALAR_DTYPES.items():
+        assert matches.scalars[field].dtype == dtype
+    assert_frames_equal(matches.to_frame(), df)
+
+
+def test_patch_derived_from_game_version():
+    df = make_frame(6).drop(columns='patch')
+    df['game_version'] = ['Version 14.23.636.5632 (Nov 22 2024/15:20:15) [PUBLIC]', None] * 3
+    decoded = CompactMatches.from_frame(df).to_frame()
+    assert decoded['patch'].isna().tolist() == [False, True] * 3
+    assert (decoded['patch'].dropna() == '14.23').all()
+
+
+def test_missing_scalars_decode_as_missing_value():
+    df = make_frame(10).drop(columns=['gold_left', 'game_datetime'])
+    df['placement'] = df['placement'].astype(float)
+    df.loc[[2, 5], 'placement'] = np.nan
+    decoded = CompactMatches.from_frame(df).to_frame()
+    assert (decoded['gold_left'] == MISSING_VALUE).all()
+    assert (decoded['game_datetime'] == MISSING_VALUE).all()
+    assert decoded['placement'].tolist() == [
+        MISSING_VALUE if i in (2, 5) else int(placement) for i, placement in enumerate(df['placement'])
+    ]
+
+
+def test_missing_game_mode_and_lists():
+    df = make_frame(4)
+    df['game_mode'] = ['Solo', None, 'Solo', None]
+    df['items'] = [['TFT_Item_A'], None, [], 'not a list']
+    decoded = CompactMatches.from_frame(df).to_frame()
+    assert decoded['game_mode'].isna().tolist() == [False, True, False, True]
+    assert (decoded['game_mode'].dropna() == 'Solo').all()
+    assert decoded['items'].tolist() == [['TFT_Item_A'], [], [], []]
+
+
+def test_empty_frame():
+    empty = make_frame(0)
+    matches = CompactMatches.from_frame(empty)
+    assert len(matches) == 0
+    decoded = matches.to_frame()
+    assert list(decoded.columns) == FRAME_COLUMNS
+    assert decoded.empty
+    assert len(matches.scalar_frame()) == 0
+
+
+def test_take_matches_row_selection():
+    df = make_frame(40)
+    matches = CompactMatches.from_frame(df)
+    positions = np.array([39, 0, 7, 7, 20])
+    assert_frames_equal(matches.take(positions).to_frame(), df.iloc[positions])
+    assert len(matches.take(np.zeros(0, dtype=np.int64))) == 0
+
+
+def test_concat_merges_vocabularies():
+    newer = make_frame(15, offset=100, modes=('Double Up',), items=('TFT_Item_C', 'TFT_Item_D'))
+    older = make_frame(25, items=('TFT_Item_A', 'TFT_Item_B', 'TFT_Item_C'))
+    stacked = CompactMatches.concat([CompactMatches.from_frame(newer), CompactMatches.from_frame(older)])
+    assert_frames_equal(stacked.to_frame(), pd.concat([newer, older]))
+    assert sorted(stacked.items.vocab) == ['TFT_Item_A', 'TFT_Item_B', 'TFT_Item_C', 'TFT_Item_D']
+
+
+def test_concat_with_empty_parts():
+    df = make_frame(12)
+    parts = [CompactMatches.from_frame(make_frame(0)), CompactMatches.from_frame(df)]
+    assert_frames_equal(CompactMatches.concat(parts).to_frame(), df)
+    assert len(CompactMatches.concat([CompactMatches.from_frame(make_frame(0))])) == 0
+
+
+def test_scalar_frame_matches_to_frame():
+    df = make_frame(30)
+    matches = CompactMatches.from_frame(df)
+    scalars = matches.scalar_frame()
+    decoded = matches.to_frame()
+    for column in list(SCALAR_DTYPES) + ['game_mode', 'patch']:
+        assert scalars[column].astype(object).tolist() == decoded[column].astype(object).tolist()
+
+
+def test_export_matches_from_frame(tmp_path):
+    df = make_frame(20).drop(columns='patch')
+    df['game_version'] = 'Version 14.23.636.5632 (Nov 22 2024/15:20:15) [PUBLIC]'
+    path = tmp_path / 'export.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'player_info': {'puuid': 'p'}, 'matches': df.to_dict('records')}, f, default=int)
+
+    player_info, matches = CompactMatches.load_json(str(path))
+    assert player_info == {'puuid': 'p'}
+    assert_frames_equal(matches.to_frame(), CompactMatches.from_frame(df).to_frame())
+
+
+@pytest.mark.parametrize('lists', [
+    [['a', 'b', 'a'], [], ['c'], ['b', 'b']],
+    [[], []],
+    [],
+])
+def test_ragged_round_trip(lists):
+    column = ragged_from_lists(lists)
+    assert len(column.offsets) == len(lists) + 1
+    assert column.values.dtype == np.int32
+    assert ragged_to_lists(column) == lists
+
+
+def test_ragged_non_lists_are_empty():
+    assert ragged_to_lists(ragged_from_lists([['a'], None, float('nan'), ('b', 'c')])) == [['a'], [], [], ['b', 'c']]
+
+
+def test_ragged_take_and_concat():
+    lists = [['a', 'b'], [], ['c', 'a', 'a'], ['d']]
+    column = ragged_from_lists(lists)
+    positions = [3, 0, 0, 1]
+    assert ragged_to_lists(ragged_take(column, positions)) == [lists[i] for i in positions]
+
+    other = [['e'], ['a', 'e'], []]
+    stacked = ragged_concat([column, ragged_from_lists(other)])
+    assert ragged_to_lists(stacked) == lists + other
+    assert len(set(stacked.vocab)) == len(stacked.vocab)
@@ -0,0 +1,249 @@
+"""Headless analysis helpers used by the TFT Performance Dashboard"""
+
+from .aggregates import (
+    analyze_level_performance,
+    analyze_mode_performance,
+    build_rollups,
+    filter_rollups,
+    level_performance_from_rollups,
+    mode_performance_from_rollups,
+)
+from .archetypes import ARCHETYPE_STAT_COLUMNS, ArchetypeIndex, ArchetypeModel, archetype_summary
+from .cache import AggregateCache, estimate_nbytes
+from .columnar import (
+    CompactMatches,
+    patch_from_version,
+    ragged_from_lists,
+    ragged_take,
+    ragged_to_lists,
+)
+from .confidence import (
+    EXPECTED_PLACEMENT,
+    INTERVAL_COLUMNS,
+    placement_histogram,
+    placement_intervals,
+    with_intervals,
+)
+from .cooccurrence import (
+    PAIR_STAT_COLUMNS,
+    cooccurrence_stats,
+    item_pair_stats,
+    item_trait_stats,
+    pair_histograms,
+)
+from .engine import (
+    GAME_MODES,
+    Dataset,
+    archetype_report,
+    best_items,
+    best_performers,
+    best_traits,
+    item_pairs,
+    item_performance,
+    item_traits,
+    key_takeaways,
+    level_performance,
+    mode_comparison,
+    mode_positions,
+    performance_trend,
+    period_window,
+    placement_prior,
+    prefix_index,
+    problem_items,
+    rollups,
+    time_index,
+    trait_performance,
+    underperforming_items,
+    window_bounds,
+    window_positions,
+    window_summary,
+)
+from .filters import apply_min_games, filter_matches, filter_positions
+from .icons import IconCache, seed_icons
+from .items import ITEM_STAT_COLUMNS, analyze_item_performance, explode_items
+from .jsonstream import RaggedColumn, iter_export, load_export_columns
+from .memo import AnalysisStages, discard_stale_versions, frame_fingerprint
+from .mock_riot import MockRiotServer
+from .prefix import PrefixIndex
+from .ratelimit import RIOT_DEV_LIMITS, RateLimiter
+from .refresh import RefreshWorker, json_export_source, riot_source
+from .registry import ItemInfo, ItemRegistry, clean_item_name
+from .render import (
+    BAD_COLOR,
+    GOOD_COLOR,
+    OK_COLOR,
+    WEBGL_POINTS,
+    placement_color,
+    placement_emoji,
+    render_archetype_rows,
+    render_item_grid,
+    render_item_rows,
+    render_pair_rows,
+    render_recent_games,
+    render_trait_grid,
+    use_webgl,
+)
+from .riot import RiotClient, RiotIngester, match_to_row
+from .snapshot import (
+    SNAPSHOT_VERSION,
+    convert_export,
+    list_snapshots,
+    load_snapshot,
+    open_match_frame,
+    save_snapshot,
+    snapshot_path,
+)
+from .store import (
+    ROLLUP_COLUMNS,
+    IncrementalMatchFrame,
+    MatchSnapshot,
+    MatchStore,
+    build_snapshot,
+    derive_match_id,
+    derive_puuid,
+)
+from .timeindex import TimeIndex, day_start_ms, days_back
+from .timing import SectionTimer, Tracer, activate, active_tracer, count, span, traced
+from .traits import (
+    TRAIT_STAT_COLUMNS,
+    analyze_trait_performance,
+    build_trait_table,
+    build_trait_table_from_ragged,
+    concat_trait_tables,
+    parse_trait,
+    select_trait_rows,
+)
+from .trends import TREND_COLUMNS, TREND_POINTS, TREND_WINDOWS, RollingTrend, TrendIndex, downsample_trend, lttb_indices
+
+__all__ = [
+    'ARCHETYPE_STAT_COLUMNS',
+    'BAD_COLOR',
+    'EXPECTED_PLACEMENT',
+    'GAME_MODES',
+    'GOOD_COLOR',
+    'OK_COLOR',
+    'RIOT_DEV_LIMITS',
+    'ROLLUP_COLUMNS',
+    'SNAPSHOT_VERSION',
+    'TREND_COLUMNS',
+    'TREND_POINTS',
+    'TREND_WINDOWS',
+    'WEBGL_POINTS',
+    'AggregateCache',
+    'AnalysisStages',
+    'ArchetypeIndex',
+    'ArchetypeModel',
+    'CompactMatches',
+    'Dataset',
+    'INTERVAL_COLUMNS',
+    'ITEM_STAT_COLUMNS',
+    'IconCache',
+    'ItemInfo',
+    'ItemRegistry',
+    'IncrementalMatchFrame',
+    'MatchSnapshot',
+    'MatchStore',
+    'MockRiotServer',
+    'PAIR_STAT_COLUMNS',
+    'PrefixIndex',
+    'RaggedColumn',
+    'RateLimiter',
+    'RefreshWorker',
+    'RiotClient',
+    'RiotIngester',
+    'RollingTrend',
+    'SectionTimer',
+    'TRAIT_STAT_COLUMNS',
+    'TimeIndex',
+    'Tracer',
+    'TrendIndex',
+    'activate',
+    'active_tracer',
+    'analyze_item_performance',
+    'analyze_level_performance',
+    'analyze_mode_performance',
+    'analyze_trait_performance',
+    'apply_min_games',
+    'archetype_report',
+    'archetype_summary',
+    'best_items',
+    'best_performers',
+    'best_traits',
+    'build_rollups',
+    'build_snapshot',
+    'build_trait_table',
+    'build_trait_table_from_ragged',
+    'clean_item_name',
+    'concat_trait_tables',
+    'convert_export',
+    'cooccurrence_stats',
+    'count',
+    'day_start_ms',
+    'days_back',
+    'derive_match_id',
+    'derive_puuid',
+    'discard_stale_versions',
+    'downsample_trend',
+    'estimate_nbytes',
+    'explode_items',
+    'filter_matches',
+    'filter_rollups',
+    'filter_positions',
+    'frame_fingerprint',
+    'item_pair_stats',
+    'item_pairs',
+    'item_performance',
+    'item_trait_stats',
+    'item_traits',
+    'iter_export',
+    'json_export_source',
+    'key_takeaways',
+    'level_performance',
+    'level_performance_from_rollups',
+    'list_snapshots',
+    'load_export_columns',
+    'load_snapshot',
+    'lttb_indices',
+    'match_to_row',
+    'mode_comparison',
+    'mode_performance_from_rollups',
+    'mode_positions',
+    'open_match_frame',
+    'pair_histograms',
+    'parse_trait',
+    'patch_from_version',
+    'performance_trend',
+    'period_window',
+    'placement_color',
+    'placement_emoji',
+    'placement_histogram',
+    'placement_intervals',
+    'placement_prior',
+    'prefix_index',
+    'problem_items',
+    'ragged_from_lists',
+    'ragged_take',
+    'ragged_to_lists',
+    'render_archetype_rows',
+    'render_item_grid',
+    'render_item_rows',
+    'render_pair_rows',
+    'render_recent_games',
+    'render_trait_grid',
+    'riot_source',
+    'rollups',
+    'save_snapshot',
+    'seed_icons',
+    'select_trait_rows',
+    'snapshot_path',
+    'span',
+    'time_index',
+    'trait_performance',
+    'traced',
+    'underperforming_items',
+    'use_webgl',
+    'window_bounds',
+    'window_positions',
+    'window_summary',
+    'with_intervals',
+]
@@ -0,0 +1,117 @@
+"""Level and game-mode summaries shown by the dashboard
+
+The analyze_* functions scan a match frame. Over a whole history the same
+answers come from rollups: per (game_mode, level, patch, day) sums that
+MatchStore maintains on ingest, or build_rollups() derives once from a
+frame that is not store-backed.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .store import ROLLUP_COLUMNS
+from .timing import count
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def _placed(df):
+    """df with missing placements (NaN or MISSING_VALUE) as NaN, so means skip them"""
+    return df.assign(placement=df['placement'].where(df['placement'] >= 1))
+
+
+def analyze_level_performance(df):
+    """Average placement and game count per final level, sorted by level"""
+    count('rows processed', len(df))
+    if df.empty:
+        return pd.DataFrame(columns=['level', 'placement', 'games'])
+
+    grouped = _placed(df).groupby('level')['placement']
+    return pd.DataFrame({
+        'placement': grouped.mean().round(2),
+        'games': grouped.size(),
+    }).reset_index()
+
+
+def analyze_mode_performance(df):
+    """Average placement, level and damage plus game count per game mode"""
+    count('rows processed', len(df))
+    # Plain labels, so modes sort by name whether or not the column is categorical
+    mode_comparison = _placed(df).astype({'game_mode': object}).groupby('game_mode').agg({
+        'placement': 'mean',
+        'level': 'mean',
+        'damage': 'mean',
+        'game_mode': 'count'
+    }).round(2)
+    mode_comparison.columns = ['avg_placement', 'avg_level', 'avg_damage', 'games']
+    return mode_comparison
+
+
+def build_rollups(df):
+    """Rollup rows (ROLLUP_COLUMNS) for a match frame, as MatchStore.rollups() returns them"""
+    count('rows processed', len(df))
+    placement = df['placement'].to_numpy()
+    placed = placement >= 1
+    # Group on UTC day numbers; only the result rows are formatted as dates
+    if 'game_datetime' in df.columns:
+        times = df['game_datetime'].to_numpy()
+        day_numbers = np.where(times >= 0, times // DAY_MS, -1)
+    else:
+        day_numbers = np.full(len(df), -1)
+    frame = pd.DataFrame({
+        'game_mode': df['game_mode'].astype(object).fillna('').to_numpy(),
+        'level': df['level'].to_numpy(),
+        'patch': df['patch'].astype(object).fillna('').to_numpy() if 'patch' in df.columns else '',
+        'day': day_numbers,
+        'placed': placed,
+        'placement_sum': np.where(placed, placement, 0),
+        'top4': placed & (placement <= 4),
+        'damage_sum': df['damage'].to_numpy(),
+    })
+    grouped = frame.groupby(['game_mode', 'level', 'patch', 'day'], sort=False)
+    rollups = grouped[['placed', 'placement_sum', 'top4', 'damage_sum']].sum().astype(np.int64)
+    rollups['games'] = grouped.size()
+    rollups = rollups.reset_index()
+    days = rollups['day'].to_numpy()
+    rollups['day'] = np.where(days >= 0, (days * DAY_MS).astype('datetime64[ms]').astype('datetime64[D]').astype(str), '')
+    return rollups[ROLLUP_COLUMNS]
+
+
+def filter_rollups(rollups, since_day=None, patch=None):
+    """Rollup rows from a UTC day ('YYYY-MM-DD') on and/or of one patch"""
+    if since_day is not None:
+        rollups = rollups[rollups['day'] >= since_day]
+    if patch is not None:
+        rollups = rollups[rollups['patch'] == patch]
+    return rollups
+
+
+def level_performance_from_rollups(rollups, game_mode='All'):
+    """analyze_level_performance over every match the rollups cover, filtered by game mode"""
+    if game_mode != 'All':
+        rollups = rollups[rollups['game_mode'] == game_mode]
+    if rollups.empty:
+        return pd.DataFrame(columns=['level', 'placement', 'games'])
+
+    sums = rollups.groupby('level')[['placement_sum', 'placed', 'games']].sum()
+    return pd.DataFrame({
+        'placement': (sums['placement_sum'] / sums['placed']).round(2),
+        'games': sums['games'],
+    }).reset_index()
+
+
+def mode_performance_from_rollups(rollups):
+    """analyze_mode_performance over every match the rollups cover"""
+    # Matches without a game mode are left out, as groupby drops them
+    rollups = rollups[rollups['game_mode'] != '']
+    sums = rollups.assign(level_sum=rollups['level'] * rollups['games']).groupby('game_mode')[
+        ['placement_sum', 'placed', 'level_sum', 'damage_sum', 'games']
+    ].sum()
+    games = sums['games']
+    mode_comparison = pd.DataFrame({
+        'avg_placement': sums['placement_sum'] / sums['placed'],
+        'avg_level': sums['level_sum'] / games,
+        'avg_damage': sums['damage_sum'] / games,
+    }).round(2)
+    mode_comparison['games'] = games
+    return mode_comparison
@@ -0,0 +1,301 @@
+"""Composition archetypes: k-modes clustering of matches by trait tokens
+
+Each match is a sparse set of tokens, one per active trait ('Vanguard')
+and one per trait at its tier ('Vanguard 3'), so boards that share traits
+at different tiers are still similar. Archetypes are k-modes clusters
+under Jaccard distance: a mode is the set of tokens held by at least half
+of its matches. Fitting runs on a bounded sample and is seeded with the
+k-means++ style from sampled matches; assigning matches to the modes is a
+blocked sparse product, so both scale past 100k matches.
+
+ArchetypeIndex keeps a player's assignments and, as new matches arrive,
+only assigns those against the existing modes, refitting when too many
+of them fit no archetype.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .columnar import ragged_take
+from .cooccurrence import distinct_rows
+from .jsonstream import RaggedColumn
+from .timing import count
+
+DEFAULT_ARCHETYPES = 12
+# Matches farther than this (Jaccard distance) from every mode are left unassigned
+MAX_DISTANCE = 0.6
+# Growth in the unassigned share, since the last fit, at which ArchetypeIndex refits
+REFIT_SHARE = 0.1
+FIT_SAMPLE = 50_000
+FIT_ITERATIONS = 10
+ASSIGN_BLOCK_MATCHES = 100_000
+UNASSIGNED = -1
+UNASSIGNED_NAME = 'Other'
+
+ARCHETYPE_STAT_COLUMNS = ['games', 'avg_placement', 'top4_rate', 'top_items']
+
+
+def _row_sums(values, offsets):
+    """Per-row sums of a (tokens x k) array laid out by CSR offsets"""
+    cumulative = np.zeros((len(values) + 1,) + values.shape[1:], dtype=values.dtype)
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+
+class ArchetypeModel:
+    """Fitted archetype modes over a token vocabulary
+
+    modes is a list of token-id arrays, vocab the token labels. Use fit()
+    to build one and assign() to label any trait table with it, including
+    matches seen after fitting (tokens it never saw only widen the
+    distance).
+    """
+
+    def __init__(self, modes, vocab, max_distance=MAX_DISTANCE):
+        self.modes = [np.asarray(mode, dtype=np.int64) for mode in modes]
+        self.vocab = list(vocab)
+        self.max_distance = max_distance
+        self._token_ids = {label: token for token, label in enumerate(self.vocab)}
+        self.names = [self._name(mode) for mode in self.modes]
+
+    def __len__(self):
+        return len(self.modes)
+
+    def _name(self, mode):
+        """Highest-tier traits of a mode, e.g. 'Syndicate 4 + Vanguard 3'"""
+        tiered = []
+        for token in mode:
+            trait, _, tier = self.vocab[token].rpartition(' ')
+            if trait and tier.isdigit():
+                tiered.append((-int(tier), trait))
+        return ' + '.join(f'{trait} {-tier}' for tier, trait in sorted(tiered)[:3]) or 'Mixed'
+
+    @staticmethod
+    def tokens(trait_table, n_matches, token_ids=None):
+        """(RaggedColumn of token ids per match, token id map) for a trait table
+
+        Labels missing from token_ids (a dict, updated in place) are given
+        the next free ids.
+        """
+        token_ids = {} if token_ids is None else token_ids
+        match_idx = trait_table['match_idx'].to_numpy().astype(np.int64)
+        order = np.argsort(match_idx, kind='stable')
+        traits = trait_table['trait'].cat.codes.to_numpy()[order].astype(np.int64)
+        tiers = trait_table['tier'].to_numpy()[order].astype(np.int64)
+        names = trait_table['trait'].cat.categories
+
+        # Two tokens per trait row; labels are resolved once per distinct (trait, tier)
+        combos, combo_of_row = np.unique(traits * 64 + tiers, return_inverse=True)
+        combo_tokens = np.array([
+            [token_ids.setdefault(names[combo // 64], len(token_ids)),
+             token_ids.setdefault(f'{names[combo // 64]} {combo % 64}', len(token_ids))]
+            for combo in combos.tolist()
+        ], dtype=np.int64).reshape(-1, 2)
+        counts = np.bincount(match_idx, minlength=n_matches)
+        return RaggedColumn(
+            np.concatenate(([0], np.cumsum(counts * 2))),
+            combo_tokens[combo_of_row].reshape(-1),
+            None,
+        ), token_ids
+
+    def _membership(self):
+        """(vocab + 1) x k 0/1 matrix; the extra row is for tokens the model never saw"""
+        membership = np.zeros((len(self.vocab) + 1, len(self.modes)), dtype=np.float32)
+        for cluster, mode in enumerate(self.modes):
+            membership[mode, cluster] = 1
+        return membership
+
+    def distances(self, tokens):
+        """Jaccard distance of every match (a token RaggedColumn) to every mode"""
+        membership = self._membership()
+        mode_sizes = membership.sum(axis=0)
+        n_rows = len(tokens.offsets) - 1
+        result = np.empty((n_rows, len(self.modes)), dtype=np.float32)
+        for start in range(0, n_rows, ASSIGN_BLOCK_MATCHES):
+            stop = min(start + ASSIGN_BLOCK_MATCHES, n_rows)
+            offsets = tokens.offsets[start:stop + 1]
+            values = tokens.values[offsets[0]:offsets[-1]]
+            values = np.where(values < len(self.vocab), values, len(self.vocab))
+            shared = _row_sums(membership[values], offsets - offsets[0])
+            sizes = np.diff(offsets).astype(np.float32)[:, None]
+            union = sizes + mode_sizes - shared
+            result[start:stop] = 1 - shared / np.where(union > 0, union, 1)
+        return result
+
+    def assign(self, trait_table, n_matches):
+        """(archetype per match, UNASSIGNED when none is close enough; distance to it)"""
+        count('rows processed', n_matches)
+        if not self.modes:
+            return np.full(n_matches, UNASSIGNED, dtype=np.int32), np.ones(n_matches, dtype=np.float32)
+        # A copy of the vocabulary: unseen labels get ids past it and match no mode
+        tokens, _ = self.tokens(trait_table, n_matches, dict(self._token_ids))
+        distances = self.distances(tokens)
+        labels = distances.argmin(axis=1).astype(np.int32)
+        best = distances[np.arange(n_matches), labels]
+        labels[best > self.max_distance] = UNASSIGNED
+        return labels, best
+
+    @classmethod
+    def fit(cls, trait_table, n_matches, k=DEFAULT_ARCHETYPES, max_distance=MAX_DISTANCE,
+            iterations=FIT_ITERATIONS, sample=FIT_SAMPLE, seed=0):
+        """k-modes over (a sample of) the matches in a trait table"""
+        tokens, token_ids = cls.tokens(trait_table, n_matches)
+        vocab = list(token_ids)
+        rng = np.random.default_rng(seed)
+        rows = np.arange(n_matches)
+        if n_matches > sample:
+            rows = np.sort(rng.choice(n_matches, sample, replace=False))
+        sample_tokens = ragged_take(tokens, rows)
+        lengths = np.diff(sample_tokens.offsets)
+
+        model = cls(cls._seed_modes(sample_tokens, vocab, k, rng), vocab, max_distance)
+        row_of_token = np.repeat(np.arange(len(rows)), lengths)
+        labels = None
+        for _ in range(iterations):
+            if not model.modes:
+                break
+            new_labels = model.distances(sample_tokens).argmin(axis=1)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            model = cls(cls._update_modes(labels, row_of_token, sample_tokens.values, len(vocab), len(model)),
+                        vocab, max_distance)
+        # Drop modes nothing is close to any more
+        if model.modes:
+            final = model.distances(sample_tokens)
+            used = np.unique(final.argmin(axis=1)[final.min(axis=1) <= max_distance])
+            model = cls([model.modes[cluster] for cluster in used], vocab, max_distance)
+        return model
+
+    @classmethod
+    def _seed_modes(cls, tokens, vocab, k, rng):
+        """k-means++ seeding: sampled matches, each drawn with probability ~ distance^2 to the seeds so far"""
+        lengths = np.diff(tokens.offsets)
+        candidates = np.flatnonzero(lengths)
+        if not len(candidates):
+            return []
+        row_tokens = lambda row: tokens.values[tokens.offsets[row]:tokens.offsets[row + 1]]
+        seeds = [np.unique(row_tokens(rng.choice(candidates)))]
+        nearest = cls(seeds, vocab).distances(tokens)[:, 0]
+        while len(seeds) < k:
+            weights = np.where(lengths > 0, nearest.astype(np.float64) ** 2, 0)
+            if weights.sum() <= 0:
+                break
+            seeds.append(np.unique(row_tokens(rng.choice(len(weights), p=weights / weights.sum()))))
+            nearest = np.minimum(nearest, cls(seeds[-1:], vocab).distances(tokens)[:, 0])
+        return seeds
+
+    @staticmethod
+    def _update_modes(labels, row_of_token, token_values, n_tokens, k):
+        """Tokens held by at least half of each cluster's matches (its top token if none are)"""
+        sizes = np.bincount(labels, minlength=k)
+        frequency = np.bincount(labels[row_of_token] * n_tokens + token_values, minlength=k * n_tokens)
+        frequency = frequency.reshape(k, n_tokens)
+        modes = []
+        for cluster in range(k):
+            if sizes[cluster] == 0:
+                continue
+            mode = np.flatnonzero(frequency[cluster] * 2 >= sizes[cluster])
+            modes.append(mode if len(mode) else np.argsort(-frequency[cluster])[:1])
+        return modes
+
+
+class ArchetypeIndex:
+    """A player's archetype assignments, extended as new matches are prepended
+
+    update() takes a newest-first MatchSnapshot. Matches already labelled
+    keep their labels; only the new ones at the front are assigned against
+    the current modes. The model is refitted from scratch when there is
+    none yet, when the data no longer extends what was seen (e.g. a
+    snapshot was replaced) or when the unassigned share has grown by more
+    than refit_share since the last fit.
+    """
+
+    def __init__(self, k=DEFAULT_ARCHETYPES, refit_share=REFIT_SHARE):
+        self.k = k
+        self.refit_share = refit_share
+        self.model = None
+        self.labels = np.zeros(0, dtype=np.int32)
+        self.fits = 0
+        self._watermark = None
+        self._fitted_unassigned = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return int(self.labels.nbytes)
+
+    def update(self, snapshot):
+        """(model, archetype of every match in the snapshot's row order)
+
+        The pair stays consistent even if a later update refits the model.
+        """
+        with self._lock:
+            n_matches = len(snapshot.df)
+            n_new = n_matches - len(self.labels)
+            extends = (
+                self.model is not None and n_new >= 0
+                and snapshot.watermark is not None and self._watermark is not None
+                and snapshot.watermark >= self._watermark
+            )
+            if extends and n_new:
+                new_rows = snapshot.trait_table[snapshot.trait_table['match_idx'].to_numpy() < n_new]
+                new_labels, _ = self.model.assign(new_rows, n_new)
+                self.labels = np.concatenate((new_labels, self.labels))
+            unassigned = (self.labels == UNASSIGNED).mean() if len(self.labels) else 0.0
+            if not extends or unassigned > self._fitted_unassigned + self.refit_share:
+                if n_matches:
+                    self.model = ArchetypeModel.fit(snapshot.trait_table, n_matches, k=self.k)
+                    self.labels, _ = self.model.assign(snapshot.trait_table, n_matches)
+                    self._fitted_unassigned = (self.labels == UNASSIGNED).mean()
+                    self.fits += 1
+                else:
+                    self.labels = np.zeros(0, dtype=np.int32)
+            self._watermark = snapshot.watermark
+            return self.model, self.labels
+
+
+def archetype_summary(model, labels, matches, positions, top_items=3):
+    """Games, average placement, top-4 rate and most used items per archetype
+
+    Over the matches at positions; indexed by archetype name (UNASSIGNED_NAME
+    for matches no archetype fits), most played first. top_items lists
+    (item id, share of the archetype's games it appeared in).
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) == 0:
+        return pd.DataFrame(columns=ARCHETYPE_STAT_COLUMNS)
+    n_clusters = len(model) + 1  # the last slot collects unassigned matches
+    cluster = np.where(labels[positions] == UNASSIGNED, n_clusters - 1, labels[positions])
+    placement = matches.scalars['placement'][positions].astype(np.float64)
+
+    # Placement stats cover the games with a placement, like PrefixIndex
+    placed = placement >= 1
+    games = np.bincount(cluster, minlength=n_clusters)
+    placed_games = np.bincount(cluster, weights=placed, minlength=n_clusters)
+    placement_sum = np.bincount(cluster, weights=np.where(placed, placement, 0.0), minlength=n_clusters)
+    top4 = np.bincount(cluster, weights=placed & (placement <= 4), minlength=n_clusters)
+
+    # Item usage: games per (archetype, item), an item held twice counting once
+    items = distinct_rows(ragged_take(matches.items, positions))
+    n_items = len(items.vocab)
+    item_games = np.bincount(
+        np.repeat(cluster, np.diff(items.offsets)) * n_items + items.values, minlength=n_clusters * n_items
+    ).reshape(n_clusters, n_items)
+
+    seen = np.flatnonzero(games)
+    names = model.names + [UNASSIGNED_NAME]
+    placed_games = np.where(placed_games[seen] > 0, placed_games[seen], np.nan)
+    result = pd.DataFrame({
+        'games': games[seen],
+        'avg_placement': placement_sum[seen] / placed_games,
+        'top4_rate': top4[seen] / placed_games * 100,
+        'top_items': [
+            [(matches.items.vocab[item], item_games[c, item] / games[c])
+             for item in np.argsort(-item_games[c], kind='stable')[:top_items] if item_games[c, item]]
+            for c in seen
+        ],
+    }, index=pd.Index([names[c] for c in seen], name='archetype'))
+    return result.sort_values('games', ascending=False, kind='stable')
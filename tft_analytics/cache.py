@@ -0,0 +1,108 @@
+"""Memory-bounded LRU cache shared by every dashboard session"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_nbytes(value):
+    """Rough deep size of a cached value in bytes"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    if hasattr(value, 'to_plotly_json'):
+        # Plotly figures: their traces and layout as plain dicts, lists and arrays
+        return estimate_nbytes(value.to_plotly_json())
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class AggregateCache:
+    """Thread-safe LRU keyed by hashable tuples, evicting by total estimated size
+
+    A single entry larger than max_bytes is still returned to the caller but
+    never kept.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, nbytes=None):
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return value
+
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_bytes
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Cached value for key, computing and storing it on a miss
+
+        compute runs outside the lock, so two sessions missing the same key
+        at once may both compute it; the later result wins.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, compute())
+        return value
+
+    def items(self):
+        """Snapshot of (key, value) pairs, least recently used first"""
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def discard_where(self, predicate):
+        """Drop every entry whose key matches predicate; returns how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self.nbytes -= self._entries.pop(key)[1]
+        return len(stale)
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
@@ -0,0 +1,283 @@
+"""Compact columnar match storage with interned item and trait ids
+
+A match frame with Python lists of item and trait strings costs well over
+a kilobyte per match. CompactMatches keeps the same data as small-int
+columns plus items/traits as CSR (offsets, int32 codes) into interned
+vocabularies, and converts to and from the list-valued DataFrame so views
+that want rows can still have them.
+"""
+
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from .jsonstream import MISSING_VALUE, RaggedColumn, load_export_columns
+from .timing import traced
+
+# Scalar match fields and their compact dtypes
+SCALAR_DTYPES = {
+    'placement': np.int8,
+    'level': np.int8,
+    'gold_left': np.int16,
+    'damage': np.int32,
+    'units_count': np.int8,
+    'game_datetime': np.int64,  # match start, epoch milliseconds
+}
+# Column order of the list-valued frame the match store produces
+FRAME_COLUMNS = [
+    'match_id', 'placement', 'level', 'gold_left', 'damage', 'units_count', 'game_mode',
+    'game_datetime', 'patch', 'traits', 'items',
+]
+
+_PATCH_PATTERN = re.compile(r'(\d+)\.(\d+)')
+
+
+def patch_from_version(game_version):
+    """'Version 14.23.636.5632 (Nov 22 2024/15:20:15) [PUBLIC] ...' -> '14.23' (None when unparseable)"""
+    match = _PATCH_PATTERN.search(game_version) if isinstance(game_version, str) else None
+    return f"{int(match.group(1))}.{int(match.group(2))}" if match else None
+
+
+def patch_codes(version_codes, versions):
+    """(int16 codes, patch vocab) for interned game versions or patches"""
+    patches, remap = np.unique(
+        np.asarray([patch_from_version(version) or '' for version in versions], dtype=object), return_inverse=True
+    )
+    vocab = np.asarray([patch or None for patch in patches], dtype=object)
+    return remap.astype(np.int16)[version_codes], vocab
+
+
+def ragged_from_lists(lists):
+    """RaggedColumn for a sequence of lists (non-lists count as empty)"""
+    lists = [entries if isinstance(entries, (list, tuple)) else () for entries in lists]
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    codes, vocab = pd.factorize(pd.Series(list(chain.from_iterable(lists)), dtype=object), sort=False)
+    return RaggedColumn(
+        np.concatenate(([0], np.cumsum(lengths))),
+        codes.astype(np.int32),
+        np.asarray(vocab, dtype=object),
+    )
+
+
+def ragged_to_lists(column):
+    """Inverse of ragged_from_lists"""
+    strings = column.vocab[column.values].tolist()
+    bounds = column.offsets.tolist()
+    return [strings[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def ragged_lengths(column):
+    return np.diff(column.offsets)
+
+
+def ragged_take(column, positions):
+    """Rows of a RaggedColumn at the given positions, sharing its vocabulary"""
+    positions = np.asarray(positions, dtype=np.int64)
+    starts = column.offsets[positions]
+    lengths = column.offsets[positions + 1] - starts
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    # Flat source index of every kept value: its row start plus its rank within the row
+    rank = np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1], lengths)
+    return RaggedColumn(offsets, column.values[np.repeat(starts, lengths) + rank], column.vocab)
+
+
+def codes_to_categorical(codes, vocab):
+    """Categorical over interned codes, reusing the codes array when the vocabulary has no None
+
+    Missing entries (None) in the vocabulary become missing values, which
+    means remapping the codes into a new, still small-int, array.
+    """
+    known = np.fromiter((not pd.isna(entry) for entry in vocab), dtype=bool, count=len(vocab))
+    if not known.all():
+        remap = np.where(known, np.cumsum(known) - 1, -1).astype(codes.dtype)
+        codes = remap[codes] if len(remap) else np.full(len(codes), -1, dtype=codes.dtype)
+        vocab = vocab[known]
+    return pd.Categorical.from_codes(codes, categories=pd.Index(vocab, dtype=object))
+
+
+def _merge_vocabs(vocabs):
+    """Union vocabulary plus, per input, an array mapping its codes into the union"""
+    merged = {}
+    remaps = []
+    for vocab in vocabs:
+        remaps.append(np.fromiter(
+            (merged.setdefault(entry, len(merged)) for entry in vocab), dtype=np.int32, count=len(vocab)
+        ))
+    return np.asarray(list(merged), dtype=object), remaps
+
+
+def ragged_concat(columns):
+    """Stack RaggedColumns row-wise, merging their vocabularies"""
+    vocab, remaps = _merge_vocabs([column.vocab for column in columns])
+    offsets = [np.zeros(1, dtype=np.int64)]
+    base = 0
+    for column in columns:
+        offsets.append(column.offsets[1:] + base)
+        base += column.offsets[-1]
+    values = [remap[column.values] for column, remap in zip(columns, remaps)]
+    return RaggedColumn(
+        np.concatenate(offsets),
+        np.concatenate(values).astype(np.int32) if values else np.zeros(0, dtype=np.int32),
+        vocab,
+    )
+
+
+class CompactMatches:
+    """Matches as small-int columns plus interned, CSR-encoded items and traits
+
+    Row order is whatever the source had (newest first for store-backed
+    data). Missing scalar values are stored as -1. match_id is kept as a
+    fixed-width bytes array, or None when the source had no ids. Patches
+    are interned like game modes, with None for matches without one.
+    """
+
+    def __init__(self, scalars, game_mode, items, traits, match_id=None, patch=None):
+        self.scalars = {field: np.asarray(scalars[field], dtype=dtype) for field, dtype in SCALAR_DTYPES.items()}
+        self.game_mode = game_mode  # (int8 codes, vocab)
+        self.items = items
+        self.traits = traits
+        self.match_id = match_id
+        if patch is None:
+            patch = (np.zeros(len(game_mode[0]), dtype=np.int16), np.asarray([None], dtype=object))
+        self.patch = patch  # (int16 codes, vocab)
+
+    def __len__(self):
+        return len(self.game_mode[0])
+
+    @property
+    def nbytes(self):
+        arrays = list(self.scalars.values()) + [self.game_mode[0], self.patch[0]]
+        arrays += [self.items.offsets, self.items.values, self.traits.offsets, self.traits.values]
+        if self.match_id is not None:
+            arrays.append(self.match_id)
+        vocab_bytes = sum(
+            len(entry or '') + 49
+            for vocab in (self.items.vocab, self.traits.vocab, self.game_mode[1], self.patch[1]) for entry in vocab
+        )  # roughly sys.getsizeof of a short ASCII str
+        return int(sum(a.nbytes for a in arrays) + vocab_bytes)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Encode a list-valued match DataFrame (the store's or the sample data's)"""
+        scalars = {}
+        for field in SCALAR_DTYPES:
+            if field in df.columns:
+                scalars[field] = pd.to_numeric(df[field], errors='coerce').fillna(MISSING_VALUE).to_numpy()
+            else:
+                scalars[field] = np.full(len(df), MISSING_VALUE)
+
+        game_modes = df['game_mode'] if 'game_mode' in df.columns else pd.Series([None] * len(df), dtype=object)
+        codes, vocab = pd.factorize(game_modes.astype(object), sort=False, use_na_sentinel=False)
+
+        # The store derives patch on write; other frames may only carry game_version
+        versions = next((df[column] for column in ('patch', 'game_version') if column in df.columns), None)
+        patch = None
+        if versions is not None:
+            version_codes, version_vocab = pd.factorize(versions.astype(object), sort=False, use_na_sentinel=False)
+            patch = patch_codes(version_codes, version_vocab)
+
+        match_id = None
+        if 'match_id' in df.columns:
+            match_id = np.asarray([(value or '').encode('utf-8') for value in df['match_id']], dtype=np.bytes_)
+
+        return cls(
+            scalars,
+            (codes.astype(np.int8), np.asarray(vocab, dtype=object)),
+            ragged_from_lists(df['items'] if 'items' in df.columns else [()] * len(df)),
+            ragged_from_lists(df['traits'] if 'traits' in df.columns else [()] * len(df)),
+            match_id,
+            patch,
+        )
+
+    @classmethod
+    def from_export_columns(cls, columns):
+        """Wrap the columns produced by jsonstream.load_export_columns"""
+        match_ids = columns['match_id']
+        match_id = None
+        if len(match_ids) and any(value is not None for value in match_ids):
+            match_id = np.asarray([(value or '').encode('utf-8') for value in match_ids], dtype=np.bytes_)
+        return cls(
+            {field: columns[field] for field in SCALAR_DTYPES},
+            columns['game_mode'],
+            columns['items'],
+            columns['traits'],
+            match_id,
+            patch_codes(*columns['game_version']),
+        )
+
+    @classmethod
+    @traced('load export')
+    def load_json(cls, path):
+        """Stream a tft_dashboard_data.json export; returns (player_info, CompactMatches)"""
+        player_info, columns = load_export_columns(path)
+        return player_info, cls.from_export_columns(columns)
+
+    @classmethod
+    def concat(cls, parts):
+        """Stack several CompactMatches row-wise, merging vocabularies"""
+        parts = [part for part in parts if len(part)] or parts[:1]
+        mode_vocab, mode_remaps = _merge_vocabs([part.game_mode[1] for part in parts])
+        patch_vocab, patch_remaps = _merge_vocabs([part.patch[1] for part in parts])
+        match_id = None
+        if all(part.match_id is not None for part in parts):
+            match_id = np.concatenate([part.match_id for part in parts])
+        return cls(
+            {field: np.concatenate([part.scalars[field] for part in parts]) for field in SCALAR_DTYPES},
+            (np.concatenate([remap[part.game_mode[0]] for part, remap in zip(parts, mode_remaps)]).astype(np.int8),
+             mode_vocab),
+            ragged_concat([part.items for part in parts]),
+            ragged_concat([part.traits for part in parts]),
+            match_id,
+            (np.concatenate([remap[part.patch[0]] for part, remap in zip(parts, patch_remaps)]).astype(np.int16),
+             patch_vocab),
+        )
+
+    def take(self, positions):
+        """The matches at the given row positions"""
+        positions = np.asarray(positions, dtype=np.int64)
+        return CompactMatches(
+            {field: values[positions] for field, values in self.scalars.items()},
+            (self.game_mode[0][positions], self.game_mode[1]),
+            ragged_take(self.items, positions),
+            ragged_take(self.traits, positions),
+            None if self.match_id is None else self.match_id[positions],
+            (self.patch[0][positions], self.patch[1]),
+        )
+
+    def game_modes(self):
+        """Per-match game mode strings (shared objects from the vocabulary)"""
+        codes, vocab = self.game_mode
+        return vocab[codes] if len(vocab) else np.full(len(codes), None, dtype=object)
+
+    def patches(self):
+        """Per-match patch strings ('14.23'), None where unknown"""
+        codes, vocab = self.patch
+        return vocab[codes]
+
+    def scalar_frame(self):
+        """Every column except items/traits, as a DataFrame for filters and aggregates
+
+        The numeric columns are the scalar arrays themselves (memory maps
+        included) and game_mode/patch are categoricals over their codes, so
+        nothing per match is copied.
+        """
+        return pd.DataFrame({
+            **self.scalars,
+            'game_mode': codes_to_categorical(*self.game_mode),
+            'patch': codes_to_categorical(*self.patch),
+        }, copy=False)
+
+    def to_frame(self, index=None):
+        """The list-valued DataFrame this was built from (missing scalars come back as -1)"""
+        data = {}
+        if self.match_id is not None:
+            data['match_id'] = [value.decode('utf-8') for value in self.match_id.tolist()]
+        for field in SCALAR_DTYPES:
+            data[field] = self.scalars[field].astype(np.int64)
+        data['game_mode'] = self.game_modes()
+        data['patch'] = self.patches()
+        data['traits'] = ragged_to_lists(self.traits)
+        data['items'] = ragged_to_lists(self.items)
+        return pd.DataFrame(data, columns=[c for c in FRAME_COLUMNS if c in data], index=index)
@@ -0,0 +1,255 @@
+"""Item-pair and item-trait co-occurrence from the CSR match columns
+
+A RaggedColumn with each row de-duplicated is a sparse match x entity
+incidence matrix A in CSR form. Pair counts are A^T A (or A^T B for items
+against traits) and placement sums are A^T diag(placement) B; both are
+computed the way a row-by-row sparse product is, by expanding every
+match's row into its entity pairs with array arithmetic and reducing the
+pair keys into per-pair placement histograms with bincount. Matches are
+processed in blocks so the expanded pairs stay bounded, and the reduction
+switches from a dense n_left x n_right accumulator to merging sorted pair
+keys when the vocabularies are too large for one.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .columnar import ragged_take
+from .items import ITEM_STAT_COLUMNS
+from .jsonstream import RaggedColumn
+from .timing import count
+
+# Columns returned by the pair functions, in display order
+PAIR_STAT_COLUMNS = ['first', 'second'] + ITEM_STAT_COLUMNS
+
+# Matches whose pairs are expanded at once
+PAIR_BLOCK_MATCHES = 100_000
+# Largest n_left * n_right reduced with a dense accumulator
+DENSE_PAIR_LIMIT = 1 << 20
+# Largest padded row-width product paired column by column
+PADDED_PAIR_LIMIT = 256
+# Placements 1..8 are the histogram bins every pair is reduced into
+PLACEMENTS = 8
+
+
+def _padded(column):
+    """Rows of a RaggedColumn as a sorted (rows x widest row) int32 matrix
+
+    Duplicates within a row and empty cells hold len(vocab), which sorts
+    after every real code.
+    """
+    lengths = np.diff(column.offsets)
+    n_rows = len(lengths)
+    width = int(lengths.max()) if n_rows else 0
+    padding = len(column.vocab)
+    rank = np.arange(len(column.values), dtype=np.int64) - np.repeat(column.offsets[:-1], lengths)
+    padded = np.full((n_rows, width), padding, dtype=np.int32)
+    padded[np.repeat(np.arange(n_rows), lengths), rank] = column.values
+    padded.sort(axis=1)
+    if width > 1:
+        padded[:, 1:][padded[:, 1:] == padded[:, :-1]] = padding
+        padded.sort(axis=1)
+    # Drop trailing columns that only hold padding
+    used = int((padded != padding).sum(axis=1).max()) if n_rows else 0
+    return padded[:, :used]
+
+
+def _max_row_length(column):
+    return int(np.diff(column.offsets).max()) if len(column.offsets) > 1 else 0
+
+
+def distinct_rows(column):
+    """Incidence form of a RaggedColumn: each row's codes sorted, duplicates dropped"""
+    lengths = np.diff(column.offsets)
+    if len(lengths) * _max_row_length(column) <= 4 * len(column.values) + 1024:
+        padded = _padded(column)
+        keep = padded != len(column.vocab)
+        values = padded[keep]
+        counts = keep.sum(axis=1)
+    else:
+        rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        order = np.lexsort((column.values, rows))
+        values, rows = column.values[order], rows[order]
+        keep = np.ones(len(values), dtype=bool)
+        keep[1:] = (values[1:] != values[:-1]) | (rows[1:] != rows[:-1])
+        values = values[keep]
+        counts = np.bincount(rows[keep], minlength=len(lengths))
+    return RaggedColumn(np.concatenate(([0], np.cumsum(counts))), values.astype(np.int32), column.vocab)
+
+
+def trait_rows(trait_table, n_matches):
+    """Normalized trait names per match (a RaggedColumn) from a trait table"""
+    match_idx = trait_table['match_idx'].to_numpy()
+    order = np.argsort(match_idx, kind='stable')
+    counts = np.bincount(match_idx, minlength=n_matches)
+    return RaggedColumn(
+        np.concatenate(([0], np.cumsum(counts))),
+        trait_table['trait'].cat.codes.to_numpy()[order].astype(np.int32),
+        np.asarray(trait_table['trait'].cat.categories, dtype=object),
+    )
+
+
+def _ragged_pairs(left, right, start, stop, within):
+    """(left code, right code, match row) for every entity pair in matches [start, stop)
+
+    left and right are distinct rows (RaggedColumns).
+    """
+    a_start = left.offsets[start:stop]
+    a_len = left.offsets[start + 1:stop + 1] - a_start
+    b_start = right.offsets[start:stop]
+    b_len = right.offsets[start + 1:stop + 1] - b_start
+
+    counts = a_len * b_len
+    total = int(counts.sum())
+    row = np.repeat(np.arange(start, stop, dtype=np.int64), counts)
+    # Rank of each pair within its match, split into (left, right) offsets
+    local = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    width = np.repeat(b_len, counts)
+    a = left.values[np.repeat(a_start, counts) + local // width]
+    b = right.values[np.repeat(b_start, counts) + local % width]
+    if within:
+        keep = a < b  # rows are sorted and distinct, so this is each unordered pair once
+        a, b, row = a[keep], b[keep], row[keep]
+    return a, b, row
+
+
+def _padded_pairs(left, right, start, stop, within, left_padding, right_padding):
+    """Same pairs as _ragged_pairs, read column by column off padded matrices
+
+    Rows are sorted with padding last, so within one matrix a real cell j
+    implies every cell i < j is real too; across two matrices both cells
+    are checked.
+    """
+    left, right = left[start:stop], right[start:stop]
+    rows = np.arange(start, stop, dtype=np.int64)
+    a_parts, b_parts, row_parts = [], [], []
+    for j in range(right.shape[1]):
+        right_real = right[:, j] < right_padding
+        for i in range(j if within else left.shape[1]):
+            valid = np.flatnonzero(right_real if within else right_real & (left[:, i] < left_padding))
+            a_parts.append(left[valid, i])
+            b_parts.append(right[valid, j])
+            row_parts.append(rows[valid])
+    if not a_parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(a_parts), np.concatenate(b_parts), np.concatenate(row_parts)
+
+
+def _merge(parts):
+    """Sum sparse (keys, counts) histograms into one"""
+    keys, inverse = np.unique(np.concatenate([part[0] for part in parts]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([part[1] for part in parts]), minlength=len(keys))
+    return keys, counts
+
+
+def pair_histograms(left, placements, right=None, block_size=PAIR_BLOCK_MATCHES):
+    """Placement histogram of every co-occurring pair
+
+    left and right are RaggedColumns over the same matches; an entity held
+    twice in a match counts once. Without right, unordered pairs within
+    left are counted once each. Matches without a placement in 1..8 count
+    for no pair. Returns (pair keys, histogram) where a key is
+    left_code * len(right.vocab) + right_code and the histogram has one
+    row per key and PLACEMENTS columns, placement 1 first.
+    """
+    within = right is None
+    right = left if within else right
+    bins = np.asarray(placements, dtype=np.int64) - 1
+    n_rows = len(left.offsets) - 1
+    count('rows processed', n_rows)
+    n_right = len(right.vocab)
+    size = len(left.vocab) * n_right
+    dense = size <= DENSE_PAIR_LIMIT
+
+    # Short rows pair off column by column; long ones expand pair by pair
+    if _max_row_length(left) * _max_row_length(right) <= PADDED_PAIR_LIMIT:
+        left_rows = _padded(left)
+        right_rows = left_rows if within else _padded(right)
+        paddings = (len(left.vocab), n_right)
+        block_pairs = lambda start, stop: _padded_pairs(left_rows, right_rows, start, stop, within, *paddings)
+    else:
+        left_rows = distinct_rows(left)
+        right_rows = left_rows if within else distinct_rows(right)
+        block_pairs = lambda start, stop: _ragged_pairs(left_rows, right_rows, start, stop, within)
+
+    # Keys are binned as key * PLACEMENTS + placement, so one bincount per block fills the histogram
+    counts = np.zeros(size * PLACEMENTS) if dense else None
+    merged, pending = (np.zeros(0, dtype=np.int64), np.zeros(0)), []
+    for start in range(0, n_rows, block_size):
+        a, b, row = block_pairs(start, min(start + block_size, n_rows))
+        placed = (bins[row] >= 0) & (bins[row] < PLACEMENTS)
+        binned = (a[placed].astype(np.int64) * n_right + b[placed]) * PLACEMENTS + bins[row[placed]]
+        if dense:
+            counts += np.bincount(binned, minlength=len(counts))
+        else:
+            pending.append(np.unique(binned, return_counts=True))
+            # Merge once the pending blocks outgrow the merged histogram, so each entry is re-sorted O(log blocks) times
+            if sum(len(part[0]) for part in pending) >= len(merged[0]):
+                merged, pending = _merge([merged] + pending), []
+
+    if dense:
+        histogram = counts.reshape(size, PLACEMENTS)
+        pair_keys = np.flatnonzero(histogram.any(axis=1))
+        return pair_keys, histogram[pair_keys].astype(np.int64)
+
+    keys, counts = _merge([merged] + pending)
+    # keys are sorted, so each pair's placements are adjacent
+    pair_of_key = keys // PLACEMENTS
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = pair_of_key[1:] != pair_of_key[:-1]
+    pair_keys, pair_index = pair_of_key[first], np.cumsum(first) - 1
+    histogram = np.zeros((len(pair_keys), PLACEMENTS), dtype=np.int64)
+    histogram[pair_index, keys % PLACEMENTS] = counts.astype(np.int64)
+    return pair_keys, histogram
+
+
+def cooccurrence_stats(left, placements, right=None, min_games=1, block_size=PAIR_BLOCK_MATCHES):
+    """Games and placement stats for every pair of entities seen in the same match
+
+    Same counting rules as pair_histograms; pairs with fewer than min_games
+    games are dropped before labels are attached. Returns PAIR_STAT_COLUMNS
+    with first/second as vocabulary labels, in key order.
+    """
+    right_vocab = left.vocab if right is None else right.vocab
+    pair_keys, histogram = pair_histograms(left, placements, right, block_size)
+    games = histogram.sum(axis=1)
+    enough = games >= min_games
+    if not enough.any():
+        return pd.DataFrame(columns=PAIR_STAT_COLUMNS)
+    pair_keys, histogram, games = pair_keys[enough], histogram[enough], games[enough]
+
+    n_right = len(right_vocab)
+    top4 = histogram[:, :4].sum(axis=1)
+    top2 = histogram[:, :2].sum(axis=1)
+    placement_sum = histogram @ np.arange(1, PLACEMENTS + 1)
+    return pd.DataFrame({
+        'first': left.vocab[pair_keys // n_right],
+        'second': right_vocab[pair_keys % n_right],
+        'games': games,
+        'top4': top4,
+        'top2': top2,
+        'avg_placement': placement_sum / games,
+        'top4_rate': top4 / games * 100,
+        'top2_rate': top2 / games * 100,
+    }, columns=PAIR_STAT_COLUMNS)
+
+
+def item_pair_stats(matches, positions, min_games=1):
+    """Stats for every pair of items built together, over the matches at positions"""
+    positions = np.asarray(positions, dtype=np.int64)
+    return cooccurrence_stats(
+        ragged_take(matches.items, positions), matches.scalars['placement'][positions], min_games=min_games
+    )
+
+
+def item_trait_stats(matches, trait_table, positions, min_games=1):
+    """Stats for every (item, trait) held in the same match, over the matches at positions"""
+    positions = np.asarray(positions, dtype=np.int64)
+    traits = trait_rows(trait_table, len(matches))
+    return cooccurrence_stats(
+        ragged_take(matches.items, positions),
+        matches.scalars['placement'][positions],
+        right=ragged_take(traits, positions),
+        min_games=min_games,
+    )
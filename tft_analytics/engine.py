@@ -0,0 +1,322 @@
+"""Headless analysis engine: the dashboard's questions as functions over a Dataset
+
+A Dataset is one player's matches (a MatchSnapshot) plus the version its
+results are cached under. Every function here takes a Dataset and filter
+arguments and returns plain DataFrames, dicts or lists, so batch jobs,
+benchmarks and workers run the same analysis as the page without
+importing streamlit or plotly.
+
+The window argument `games` is either the newest N games of the mode (an
+int, None for all of them) or a (start, stop) rank range, as period_window
+returns for a date range or patch; the PrefixIndex answers both alike.
+
+Results are memoized in the Dataset's AggregateCache under the keys
+AnalysisStages uses, so passing the dashboard's shared cache lets the
+page and any other caller reuse each other's work, and
+discard_stale_versions frees them when a newer snapshot is published.
+"""
+
+from .aggregates import (
+    analyze_level_performance,
+    build_rollups,
+    filter_rollups,
+    level_performance_from_rollups,
+    mode_performance_from_rollups,
+)
+from .archetypes import archetype_summary
+from .cache import AggregateCache
+from .columnar import CompactMatches
+from .confidence import EXPECTED_PLACEMENT, placement_histogram, with_intervals
+from .cooccurrence import item_pair_stats, item_trait_stats
+from .filters import apply_min_games, filter_positions
+from .memo import AnalysisStages, frame_fingerprint
+from .prefix import PrefixIndex
+from .snapshot import DEFAULT_SNAPSHOT_DIR, open_match_frame
+from .store import build_snapshot
+from .timeindex import TimeIndex, day_start_ms
+from .trends import TREND_POINTS, TrendIndex, downsample_trend
+
+GAME_MODES = ['All', 'Solo', 'Double Up']
+# Cache of a Dataset created without one
+DATASET_CACHE_BYTES = 256 * 1024 ** 2
+# Grid size and default trend window the dashboard shows
+TOP_ENTITIES = 9
+TREND_WINDOW = 20
+
+
+class Dataset:
+    """One player's matches and the version analysis results are cached under
+
+    source names the data (a puuid, a file); the version is (source,
+    watermark) for store-backed snapshots and (source, fingerprint) for
+    anything else. With the MatchStore the snapshot came from, whole-history
+    summaries read the store's rollups instead of scanning matches.
+    """
+
+    def __init__(self, snapshot, source='dataset', cache=None, store=None):
+        self.snapshot = snapshot
+        self.source = source
+        self.version = (source, snapshot.watermark or frame_fingerprint(snapshot.df))
+        self.cache = AggregateCache(DATASET_CACHE_BYTES) if cache is None else cache
+        self.store = store
+
+    def __len__(self):
+        return len(self.snapshot.df)
+
+    @property
+    def df(self):
+        return self.snapshot.df
+
+    @property
+    def trait_table(self):
+        return self.snapshot.trait_table
+
+    @property
+    def matches(self):
+        return self.snapshot.matches
+
+    def stages(self, game_mode='All', games=None):
+        """AnalysisStages for this dataset and filter"""
+        return AnalysisStages(self.cache, self.version, game_mode, games)
+
+    @classmethod
+    def from_frame(cls, df, source='dataset', cache=None):
+        """Dataset over an in-memory match frame shaped like the JSON export"""
+        return cls(build_snapshot(0, CompactMatches.from_frame(df)), source, cache)
+
+    @classmethod
+    def from_export(cls, path, cache=None):
+        """Dataset streamed from a tft_dashboard_data.json export"""
+        player_info, matches = CompactMatches.load_json(path)
+        return cls(build_snapshot(None, matches), (player_info or {}).get('puuid') or path, cache)
+
+    @classmethod
+    def from_store(cls, store, puuid, snapshot_dir=DEFAULT_SNAPSHOT_DIR, cache=None):
+        """Dataset for a player in the match store, starting from their snapshot when one is usable"""
+        return cls(open_match_frame(store, puuid, snapshot_dir).snapshot, puuid, cache, store)
+
+
+def mode_positions(dataset, game_mode='All'):
+    """Row positions of every match in a game mode, newest first"""
+    return dataset.stages(game_mode).get_mode('positions', lambda: filter_positions(dataset.df, game_mode))
+
+
+def window_bounds(games):
+    """(start, stop) ranks of a window given as newest-N games or as a rank range"""
+    if isinstance(games, tuple):
+        return games
+    return 0, games
+
+
+def window_positions(dataset, game_mode='All', games=None):
+    """Row positions of a window of a game mode's matches, newest first"""
+    start, stop = window_bounds(games)
+    return mode_positions(dataset, game_mode)[start:stop]
+
+
+def time_index(dataset, game_mode='All'):
+    """The game mode's TimeIndex over the same ranks as its PrefixIndex"""
+    return dataset.stages(game_mode).get_mode(
+        'time_index', lambda: TimeIndex(dataset.df, mode_positions(dataset, game_mode))
+    )
+
+
+def period_window(dataset, game_mode='All', since_day=None, patch=None):
+    """(start, stop) ranks of the mode's matches from a UTC day ('YYYY-MM-DD') on and/or in a patch
+
+    Two binary searches for the date and a lookup for the patch; no rows
+    are scanned.
+    """
+    index = time_index(dataset, game_mode)
+    start, stop = 0, index.n_matches
+    if since_day is not None:
+        start, stop = index.range(since=day_start_ms(since_day))
+    if patch is not None:
+        patch_start, patch_stop = index.patch_range(patch)
+        start, stop = max(start, patch_start), min(stop, patch_stop)
+    return start, max(start, stop)
+
+
+def prefix_index(dataset, game_mode='All'):
+    """The game mode's PrefixIndex; snapshots loaded from disk carry it already built"""
+    return dataset.snapshot.prefix.get(game_mode) or dataset.stages(game_mode).get_mode(
+        'prefix', lambda: PrefixIndex(dataset.df, dataset.trait_table, mode_positions(dataset, game_mode),
+                                      items=dataset.matches.items)
+    )
+
+
+def window_summary(dataset, game_mode='All', games=None):
+    """Games, average placement/level/damage and top-4/top-2 rates of the window"""
+    return prefix_index(dataset, game_mode).summary(*window_bounds(games))
+
+
+def placement_prior(dataset, game_mode='All', games=None):
+    """Placement histogram of the window, the prior items and traits are shrunk towards"""
+    return dataset.stages(game_mode, games).get('placement_prior', lambda: placement_histogram(
+        dataset.df['placement'].to_numpy()[window_positions(dataset, game_mode, games)]
+    ))
+
+
+def item_performance(dataset, game_mode='All', games=None):
+    """Per-item stats with placement intervals over the window, indexed by item id"""
+    index = prefix_index(dataset, game_mode)
+    start, stop = window_bounds(games)
+    return dataset.stages(game_mode, games).get('items', lambda: with_intervals(
+        index.item_stats(start, stop), index.item_histograms(start, stop),
+        prior=placement_prior(dataset, game_mode, games),
+    ))
+
+
+def trait_performance(dataset, game_mode='All', games=None):
+    """Per-trait stats with placement intervals over the window, indexed by trait"""
+    index = prefix_index(dataset, game_mode)
+    start, stop = window_bounds(games)
+    return dataset.stages(game_mode, games).get('traits', lambda: with_intervals(
+        index.trait_stats(start, stop), index.trait_histograms(start, stop),
+        prior=placement_prior(dataset, game_mode, games),
+    ))
+
+
+def rollups(dataset):
+    """Per (game mode, level, patch, day) sums over every match in the snapshot
+
+    Read from the store when its rollups are current to the snapshot's
+    watermark, otherwise built from the frame once per version.
+    """
+    def build():
+        watermark = dataset.snapshot.watermark
+        if dataset.store is not None and watermark:
+            stored, rolled_up = dataset.store.rollups(dataset.source)
+            if rolled_up == watermark:
+                return stored
+        return build_rollups(dataset.df)
+    return dataset.stages().get_global('rollups', build)
+
+
+def level_performance(dataset, game_mode='All', games=None):
+    """Average placement and games per final level over the window"""
+    def build():
+        positions = window_positions(dataset, game_mode, games)
+        if len(positions) == len(mode_positions(dataset, game_mode)):
+            # The window is the whole history: a few rollup rows answer it
+            return level_performance_from_rollups(rollups(dataset), game_mode)
+        return analyze_level_performance(dataset.df.iloc[positions])
+    return dataset.stages(game_mode, games).get('levels', build)
+
+
+def mode_comparison(dataset, since_day=None, patch=None):
+    """Average placement, level and damage plus games per game mode, over every match of a period"""
+    return dataset.stages().get_global(f'modes:{since_day}:{patch}', lambda: mode_performance_from_rollups(
+        filter_rollups(rollups(dataset), since_day, patch)
+    ))
+
+
+def item_pairs(dataset, game_mode='All', games=None):
+    """Stats for every pair of items built together in the window"""
+    positions = window_positions(dataset, game_mode, games)
+    return dataset.stages(game_mode, games).get('item_pairs', lambda: item_pair_stats(dataset.matches, positions))
+
+
+def item_traits(dataset, game_mode='All', games=None):
+    """Stats for every (item, trait) held in the same match in the window"""
+    positions = window_positions(dataset, game_mode, games)
+    return dataset.stages(game_mode, games).get(
+        'item_traits', lambda: item_trait_stats(dataset.matches, dataset.trait_table, positions)
+    )
+
+
+def performance_trend(dataset, game_mode='All', games=None, window=TREND_WINDOW, points=TREND_POINTS,
+                      trend_index=None):
+    """Rolling mean, EWMA, top-4 rate and variance of placement over the window, oldest first
+
+    Each step's statistics cover the `window` games up to it, which may
+    reach back before the window. The TrendIndex (a throwaway one if none
+    is given) only folds in matches it has not seen; the result is
+    downsampled to about `points` rows with LTTB, or kept whole if points
+    is None.
+    """
+    def trend():
+        index = TrendIndex() if trend_index is None else trend_index
+        return index.update(dataset.snapshot, game_mode, mode_positions(dataset, game_mode), window)
+
+    def build():
+        rolling, length = dataset.stages(game_mode).get_mode(f'trend:{window}', trend)
+        # Ranks count back from the newest match; trend steps forward from the oldest
+        start, stop = window_bounds(games)
+        stop = length if stop is None else min(stop, length)
+        frame = rolling.frame(length - stop, length - start)
+        return frame if points is None else downsample_trend(frame, points)
+    return dataset.stages(game_mode, games).get(f'trend:{window}:{points}', build)
+
+
+def archetype_report(dataset, archetype_index, game_mode='All', games=None):
+    """archetype_summary of the window, assigning only matches the ArchetypeIndex has not seen"""
+    model, labels = dataset.stages().get_global('archetype_labels', lambda: archetype_index.update(dataset.snapshot))
+    return dataset.stages(game_mode, games).get('archetypes', lambda: archetype_summary(
+        model, labels, dataset.matches, window_positions(dataset, game_mode, games)
+    ))
+
+
+def best_items(item_stats, n=TOP_ENTITIES):
+    """Items with the best pessimistic placement"""
+    return item_stats.nsmallest(n, 'placement_high')
+
+
+def underperforming_items(item_stats, n=TOP_ENTITIES):
+    """Worst items whose whole interval sits below an average finish"""
+    return item_stats[item_stats['placement_low'] > EXPECTED_PLACEMENT].nlargest(n, 'placement_low')
+
+
+def best_performers(item_stats):
+    """Items that beat an average finish even at the pessimistic end of their interval"""
+    return item_stats[item_stats['placement_high'] < EXPECTED_PLACEMENT].sort_values('placement_high')
+
+
+def problem_items(item_stats):
+    """Items that finish below average even at the optimistic end of their interval, worst first"""
+    return item_stats[item_stats['placement_low'] > EXPECTED_PLACEMENT].sort_values('placement_low', ascending=False)
+
+
+def best_traits(trait_stats, min_games=2, n=TOP_ENTITIES):
+    """Traits with min_games or more and the best pessimistic placement, with a 'trait' column"""
+    trait_stats = apply_min_games(trait_stats, min_games)
+    if trait_stats.empty:
+        return trait_stats
+    return trait_stats.reset_index().nsmallest(n, 'placement_high')
+
+
+def key_takeaways(summary, item_stats, level_stats, item_name=str, limit=4):
+    """(strengths, improvements): short advice drawn from a window's summary, items and levels
+
+    item_name turns an item id into the name shown in the advice.
+    """
+    strengths = []
+    if summary['top4_rate'] >= 65:
+        strengths.append(f"{summary['top4_rate']:.0f}% Top 4 rate is solid for climbing")
+    if summary['avg_level'] >= 8:
+        strengths.append(f"Good level management ({summary['avg_level']:.1f} average)")
+    if summary['top2_rate'] >= 20:
+        strengths.append(f"Strong top 2 rate ({summary['top2_rate']:.0f}%)")
+    if not strengths:
+        strengths = ["Building a solid foundation", "Learning from each game", "Tracking performance data"]
+
+    improvements = []
+    # Worst item whose whole interval sits below an average finish
+    if not item_stats.empty:
+        bad_items = problem_items(item_stats)
+        if not bad_items.empty:
+            improvements.append(f"Reduce {item_name(bad_items['placement_low'].idxmax())} usage")
+    if summary['avg_placement'] > 4.5:
+        improvements.append("Focus on early game economy")
+    if summary['top4_rate'] < 60:
+        improvements.append("Work on consistent top 4 finishes")
+    if summary['avg_level'] < 8:
+        improvements.append("Improve leveling timing")
+    # Level 7 struggles
+    level_7 = level_stats[level_stats['level'] == 7]
+    if len(level_7) and level_7['games'].iloc[0] > 3 and level_7['placement'].iloc[0] > 5:
+        improvements.append("Push for level 8 more often")
+    if not improvements:
+        improvements = ["Continue current strategy", "Fine-tune positioning", "Master meta comps"]
+
+    return strengths[:limit], improvements[:limit]
@@ -0,0 +1,41 @@
+"""Match selection and threshold filters applied before/after aggregation"""
+
+import numpy as np
+import pandas as pd
+
+
+def filter_positions(df, game_mode='All', games_to_show=None):
+    """Row positions of the newest games_to_show matches in a game mode
+
+    df is newest-first, so the window is normally just the first positions
+    that match the mode. When game_datetime says otherwise (matches stored
+    out of order) the mode's positions are sorted by it, newest first and
+    stable, so that date ranges are contiguous for TimeIndex. Matches
+    without a time count as the oldest.
+    """
+    if game_mode == 'All':
+        positions = np.arange(len(df))
+    elif isinstance(df['game_mode'].dtype, pd.CategoricalDtype):
+        # Compare codes rather than materializing a string per match
+        modes = df['game_mode'].array
+        code = modes.categories.get_indexer([game_mode])[0]
+        positions = np.flatnonzero(modes.codes == code) if code >= 0 else np.zeros(0, dtype=np.int64)
+    else:
+        positions = np.flatnonzero(df['game_mode'].to_numpy() == game_mode)
+    if 'game_datetime' in df.columns and len(positions) > 1:
+        times = df['game_datetime'].to_numpy()[positions]
+        if (times[1:] > times[:-1]).any():
+            positions = positions[np.argsort(-times, kind='stable')]
+    return positions[:games_to_show]
+
+
+def filter_matches(df, game_mode='All', games_to_show=None):
+    """The newest games_to_show matches in a game mode, keeping df's index"""
+    return df.iloc[filter_positions(df, game_mode, games_to_show)]
+
+
+def apply_min_games(stats, min_games):
+    """Drop rows of an item/trait stats table with fewer than min_games games"""
+    if stats.empty or 'games' not in stats.columns:
+        return pd.DataFrame()
+    return stats[stats['games'] >= min_games]
@@ -0,0 +1,234 @@
+"""Local item icon cache resolved once per item id
+
+The dashboard never points the browser at the Data Dragon CDN. Icons are
+read from a local asset directory, and each item id is resolved to a file
+(or to "missing") once, with the result kept in a manifest on disk. Missing
+icons fall back to emoji instead of rendering a broken image.
+
+Seed or top up the directory from the CDN with:
+
+    python -m tft_analytics.icons tft_dashboard_data.json
+"""
+
+import argparse
+import base64
+import json
+import os
+import threading
+
+from .jsonstream import iter_export
+
+DDRAGON_VERSION = '14.24.1'
+ICON_CDN_URL = 'https://ddragon.leagueoflegends.com/cdn/{version}/img/tft-item/{filename}'
+DEFAULT_ASSET_DIR = os.path.join('assets', 'tft-item')
+MANIFEST_NAME = 'manifest.json'
+
+# Normalized item names whose Data Dragon file differs from the raw id
+RIOT_ITEM_FILES = {
+    'infinityedge': 'TFT_Item_InfinityEdge.png',
+    'guinsoosrageblade': 'TFT_Item_GuinsoosRageblade.png',
+    'spearofshojin': 'TFT_Item_SpearOfShojin.png',
+    'warmogsarmor': 'TFT_Item_WarmogsArmor.png',
+    'gargoylestoneplate': 'TFT_Item_GargoyleStoneplate.png',
+    'thiefsgloves': 'TFT_Item_ThiefsGloves.png',
+    'redbuff': 'TFT_Item_RedBuff.png',
+    'bluebuff': 'TFT_Item_BlueBuff.png',
+    'runaanshurricane': 'TFT_Item_RunaansHurricane.png',
+    'jeweledgauntlet': 'TFT_Item_JeweledGauntlet.png',
+    'morellonomicon': 'TFT_Item_Morellonomicon.png',
+    'dragonsclaw': 'TFT_Item_DragonsClaw.png',
+    'bramblevest': 'TFT_Item_BrambleVest.png',
+    'archangelsstaff': 'TFT_Item_ArchangelsStaff.png',
+    'hextechgunblade': 'TFT_Item_HextechGunblade.png',
+    'bloodthirster': 'TFT_Item_Bloodthirster.png',
+    'lastwhisper': 'TFT_Item_LastWhisper.png',
+    'ionicspark': 'TFT_Item_IonicSpark.png',
+    'quicksilver': 'TFT_Item_Quicksilver.png',
+    'zekesherald': 'TFT_Item_ZekesHerald.png',
+    'titansresolve': 'TFT_Item_TitansResolve.png',
+    'adaptivehelm': 'TFT_Item_AdaptiveHelm.png',
+    'statikkshiv': 'TFT_Item_StatikkShiv.png',
+    'rapidfirecannon': 'TFT_Item_RapidFirecannon.png',
+    'giantslayer': 'TFT_Item_GiantSlayer.png',
+    'deathblade': 'TFT_Item_Deathblade.png',
+    'rabadonsdeathcap': 'TFT_Item_RabadonsDeathcap.png',
+    'ludensecho': 'TFT_Item_LudensEcho.png',
+    'sunfirecape': 'TFT_Item_SunfireCape.png',
+    'thornmail': 'TFT_Item_Thornmail.png',
+    'frozenheart': 'TFT_Item_FrozenHeart.png',
+    'spiritvisage': 'TFT_Item_SpiritVisage.png',
+    'bansheesveil': 'TFT_Item_BansheesVeil.png',
+    'handofjustice': 'TFT_Item_HandOfJustice.png',
+    'forceofnature': 'TFT_Item_ForceOfNature.png',
+    'locketoftheironsolari': 'TFT_Item_LocketOfTheIronSolari.png',
+    'redemption': 'TFT_Item_Redemption.png',
+    'crownguard': 'TFT_Item_Crownguard.png',
+    'sterakskage': 'TFT_Item_SteraksGage.png',
+    'steraksgag': 'TFT_Item_SteraksGage.png',  # Alternative spelling
+    'edgeofnight': 'TFT_Item_EdgeOfNight.png',
+    'spectralcutlass': 'TFT_Item_SpectralCutlass.png',
+    'unstableconcoction': 'TFT_Item_UnstableConcoction.png',
+    'nightharvester': 'TFT_Item_NightHarvester.png',
+    'leviathan': 'TFT_Item_Leviathan.png',
+    'spectralgauntlet': 'TFT_Item_SpectralGauntlet.png',
+    'powergauntlet': 'TFT_Item_PowerGauntlet.png',
+    'emptybag': 'TFT_Item_EmptyBag.png',
+    'needlesslylargerod': 'TFT_Item_NeedlesslyLargeRod.png',
+    'tearofthegoddess': 'TFT_Item_TearOfTheGoddess.png',
+    'thecollector': 'TFT_Item_TheCollector.png',
+    'bfsword': 'TFT_Item_BFSword.png',
+    'chainvest': 'TFT_Item_ChainVest.png',
+    'varuscyberneticitem': 'TFT_Item_VarusCyberneticAugment.png',  # TFT Set 14 specific
+    'itemarmorcladembleitem': 'TFT_Item_ArmorlcadEmblem.png',  # Set 14 emblem
+    'itemnitrochromecounter': 'TFT_Item_NitroChrome.png',  # Set 14 specific
+    'tft5itemgargolestoneplatradiant': 'TFT_Item_GargoyleStoneplate_Radiant.png',  # Radiant version
+    'giantsslayer': 'TFT_Item_GiantSlayer.png',  # Alternative spelling
+    'recurvebow': 'TFT_Item_RecurveBow.png',
+    'negatroncloak': 'TFT_Item_NegatronCloak.png',
+    'giantsbelt': 'TFT_Item_GiantsBelt.png',
+    'sparringgloves': 'TFT_Item_SparringGloves.png',
+    'spatula': 'TFT_Item_Spatula.png',
+}
+
+
+def normalize_item_key(item_id):
+    """Lookup key for RIOT_ITEM_FILES: prefixes dropped, lowercase, no separators"""
+    name = item_id.replace('TFT_Item_', '').replace('TFT4_Item_Ornn', '').replace('TFT14_', '')
+    for char in " '-_":
+        name = name.replace(char, '')
+    return name.lower()
+
+
+def candidate_filenames(item_id):
+    """Data Dragon filenames that may hold an item's icon, most likely first"""
+    candidates = []
+    if item_id.startswith('TFT'):
+        candidates.append(f'{item_id}.png')
+    mapped = RIOT_ITEM_FILES.get(normalize_item_key(item_id))
+    if mapped:
+        candidates.append(mapped)
+    candidates.append(f"TFT_Item_{item_id.replace(' ', '').replace('_', '')}.png")
+    return list(dict.fromkeys(candidates))
+
+
+class IconCache:
+    """Item id -> local icon file, resolved once and persisted in a manifest
+
+    Lookups never touch the network. Icon bytes are read at most once per
+    process and kept as base64 data URIs for HTML rendering.
+    """
+
+    def __init__(self, asset_dir=DEFAULT_ASSET_DIR):
+        self.asset_dir = asset_dir
+        self._manifest_path = os.path.join(asset_dir, MANIFEST_NAME)
+        self._manifest = self._read_manifest()
+        self._data_uris = {}
+        self._lock = threading.Lock()
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        os.makedirs(self.asset_dir, exist_ok=True)
+        tmp_path = self._manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _resolve_one(self, item_id):
+        for filename in candidate_filenames(item_id):
+            if os.path.isfile(os.path.join(self.asset_dir, filename)):
+                return filename
+        return None
+
+    def resolve(self, item_ids):
+        """Resolve any ids not yet in the manifest against the asset directory"""
+        with self._lock:
+            new_ids = [item_id for item_id in dict.fromkeys(item_ids) if item_id not in self._manifest]
+            for item_id in new_ids:
+                self._manifest[item_id] = self._resolve_one(item_id)
+            if new_ids and os.path.isdir(self.asset_dir):
+                self._write_manifest()
+        return {item_id: self._manifest[item_id] for item_id in item_ids}
+
+    def path(self, item_id):
+        """Local icon path for an item, or None when no icon is available"""
+        filename = self._manifest.get(item_id, False)
+        if filename is False:
+            filename = self.resolve([item_id])[item_id]
+        return os.path.join(self.asset_dir, filename) if filename else None
+
+    def data_uri(self, item_id):
+        """Icon as a base64 data URI, or None when no icon is available"""
+        if item_id not in self._data_uris:
+            icon_path = self.path(item_id)
+            if icon_path is None:
+                self._data_uris[item_id] = None
+            else:
+                with open(icon_path, 'rb') as f:
+                    encoded = base64.b64encode(f.read()).decode('ascii')
+                self._data_uris[item_id] = f'data:image/png;base64,{encoded}'
+        return self._data_uris[item_id]
+
+    def forget_missing(self):
+        """Drop "missing" entries so the next lookup re-checks the asset directory"""
+        with self._lock:
+            self._manifest = {k: v for k, v in self._manifest.items() if v}
+            self._data_uris = {k: v for k, v in self._data_uris.items() if v}
+
+
+def seed_icons(item_ids, asset_dir=DEFAULT_ASSET_DIR, version=DDRAGON_VERSION, timeout=10):
+    """Download icons that are not yet in asset_dir from Data Dragon
+
+    This is the only code path that uses the network. Returns the ids that
+    could not be found under any candidate filename.
+    """
+    import requests
+
+    os.makedirs(asset_dir, exist_ok=True)
+    missing = []
+    with requests.Session() as session:
+        for item_id in dict.fromkeys(item_ids):
+            candidates = candidate_filenames(item_id)
+            if any(os.path.isfile(os.path.join(asset_dir, name)) for name in candidates):
+                continue
+            for filename in candidates:
+                response = session.get(ICON_CDN_URL.format(version=version, filename=filename), timeout=timeout)
+                if response.status_code == 200:
+                    with open(os.path.join(asset_dir, filename), 'wb') as f:
+                        f.write(response.content)
+                    break
+            else:
+                missing.append(item_id)
+
+    # Re-resolve everything against the refreshed directory
+    cache = IconCache(asset_dir)
+    cache.forget_missing()
+    cache.resolve(item_ids)
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed the local item icon cache from Data Dragon')
+    parser.add_argument('data_file', help='tft_dashboard_data.json export listing the items to fetch')
+    parser.add_argument('--asset-dir', default=DEFAULT_ASSET_DIR)
+    parser.add_argument('--version', default=DDRAGON_VERSION)
+    args = parser.parse_args()
+
+    # Stream the export match by match; only the distinct item ids are kept
+    item_ids = list(dict.fromkeys(
+        item for key, match in iter_export(args.data_file) if key == 'matches' for item in match.get('items', [])
+    ))
+
+    missing = seed_icons(item_ids, args.asset_dir, args.version)
+    print(f"✅ Icon cache ready in {args.asset_dir} ({len(missing)} items without an icon)")
+    for item_id in missing:
+        print(f"⚠️ No icon found for {item_id}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Columnar item aggregation over the match DataFrame"""
+
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from .timing import count
+
+# Columns returned by analyze_item_performance, in display order
+ITEM_STAT_COLUMNS = ['games', 'top4', 'top2', 'avg_placement', 'top4_rate', 'top2_rate']
+
+
+def _as_list(value):
+    """Treat missing/non-list cells as an empty item list"""
+    return value if isinstance(value, (list, tuple)) else ()
+
+
+def explode_items(df):
+    """Flatten the per-match item lists into a long (match_idx, item, placement) table
+
+    match_idx is the positional row of the match in df, so it stays valid
+    for filtered frames that no longer have a 0..n index.
+    """
+    item_lists = [_as_list(items) for items in df['items']] if 'items' in df.columns else []
+    lengths = np.fromiter(map(len, item_lists), dtype=np.int64, count=len(item_lists))
+    match_idx = np.repeat(np.arange(len(item_lists), dtype=np.int64), lengths)
+
+    placements = df['placement'].to_numpy() if len(item_lists) else np.empty(0, dtype=np.int64)
+    return pd.DataFrame({
+        'match_idx': match_idx,
+        'item': pd.Series(list(chain.from_iterable(item_lists)), dtype=object),
+        'placement': np.repeat(placements, lengths),
+    })
+
+
+def analyze_item_performance(df):
+    """Analyze item performance and correlations
+
+    Every item occurrence counts as one game for that item (two copies of
+    the same item in a match count twice), matching the original loop.
+    Items are returned in first-seen order, indexed by raw item id.
+    """
+    count('rows processed', len(df))
+    table = explode_items(df)
+    if table.empty:
+        return pd.DataFrame(columns=ITEM_STAT_COLUMNS)
+
+    codes, item_ids = pd.factorize(table['item'], sort=False)
+    placement = table['placement'].to_numpy(dtype=np.float64)
+    n_items = len(item_ids)
+
+    # Missing placements (NaN or MISSING_VALUE) count as games but not in placement stats
+    placed = placement >= 1
+    games = np.bincount(codes, minlength=n_items)
+    placed_games = np.bincount(codes, weights=placed, minlength=n_items)
+    placement_sum = np.bincount(codes, weights=np.where(placed, placement, 0.0), minlength=n_items)
+    top4 = np.bincount(codes, weights=placed & (placement <= 4), minlength=n_items).astype(np.int64)
+    top2 = np.bincount(codes, weights=placed & (placement <= 2), minlength=n_items).astype(np.int64)
+    placed_games = np.where(placed_games > 0, placed_games, np.nan)
+
+    return pd.DataFrame({
+        'games': games,
+        'top4': top4,
+        'top2': top2,
+        'avg_placement': placement_sum / placed_games,
+        'top4_rate': top4 / placed_games * 100,
+        'top2_rate': top2 / placed_games * 100,
+    }, index=pd.Index(item_ids, dtype=object))
@@ -0,0 +1,187 @@
+"""Streaming reader for tft_dashboard_data.json exports
+
+json.load on a multi-GB export materializes every match as a dict of
+Python objects at once. These helpers read the file in fixed-size chunks
+and decode one top-level value, or one element of the `matches` array, at
+a time with json.JSONDecoder.raw_decode, so parser memory is bounded by
+the largest single match rather than by the file.
+"""
+
+import json
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # characters per read
+
+_WHITESPACE = ' \t\n\r'
+_DECODER = json.JSONDecoder()
+
+# Scalar match fields -> array typecode of the column they are read into
+EXPORT_SCALAR_COLUMNS = {
+    'placement': 'b',
+    'level': 'b',
+    'units_count': 'b',
+    'gold_left': 'h',
+    'damage': 'i',
+    'game_datetime': 'q',
+}
+MISSING_VALUE = -1
+
+# A list-valued column in CSR form: row i is vocab[values[offsets[i]:offsets[i + 1]]]
+RaggedColumn = namedtuple('RaggedColumn', ['offsets', 'values', 'vocab'])
+
+
+class _ChunkReader:
+    """JSON tokens over a file read chunk by chunk"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self, size):
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return
+        # Drop what has been consumed before appending
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return
+            self._read_more(self.chunk_size)
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)"""
+        self._skip_whitespace()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ''
+
+    def next_char(self, expected=None):
+        char = self.peek()
+        if expected is not None and char != expected:
+            raise ValueError(f"Expected {expected!r} at offset {self.pos} of the buffer, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self._skip_whitespace()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+                # A value touching the end of the buffer may be a truncated number
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Values larger than a chunk are re-read with doubling reads
+            self._read_more(size)
+            size *= 2
+
+
+def iter_export(path, stream_keys=('matches',), chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (key, value) for each top-level entry of an export
+
+    Arrays under stream_keys are not built: each element is yielded on its
+    own as (key, element), in file order.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _ChunkReader(f, chunk_size)
+        reader.next_char('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.next_char(':')
+            if key in stream_keys and reader.peek() == '[':
+                reader.next_char('[')
+                if reader.peek() == ']':
+                    reader.next_char()
+                else:
+                    while True:
+                        yield key, reader.value()
+                        if reader.next_char() == ']':
+                            break
+            else:
+                yield key, reader.value()
+
+            if reader.next_char() == '}':
+                return
+
+
+class _RaggedBuilder:
+    """Offsets + interned int32 values, appended one row at a time"""
+
+    def __init__(self):
+        self.offsets = array('q', [0])
+        self.values = array('i')
+        self.vocab = {}
+
+    def append(self, entries):
+        vocab = self.vocab
+        self.values.extend([vocab.setdefault(entry, len(vocab)) for entry in entries or ()])
+        self.offsets.append(len(self.values))
+
+    def build(self):
+        return RaggedColumn(
+            np.frombuffer(self.offsets, dtype=np.int64),
+            np.frombuffer(self.values, dtype=np.int32),
+            np.asarray(list(self.vocab), dtype=object),
+        )
+
+
+def load_export_columns(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream an export into compact columns; returns (player_info, columns)
+
+    Scalar fields land in typed arrays (MISSING_VALUE where absent), game
+    modes, versions (a match's patch, else its game_version) and list
+    fields are interned, and items/traits are kept as
+    RaggedColumn offsets and values. Matches keep the file's order
+    (newest first). Other top-level keys than player_info are skipped.
+    """
+    player_info = {}
+    scalars = {field: array(typecode) for field, typecode in EXPORT_SCALAR_COLUMNS.items()}
+    match_ids = []
+    game_mode_codes = array('b')
+    game_modes = {}
+    version_codes = array('h')
+    versions = {}
+    items = _RaggedBuilder()
+    traits = _RaggedBuilder()
+
+    for key, value in iter_export(path, chunk_size=chunk_size):
+        if key == 'player_info':
+            player_info = value or {}
+        elif key == 'matches':
+            for field, column in scalars.items():
+                field_value = value.get(field)
+                column.append(MISSING_VALUE if field_value is None else field_value)
+            match_ids.append(value.get('match_id'))
+            game_mode_codes.append(game_modes.setdefault(value.get('game_mode'), len(game_modes)))
+            version = value.get('patch') or value.get('game_version')
+            version_codes.append(versions.setdefault(version, len(versions)))
+            items.append(value.get('items'))
+            traits.append(value.get('traits'))
+
+    columns = {
+        field: np.frombuffer(column, dtype=np.dtype(column.typecode))
+        for field, column in scalars.items()
+    }
+    columns['match_id'] = np.asarray(match_ids, dtype=object)
+    columns['game_mode'] = (np.frombuffer(game_mode_codes, dtype=np.int8), np.asarray(list(game_modes), dtype=object))
+    columns['game_version'] = (np.frombuffer(version_codes, dtype=np.int16), np.asarray(list(versions), dtype=object))
+    columns['items'] = items.build()
+    columns['traits'] = traits.build()
+    return player_info, columns
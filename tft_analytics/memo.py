@@ -0,0 +1,76 @@
+"""Filter-keyed memoization of analysis stages"""
+
+import hashlib
+
+import numpy as np
+
+from .timing import active_tracer
+
+
+def frame_fingerprint(df, sample_rows=32):
+    """Cheap content fingerprint for an in-memory match frame
+
+    Hashes the shape, the column names and an evenly spaced sample of rows,
+    so the cost does not grow with the frame. Frames loaded from the match
+    store should be versioned by their watermark instead, which is exact.
+    """
+    digest = hashlib.sha1(repr((df.shape, list(df.columns))).encode('utf-8'))
+    if len(df):
+        positions = np.unique(np.linspace(0, len(df) - 1, num=min(sample_rows, len(df))).astype(np.int64))
+        digest.update(repr(df.iloc[positions].to_numpy().tolist()).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def discard_stale_versions(cache, data_version):
+    """Drop stages cached for any other version of the same data
+
+    data_version is (source, version), e.g. (puuid, watermark). Called when a
+    new snapshot is published, so superseded aggregates are freed right away
+    instead of waiting for LRU eviction.
+    """
+    source = data_version[0]
+    return cache.discard_where(
+        lambda key: isinstance(key[1], tuple) and key[1][:1] == (source,) and key[1] != data_version
+    )
+
+
+class AnalysisStages:
+    """Named analysis stages memoized in a shared AggregateCache
+
+    Filtered stages are keyed by (data_version, game_mode, games_to_show),
+    per-mode stages by (data_version, game_mode) and global stages only by
+    data_version. Thresholds such as the minimum
+    games per item are meant to be applied to the cached results, not
+    folded into the key.
+    """
+
+    def __init__(self, cache, data_version, game_mode, games_to_show):
+        self.cache = cache
+        self.data_version = data_version
+        self.mode_key = (data_version, game_mode)
+        self.filter_key = (data_version, game_mode, games_to_show)
+
+    def _lookup(self, key, compute):
+        tracer = active_tracer()
+        if tracer is None:
+            return self.cache.get_or_compute(key, compute)
+
+        # Traced runs time each stage that actually computes and count the ones served from cache
+        def traced_compute():
+            tracer.count('stage misses')
+            with tracer.span(key[0]):
+                return compute()
+        tracer.count('stage lookups')
+        return self.cache.get_or_compute(key, traced_compute)
+
+    def get(self, stage, compute):
+        """Result of a stage over the filtered matches"""
+        return self._lookup((stage,) + self.filter_key, compute)
+
+    def get_mode(self, stage, compute):
+        """Result of a stage over every match in the selected game mode"""
+        return self._lookup((stage,) + self.mode_key, compute)
+
+    def get_global(self, stage, compute):
+        """Result of a stage over all of the data version's matches"""
+        return self._lookup((stage, self.data_version), compute)
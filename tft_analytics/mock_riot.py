@@ -0,0 +1,293 @@
+"""Local stand-in for the Riot API that replays recorded fixtures
+
+Serves the three routes the ingester uses (account by Riot id, match ids
+by PUUID, match by id) from a fixtures dict and enforces app rate limits
+the way Riot does, answering 429 with Retry-After once a window is full.
+Every request is logged, so throughput and limiter behaviour can be
+checked without network access.
+
+Fixtures are a dict of three sections, stored on disk as
+
+    accounts.json       {"name#tag" (lowercase): account}
+    match_ids.json      {puuid: [match ids, newest first]}
+    matches/<id>.json   one match-v1 response per file
+
+Record them with `python -m tft_analytics.riot --record DIR`, or build them
+from a dashboard export and serve them with:
+
+    python -m tft_analytics.mock_riot fixtures/ --from-export tft_dashboard_data.json
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .ratelimit import RIOT_DEV_LIMITS, format_rate_limits, parse_rate_limits
+from .store import derive_match_id, derive_puuid
+
+_ACCOUNT_ROUTE = re.compile(r'^/riot/account/v1/accounts/by-riot-id/([^/]+)/([^/]+)$')
+_MATCH_IDS_ROUTE = re.compile(r'^/tft/match/v1/matches/by-puuid/([^/]+)/ids$')
+_MATCH_ROUTE = re.compile(r'^/tft/match/v1/matches/([^/]+)$')
+
+# Dashboard game mode -> a representative queue id
+_GAME_MODE_QUEUES = {'Solo': 1100, 'Double Up': 1160}
+
+
+def empty_fixtures():
+    return {'accounts': {}, 'match_ids': {}, 'matches': {}}
+
+
+def load_fixtures(fixtures_dir):
+    """Read a fixtures directory written by save_fixtures"""
+    fixtures = empty_fixtures()
+    for section in ('accounts', 'match_ids'):
+        path = os.path.join(fixtures_dir, f'{section}.json')
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                fixtures[section] = json.load(f)
+
+    matches_dir = os.path.join(fixtures_dir, 'matches')
+    if os.path.isdir(matches_dir):
+        for filename in os.listdir(matches_dir):
+            if filename.endswith('.json'):
+                with open(os.path.join(matches_dir, filename), 'r') as f:
+                    fixtures['matches'][filename[:-len('.json')]] = json.load(f)
+    return fixtures
+
+
+def save_fixtures(fixtures, fixtures_dir):
+    """Write fixtures in the on-disk layout, merging with what is already there"""
+    merged = load_fixtures(fixtures_dir)
+    for section in merged:
+        merged[section].update(fixtures.get(section, {}))
+
+    os.makedirs(os.path.join(fixtures_dir, 'matches'), exist_ok=True)
+    for section in ('accounts', 'match_ids'):
+        with open(os.path.join(fixtures_dir, f'{section}.json'), 'w') as f:
+            json.dump(merged[section], f, indent=2, sort_keys=True)
+    for match_id, match in fixtures.get('matches', {}).items():
+        with open(os.path.join(fixtures_dir, 'matches', f'{match_id}.json'), 'w') as f:
+            json.dump(match, f)
+
+
+def row_to_match(row, puuid, match_id):
+    """Inverse of riot.match_to_row: a minimal match-v1 response for one row"""
+    units = [{'character_id': f'unit_{i}', 'itemNames': []} for i in range(max(int(row.get('units_count') or 0), 1))]
+    for i, item in enumerate(row.get('items') or []):
+        units[i // 3 % len(units)]['itemNames'].append(item)
+
+    traits = []
+    for entry in row.get('traits') or []:
+        name, _, tier = entry.rpartition('_')
+        if name and tier.isdigit():
+            traits.append({'name': name, 'tier_current': int(tier), 'num_units': int(tier)})
+
+    game_mode = row.get('game_mode') or 'Solo'
+    timing = {field: row[field] for field in ('game_datetime', 'game_version') if row.get(field) is not None}
+    return {
+        'metadata': {'match_id': match_id, 'participants': [puuid]},
+        'info': {
+            **timing,
+            'queue_id': _GAME_MODE_QUEUES.get(game_mode, 1100),
+            'tft_game_type': 'pairs' if game_mode == 'Double Up' else 'standard',
+            'participants': [{
+                'puuid': puuid,
+                'placement': int(row['placement']),
+                'level': int(row['level']),
+                'gold_left': int(row.get('gold_left') or 0),
+                'total_damage_to_players': int(row.get('damage') or 0),
+                'traits': traits,
+                'units': units,
+            }],
+        },
+    }
+
+
+def fixtures_from_export(data, fixtures=None):
+    """Add a tft_dashboard_data.json export (as a dict) to a fixtures dict"""
+    fixtures = fixtures or empty_fixtures()
+    player_info = data.get('player_info') or {}
+    riot_id = player_info.get('name', 'Unknown player#NA1')
+    game_name, _, tag_line = riot_id.rpartition('#')
+    puuid = derive_puuid(player_info)
+
+    fixtures['accounts'][riot_id.lower()] = {'puuid': puuid, 'gameName': game_name, 'tagLine': tag_line}
+    match_ids = []
+    for row in data.get('matches', []):
+        match_id = row.get('match_id') or derive_match_id(row)
+        fixtures['matches'][match_id] = row_to_match(row, puuid, match_id)
+        match_ids.append(match_id)
+    fixtures['match_ids'][puuid] = match_ids
+    return fixtures
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'MockRiot/1.0'
+
+    def log_message(self, format, *args):
+        pass  # the server keeps its own request log
+
+    def do_GET(self):
+        mock = self.server.mock
+        url = urlsplit(self.path)
+        if mock.latency:
+            time.sleep(mock.latency)
+
+        if not self.headers.get('X-Riot-Token'):
+            return self._reply(url.path, 401, {'status': {'message': 'Unauthorized', 'status_code': 401}})
+
+        retry_after = mock.admit()
+        if retry_after:
+            headers = {'Retry-After': str(max(1, int(retry_after + 0.999))), 'X-Rate-Limit-Type': 'application'}
+            return self._reply(url.path, 429, {'status': {'message': 'Rate limit exceeded', 'status_code': 429}}, headers)
+
+        body = mock.route(url.path, parse_qs(url.query))
+        if body is None:
+            return self._reply(url.path, 404, {'status': {'message': 'Data not found', 'status_code': 404}})
+        self._reply(url.path, 200, body)
+
+    def _reply(self, path, status, body, headers=None):
+        self.server.mock.log(path, status)
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('X-App-Rate-Limit', format_rate_limits(self.server.mock.limits))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockRiotServer:
+    """Threaded HTTP server replaying fixtures under Riot-style rate limits
+
+    Use as a context manager; base_url is ready once it is entered. Limits
+    are enforced over sliding windows, which is stricter than Riot's fixed
+    windows, so a client that passes here passes there. request_log holds
+    (monotonic time, path, status) per request.
+    """
+
+    def __init__(self, fixtures, limits=RIOT_DEV_LIMITS, latency=0.0, host='127.0.0.1', port=0):
+        self.fixtures = fixtures
+        self.limits = tuple(limits)
+        self.latency = latency
+        self.request_log = []
+        self._windows = [deque() for _ in self.limits]
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-riot', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted"""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def admit(self):
+        """Count a request against every window; seconds to wait when one is full"""
+        now = time.monotonic()
+        with self._lock:
+            retry_after = 0.0
+            for (limit, period), window in zip(self.limits, self._windows):
+                while window and now - window[0] >= period:
+                    window.popleft()
+                if len(window) >= limit:
+                    retry_after = max(retry_after, window[0] + period - now)
+            if retry_after:
+                return retry_after
+            for window in self._windows:
+                window.append(now)
+            return 0.0
+
+    def log(self, path, status):
+        with self._lock:
+            self.request_log.append((time.monotonic(), path, status))
+
+    def route(self, path, query):
+        match = _ACCOUNT_ROUTE.match(path)
+        if match:
+            riot_id = f"{unquote(match.group(1))}#{unquote(match.group(2))}"
+            return self.fixtures['accounts'].get(riot_id.lower())
+
+        match = _MATCH_IDS_ROUTE.match(path)
+        if match:
+            match_ids = self.fixtures['match_ids'].get(unquote(match.group(1)))
+            if match_ids is None:
+                return None
+            start = int(query.get('start', ['0'])[0])
+            count = int(query.get('count', ['20'])[0])
+            return match_ids[start:start + count]
+
+        match = _MATCH_ROUTE.match(path)
+        if match:
+            return self.fixtures['matches'].get(unquote(match.group(1)))
+        return None
+
+    def max_window_counts(self):
+        """Most successful requests seen in any span of each limit's period"""
+        times = sorted(t for t, _, status in self.request_log if status != 429)
+        counts = []
+        for _, period in self.limits:
+            best, lo = 0, 0
+            for hi, t in enumerate(times):
+                while t - times[lo] >= period:
+                    lo += 1
+                best = max(best, hi - lo + 1)
+            counts.append(best)
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded Riot API fixtures locally')
+    parser.add_argument('fixtures_dir')
+    parser.add_argument('--from-export', metavar='JSON', help='first add fixtures built from a dashboard export')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--limits', default=format_rate_limits(RIOT_DEV_LIMITS))
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    args = parser.parse_args()
+
+    if args.from_export:
+        with open(args.from_export, 'r') as f:
+            save_fixtures(fixtures_from_export(json.load(f)), args.fixtures_dir)
+
+    server = MockRiotServer(load_fixtures(args.fixtures_dir), parse_rate_limits(args.limits),
+                            latency=args.latency, port=args.port)
+    print(f"🧪 Mock Riot API on {server.base_url} "
+          f"({len(server.fixtures['matches'])} matches, limits {args.limits})")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
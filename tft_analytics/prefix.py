@@ -0,0 +1,276 @@
+"""Prefix aggregates over match order for O(items) "last N games" windows"""
+
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from .columnar import ragged_take
+from .confidence import PLACEMENT_BINS
+from .items import ITEM_STAT_COLUMNS
+from .timing import count
+from .traits import TRAIT_STAT_COLUMNS
+
+
+class _EntityPrefix:
+    """Cumulative per-entity counts and placement sums over match rank
+
+    Occurrences are sorted by (entity code, match rank) and flattened into
+    one key array, so a window [start, stop) for every entity at once is two
+    vectorized searchsorted calls plus differences of cumulative sums.
+    Memory is O(occurrences), not O(matches x entities). Only occurrences
+    with a placement (1 and up) add to the placement sum and the
+    placed/top-4/top-2 counts; missing ones (MISSING_VALUE) count as games.
+    """
+
+    ARRAYS = ('order', 'keys', 'cum_placement', 'cum_placed', 'cum_top4', 'cum_top2')
+
+    def __init__(self, codes, match_rank, placements, labels):
+        self.labels = labels
+        self.stride = len(placements) + 1
+
+        # lexsort is stable, so duplicates keep their original (flat) order
+        self.order = np.lexsort((match_rank, codes))
+        self.keys = codes[self.order].astype(np.int64) * self.stride + match_rank[self.order]
+
+        placement = placements[match_rank[self.order]].astype(np.float64)
+        placed = placement >= 1
+        self.cum_placement = np.concatenate(([0.0], np.cumsum(np.where(placed, placement, 0.0))))
+        self.cum_placed = np.concatenate(([0], np.cumsum(placed)))
+        self.cum_top4 = np.concatenate(([0], np.cumsum(placed & (placement <= 4))))
+        self.cum_top2 = np.concatenate(([0], np.cumsum(placed & (placement <= 2))))
+
+    @classmethod
+    def from_arrays(cls, labels, stride, arrays):
+        """Rebuild from saved ARRAYS without sorting again"""
+        entity = cls.__new__(cls)
+        entity.labels = labels
+        entity.stride = stride
+        for name in cls.ARRAYS:
+            setattr(entity, name, arrays[name])
+        return entity
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def window(self, start, stop):
+        """Per-entity (seen codes, games, placed games, placement sum, top4, top2, first occurrence)"""
+        base = np.arange(len(self.labels), dtype=np.int64) * self.stride
+        lo = np.searchsorted(self.keys, base + start)
+        hi = np.searchsorted(self.keys, base + stop)
+
+        games = hi - lo
+        seen = np.flatnonzero(games > 0)
+        lo, hi = lo[seen], hi[seen]
+        return (
+            seen,
+            games[seen],
+            self.cum_placed[hi] - self.cum_placed[lo],
+            self.cum_placement[hi] - self.cum_placement[lo],
+            self.cum_top4[hi] - self.cum_top4[lo],
+            self.cum_top2[hi] - self.cum_top2[lo],
+            self.order[lo],
+        )
+
+    def histograms(self, start, stop, n_bins=8):
+        """(seen codes, games per placement 1..n_bins, first occurrence) for a window
+
+        Each occurrence's placement is read back off cum_placement (0 where
+        missing), so no extra arrays are kept.
+        """
+        base = np.arange(len(self.labels), dtype=np.int64) * self.stride
+        lo = np.searchsorted(self.keys, base + start)
+        hi = np.searchsorted(self.keys, base + stop)
+        seen = np.flatnonzero(hi > lo)
+        lo, hi = lo[seen], hi[seen]
+
+        lengths = hi - lo
+        flat = np.repeat(lo - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths) + np.arange(lengths.sum())
+        placement = np.rint(self.cum_placement[flat + 1] - self.cum_placement[flat]).astype(np.int64)
+        entity = np.repeat(np.arange(len(seen), dtype=np.int64), lengths)
+        valid = (placement >= 1) & (placement <= n_bins)
+        counts = np.bincount(entity[valid] * n_bins + placement[valid] - 1, minlength=len(seen) * n_bins)
+        return seen, counts.reshape(len(seen), n_bins), self.order[lo]
+
+
+class PrefixIndex:
+    """Window queries over one game mode's matches, newest first
+
+    Rank 0 is the newest match in the mode, so "last N games" is the window
+    [0, N) and any N1..N2 range is [N1, N2). Built once per data version and
+    game mode; every query afterwards costs O(items log matches). Pass the
+    snapshot's interned items to skip re-factorizing the item lists.
+    """
+
+    def __init__(self, df, trait_table, positions, items=None):
+        positions = np.asarray(positions, dtype=np.int64)
+        self.n_matches = len(positions)
+        count('rows processed', self.n_matches)
+        placements = df['placement'].to_numpy()[positions].astype(np.int64)
+
+        # Cumulative match-level sums for the headline metrics. Placement stats
+        # only cover matches with a placement; 'placed' counts those
+        placed = placements >= 1
+        self._cum = {
+            'placement': np.concatenate(([0], np.cumsum(np.where(placed, placements, 0)))),
+            'placed': np.concatenate(([0], np.cumsum(placed))),
+            'top4': np.concatenate(([0], np.cumsum(placed & (placements <= 4)))),
+            'top2': np.concatenate(([0], np.cumsum(placed & (placements <= 2)))),
+            'level': np.concatenate(([0], np.cumsum(df['level'].to_numpy()[positions]))),
+            'damage': np.concatenate(([0], np.cumsum(df['damage'].to_numpy()[positions]))),
+        }
+
+        # Items: every occurrence counts, like analyze_item_performance. Interned
+        # items (a RaggedColumn) are used as-is; list columns are factorized
+        if items is not None:
+            mode_items = ragged_take(items, positions)
+            lengths = np.diff(mode_items.offsets)
+            item_codes, item_ids = mode_items.values, mode_items.vocab
+        else:
+            item_lists = [
+                entries if isinstance(entries, (list, tuple)) else ()
+                for entries in df['items'].to_numpy()[positions]
+            ]
+            lengths = np.fromiter(map(len, item_lists), dtype=np.int64, count=len(item_lists))
+            item_codes, item_ids = pd.factorize(
+                pd.Series(list(chain.from_iterable(item_lists)), dtype=object), sort=False
+            )
+        item_rank = np.repeat(np.arange(self.n_matches, dtype=np.int64), lengths)
+        self._items = _EntityPrefix(item_codes, item_rank, placements, np.asarray(item_ids, dtype=object))
+
+        # Traits: remap full-frame match_idx to rank within this mode
+        rank_of = np.full(len(df), -1, dtype=np.int64)
+        rank_of[positions] = np.arange(self.n_matches)
+        trait_rank = rank_of[trait_table['match_idx'].to_numpy()]
+        in_mode = trait_rank >= 0
+        self._traits = _EntityPrefix(
+            trait_table['trait'].cat.codes.to_numpy()[in_mode],
+            trait_rank[in_mode],
+            placements,
+            np.asarray(trait_table['trait'].cat.categories, dtype=object),
+        )
+
+    def to_arrays(self):
+        """(arrays, labels) that from_arrays turns back into an equal index
+
+        arrays maps flat names to numeric ndarrays (safe to np.save and
+        memory-map); labels holds the item and trait vocabularies.
+        """
+        arrays = {f'cum_{name}': cum for name, cum in self._cum.items()}
+        for prefix, entity in (('items', self._items), ('traits', self._traits)):
+            arrays.update({f'{prefix}_{name}': getattr(entity, name) for name in _EntityPrefix.ARRAYS})
+        labels = {'items': self._items.labels.tolist(), 'traits': self._traits.labels.tolist()}
+        return arrays, labels
+
+    @classmethod
+    def from_arrays(cls, arrays, labels):
+        """Inverse of to_arrays; the arrays are used as given (memory maps stay mapped)"""
+        index = cls.__new__(cls)
+        index._cum = {
+            name: arrays[f'cum_{name}'] for name in ('placement', 'placed', 'top4', 'top2', 'level', 'damage')
+        }
+        index.n_matches = len(index._cum['placement']) - 1
+        index._items, index._traits = (
+            _EntityPrefix.from_arrays(
+                np.asarray(labels[prefix], dtype=object),
+                index.n_matches + 1,
+                {name: arrays[f'{prefix}_{name}'] for name in _EntityPrefix.ARRAYS},
+            )
+            for prefix in ('items', 'traits')
+        )
+        return index
+
+    @property
+    def nbytes(self):
+        return (
+            sum(a.nbytes for a in self._cum.values())
+            + self._items.nbytes
+            + self._traits.nbytes
+        )
+
+    def _bounds(self, start, stop):
+        stop = self.n_matches if stop is None else min(stop, self.n_matches)
+        return max(0, start), max(0, stop)
+
+    def summary(self, start=0, stop=None):
+        """Games, average placement/level/damage and top-4/top-2 rates for a window
+
+        Placement stats are over the games with a placement, NaN if none has one.
+        """
+        start, stop = self._bounds(start, stop)
+        games = stop - start
+        totals = {name: cum[stop] - cum[start] for name, cum in self._cum.items()}
+        if games == 0:
+            return {'games': 0, 'avg_placement': np.nan, 'top4_rate': np.nan, 'top2_rate': np.nan,
+                    'avg_level': np.nan, 'avg_damage': np.nan}
+        placed = totals['placed'] or np.nan
+        return {
+            'games': games,
+            'avg_placement': totals['placement'] / placed,
+            'top4_rate': totals['top4'] / placed * 100,
+            'top2_rate': totals['top2'] / placed * 100,
+            'avg_level': totals['level'] / games,
+            'avg_damage': totals['damage'] / games,
+        }
+
+    def item_stats(self, start=0, stop=None):
+        """analyze_item_performance for a window, in the same shape and first-seen order"""
+        start, stop = self._bounds(start, stop)
+        seen, games, placed, placement_sum, top4, top2, first = self._items.window(start, stop)
+        if len(seen) == 0:
+            return pd.DataFrame(columns=ITEM_STAT_COLUMNS)
+
+        order = np.argsort(first, kind='stable')
+        seen, games, placement_sum, top4, top2 = (a[order] for a in (seen, games, placement_sum, top4, top2))
+        placed = np.where(placed[order] > 0, placed[order], np.nan)
+        return pd.DataFrame({
+            'games': games,
+            'top4': top4,
+            'top2': top2,
+            'avg_placement': placement_sum / placed,
+            'top4_rate': top4 / placed * 100,
+            'top2_rate': top2 / placed * 100,
+        }, index=pd.Index(self._items.labels[seen], dtype=object))
+
+    def trait_stats(self, start=0, stop=None):
+        """analyze_trait_performance for a window, in the same shape and order"""
+        start, stop = self._bounds(start, stop)
+        seen, games, placed, placement_sum, top4, top2, _ = self._traits.window(start, stop)
+        if len(seen) == 0:
+            return pd.DataFrame(columns=TRAIT_STAT_COLUMNS)
+
+        placed = np.where(placed > 0, placed, np.nan)
+        return pd.DataFrame({
+            'games': games,
+            'avg_placement': placement_sum / placed,
+            'top4_rate': top4 / placed * 100,
+            'top2_rate': top2 / placed * 100,
+        }, index=pd.Index(self._traits.labels[seen], name='trait'))
+
+    def item_histograms(self, start=0, stop=None):
+        """Games per placement (columns 1..8) for every item in a window, indexed like item_stats"""
+        start, stop = self._bounds(start, stop)
+        seen, counts, first = self._items.histograms(start, stop)
+        order = np.argsort(first, kind='stable')
+        return pd.DataFrame(counts[order], columns=PLACEMENT_BINS,
+                            index=pd.Index(self._items.labels[seen[order]], dtype=object))
+
+    def trait_histograms(self, start=0, stop=None):
+        """Games per placement (columns 1..8) for every trait in a window, indexed like trait_stats"""
+        start, stop = self._bounds(start, stop)
+        seen, counts, _ = self._traits.histograms(start, stop)
+        return pd.DataFrame(counts, columns=PLACEMENT_BINS,
+                            index=pd.Index(self._traits.labels[seen], name='trait'))
+
+    def rolling_placement(self, window, n_games, start=0):
+        """Rolling mean placement over the n_games from rank start on, oldest first (min_periods=1)
+
+        Each mean covers the placed games in its window, NaN where there are none.
+        """
+        n_games = max(0, min(n_games, self.n_matches - start))
+        rank = np.arange(start + n_games - 1, start - 1, -1)  # chronological order, oldest first
+        end = np.minimum(rank + window, start + n_games)
+        cum, placed = self._cum['placement'], self._cum['placed']
+        counts = placed[end] - placed[rank]
+        return (cum[end] - cum[rank]) / np.where(counts > 0, counts, np.nan)
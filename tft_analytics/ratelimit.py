@@ -0,0 +1,100 @@
+"""Async request scheduler for Riot's stacked per-app rate limits"""
+
+import asyncio
+import time
+from collections import deque
+
+# Development key limits: 20 requests per second and 100 per two minutes
+RIOT_DEV_LIMITS = ((20, 1.0), (100, 120.0))
+
+
+def parse_rate_limits(spec):
+    """Parse Riot's "20:1,100:120" header format into ((limit, period), ...)"""
+    limits = []
+    for part in spec.split(','):
+        limit, period = part.strip().split(':')
+        limits.append((int(limit), float(period)))
+    return tuple(limits)
+
+
+def format_rate_limits(limits):
+    """Inverse of parse_rate_limits"""
+    return ','.join(f"{limit}:{period:g}" for limit, period in limits)
+
+
+class TokenBucket:
+    """limit tokens; a spent token comes back one period (plus margin) later
+
+    Refilling per token instead of at a constant rate means no span of
+    `period` seconds ever holds more than `limit` requests, which is what
+    Riot's fixed windows require, while still allowing a full burst.
+    """
+
+    def __init__(self, limit, period, margin=0.0):
+        self.limit = limit
+        self.period = period + margin
+        self._spent = deque()
+
+    def delay(self, now):
+        """Seconds until a token is available (0 when one is available now)"""
+        while self._spent and now - self._spent[0] >= self.period:
+            self._spent.popleft()
+        if len(self._spent) < self.limit:
+            return 0.0
+        return self._spent[0] + self.period - now
+
+    def take(self, now):
+        self._spent.append(now)
+
+
+class RateLimiter:
+    """Grants a request slot only when every bucket has a token
+
+    acquire() is FIFO: waiters queue on one lock, so a burst of coroutines
+    is released in arrival order at exactly the permitted rate. backoff()
+    blocks all slots after a 429 until its Retry-After has passed.
+    set_limits() swaps in the limits a response reports for the key.
+    """
+
+    def __init__(self, limits=RIOT_DEV_LIMITS, margin=0.05, clock=time.monotonic):
+        self.limits = tuple(limits)
+        self.margin = margin
+        self.buckets = [TokenBucket(limit, period, margin) for limit, period in self.limits]
+        self.clock = clock
+        self.acquired = 0
+        self.waited = 0.0
+        self._blocked_until = 0.0
+        self._lock = None
+        self._lock_loop = None
+
+    async def acquire(self):
+        # The limiter outlives event loops (one asyncio.run per refresh), the lock cannot
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                now = self.clock()
+                delay = max([self._blocked_until - now] + [bucket.delay(now) for bucket in self.buckets])
+                if delay <= 0:
+                    break
+                self.waited += delay
+                await asyncio.sleep(delay)
+            for bucket in self.buckets:
+                bucket.take(now)
+            self.acquired += 1
+
+    def set_limits(self, limits):
+        """Switch to new limits, carrying over recent requests so none are forgotten"""
+        limits = tuple(limits)
+        if limits == self.limits:
+            return
+        history = max(self.buckets, key=lambda bucket: bucket.period)._spent if self.buckets else ()
+        self.limits = limits
+        self.buckets = [TokenBucket(limit, period, self.margin) for limit, period in limits]
+        for bucket in self.buckets:
+            bucket._spent.extend(list(history)[-bucket.limit:])
+
+    def backoff(self, seconds):
+        """Hold every request for `seconds` (a 429's Retry-After)"""
+        self._blocked_until = max(self._blocked_until, self.clock() + seconds)
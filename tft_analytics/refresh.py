@@ -0,0 +1,114 @@
+"""Background ingestion that publishes new match snapshots off the script thread"""
+
+import asyncio
+import os
+import threading
+import time
+
+from .riot import RiotClient, RiotIngester
+
+
+def json_export_source(path):
+    """Ingest source that imports a tft_dashboard_data.json export when it changes"""
+    def ingest(store):
+        return store.import_json(path) if os.path.exists(path) else 0
+    return ingest
+
+
+def riot_source(riot_ids, api_key, count=20, **client_options):
+    """Ingest source that fetches players' newest matches from the Riot API
+
+    One client is kept across ticks so its rate limiter remembers recent
+    requests.
+    """
+    client = RiotClient(api_key, **client_options)
+
+    def ingest(store):
+        added = asyncio.run(RiotIngester(client, store).ingest_riot_ids(riot_ids, count=count))
+        return sum(added.values())
+    return ingest
+
+
+class RefreshWorker:
+    """Daemon thread that ingests new matches and refreshes cached player frames
+
+    Every `interval` seconds (or on wake()) it runs each ingest source
+    against the store, then refreshes every IncrementalMatchFrame held in the
+    frame cache. A frame publishes its new MatchSnapshot in one assignment,
+    so script runs keep the snapshot they started with and never wait on
+    ingestion. `version` increases whenever the store or any snapshot
+    changed, and on_publish(puuid, snapshot) is called for each new one.
+    """
+
+    def __init__(self, store, frames, sources=(), interval=60, on_publish=None):
+        self.store = store
+        self.frames = frames
+        self.sources = list(sources)
+        self.interval = interval
+        self.on_publish = on_publish
+        self.version = 0
+        self.last_refresh = None
+        self.last_error = None
+        self._pending = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='tft-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Refresh now instead of at the next interval"""
+        self._wake.set()
+
+    def request_publish(self, puuid):
+        """Pass a frame built outside the worker to on_publish on the next tick"""
+        self._pending.add(puuid)
+        self.wake()
+
+    def refresh_once(self):
+        """Run every source, then refresh cached frames; returns the number of new matches published"""
+        ingested = sum(ingest(self.store) for ingest in self.sources)
+
+        pending, self._pending = self._pending, set()
+        published = 0
+        for puuid, match_frame in self.frames.items():
+            added = match_frame.refresh()
+            if added:
+                self.frames.put(puuid, match_frame)  # re-account its grown size
+                published += added
+            if (added or puuid in pending) and self.on_publish:
+                self.on_publish(puuid, match_frame.snapshot)
+            pending.discard(puuid)
+        # Requested before their frame reached the cache: try again next tick
+        self._pending |= pending
+        if ingested or published:
+            self.version += 1
+        return published
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                print(f"❌ Background refresh failed: {e}")
+            self.last_refresh = time.time()
+            # Publish requests for frames not cached yet are retried shortly
+            self._wake.wait(1.0 if self._pending else self.interval)
+            self._wake.clear()
@@ -0,0 +1,124 @@
+"""Item display metadata: cleaned name, icon and emoji fallbacks per raw item id"""
+
+import re
+import threading
+from collections import namedtuple
+
+# Raw-id prefixes that are not part of the display name
+_ITEM_PREFIXES = ('TFT_Item_', 'TFT4_Item_Ornn', 'TFT14_')
+_CAMEL_CASE_BOUNDARY = re.compile(r'(?<!^)(?=[A-Z])')
+
+# Items that show a custom emoji instead of their icon, keyed by lowercase display name
+SPECIAL_ITEM_EMOJIS = {
+    'titans resolve': '🛡️💪',
+    'tear of the goddess': '💧✨',
+    'tft5 item gargoyle stoneplate radiant': '🌟🛡️',
+    'gargoyle stoneplate radiant': '🌟🛡️',
+    'the collector': '💀⚔️',
+    'b f sword': '⚔️💥',
+    'bf sword': '⚔️💥',
+    'chain vest': '🦺',
+    'rapid fire cannon': '🏹⚡',
+    'rapidfire cannon': '🏹⚡',
+    'item armorclad emblem item': '⚔️🔰',
+    'armorclad emblem': '⚔️🔰',
+    'varus cybernetic item': '🤖🏹',
+    'item nitro chrome counter': '🏎️⚡',
+    'nitro chrome counter': '🏎️⚡',
+    'needlessly large rod': '🔮⚡',
+    'recurve bow': '🏹',
+    'negatron cloak': '🛡️🌙',
+    'giants belt': '🟫💪',
+    'sparring gloves': '🥊',
+    'spatula': '🍴✨',
+}
+
+# Category emoji for items without an icon: first keyword match wins
+CATEGORY_EMOJIS = (
+    (('radiant', 'shimmer', 'prismatic'), '✨⚔️'),
+    (('emblem', 'crest'), '🔰'),
+    (('artifact', 'ornn', 'chosen'), '🏺'),
+    (('sword', 'blade', 'edge'), '⚔️'),
+    (('bow', 'cannon', 'gun'), '🏹'),
+    (('armor', 'vest', 'plate', 'cloak'), '🛡️'),
+    (('rod', 'staff', 'cap'), '🔮'),
+)
+DEFAULT_ITEM_EMOJI = '⚔️'
+
+
+def clean_item_name(item_name):
+    """Convert TFT_Item_ItemName to readable format"""
+    cleaned = item_name
+    for prefix in _ITEM_PREFIXES:
+        cleaned = cleaned.replace(prefix, '')
+
+    # Add spaces before capital letters for readability
+    return _CAMEL_CASE_BOUNDARY.sub(' ', cleaned)
+
+
+def category_emoji(item_id):
+    """Item-type emoji guessed from keywords in the raw id"""
+    normalized = item_id.lower().replace('_', ' ').replace('-', ' ')
+    for keywords, emoji in CATEGORY_EMOJIS:
+        if any(word in normalized for word in keywords):
+            return emoji
+    return DEFAULT_ITEM_EMOJI
+
+
+class ItemInfo(namedtuple('ItemInfo', ['item_id', 'display_name', 'icon_path', 'special_emoji', 'category_emoji'])):
+    """Everything a render path needs to draw one item"""
+
+    __slots__ = ()
+
+    @property
+    def emoji(self):
+        """Emoji to draw in place of the icon, or None when the icon should be shown"""
+        if self.special_emoji:
+            return self.special_emoji
+        return None if self.icon_path else self.category_emoji
+
+
+class ItemRegistry:
+    """Memoized raw item id -> ItemInfo lookup shared by every render path
+
+    Each id is cleaned, matched against the emoji tables and resolved
+    against the icon cache once; later lookups are a dict hit.
+    """
+
+    def __init__(self, icon_cache=None):
+        self.icon_cache = icon_cache
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, item_id):
+        entry = self._entries.get(item_id)
+        if entry is None:
+            entry = self._build(item_id)
+            with self._lock:
+                self._entries[item_id] = entry
+        return entry
+
+    def _build(self, item_id):
+        display_name = clean_item_name(item_id)
+        return ItemInfo(
+            item_id=item_id,
+            display_name=display_name,
+            icon_path=self.icon_cache.path(item_id) if self.icon_cache else None,
+            special_emoji=SPECIAL_ITEM_EMOJIS.get(display_name.lower()),
+            category_emoji=category_emoji(item_id),
+        )
+
+    def icon_uri(self, item_id):
+        """Inlined icon for HTML rendering, or None when the item has no icon"""
+        return self.icon_cache.data_uri(item_id) if self.icon_cache else None
+
+    def warm(self, item_ids):
+        """Build entries for a whole item vocabulary up front"""
+        item_ids = [item_id for item_id in dict.fromkeys(item_ids) if item_id not in self._entries]
+        if self.icon_cache and item_ids:
+            self.icon_cache.resolve(item_ids)
+        for item_id in item_ids:
+            self[item_id]
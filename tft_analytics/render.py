@@ -0,0 +1,216 @@
+"""HTML renderers that draw a whole grid or list as one markdown block
+
+Each function returns a single HTML string, so a grid of N tiles costs one
+frontend element instead of N sets of columns, containers and markdown
+calls. The CSS classes used here are defined in the dashboard's stylesheet.
+"""
+
+from html import escape
+
+from .timing import count
+
+GOOD_COLOR = "#2ecc71"  # Green
+OK_COLOR = "#f39c12"  # Orange
+BAD_COLOR = "#e74c3c"  # Red
+
+PLACEMENT_EMOJIS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+# Line and scatter traces longer than this are drawn with WebGL (Scattergl);
+# SVG redraws and hovers slow down noticeably past a few thousand points
+WEBGL_POINTS = 2_000
+
+
+def placement_color(avg_placement):
+    """Badge colour for an average placement"""
+    if avg_placement < 3.5:
+        return GOOD_COLOR
+    if avg_placement < 4.5:
+        return OK_COLOR
+    return BAD_COLOR
+
+
+def placement_emoji(placement):
+    """Medal for top 3, tick for top 4, cross otherwise"""
+    return PLACEMENT_EMOJIS.get(placement, "✅" if placement <= 4 else "❌")
+
+
+def use_webgl(n_points):
+    """Whether a line/scatter trace of n_points should be a Scattergl rather than an SVG Scatter"""
+    return n_points > WEBGL_POINTS
+
+
+def item_icon_html(item, registry, font_size, width):
+    """An item's custom emoji, inlined icon or category emoji"""
+    if item.emoji:
+        return f'<div class="tile-emoji" style="font-size: {font_size}px;">{item.emoji}</div>'
+    return f'<img class="tile-icon" src="{registry.icon_uri(item.item_id)}" width="{width}" alt="">'
+
+
+def _interval_caption(low, high):
+    return f'<div class="tile-caption">90% range {low:.1f}–{high:.1f}</div>' if low is not None else ''
+
+
+def _bounds(stats):
+    """Per-row (placement_low, placement_high), or Nones for tables without intervals"""
+    if 'placement_low' in stats.columns:
+        return zip(stats['placement_low'], stats['placement_high'])
+    return ((None, None) for _ in range(len(stats)))
+
+
+def _tile(icon_html, name, avg_placement, color, games, top4_rate, low=None, high=None):
+    return (
+        '<div class="tile">'
+        f'{icon_html}'
+        f'<div class="tile-name">{escape(name)}</div>'
+        f'<div class="tile-badge" style="background-color: {color};">{avg_placement:.2f} avg</div>'
+        f'<div class="tile-caption">{games} games • {top4_rate:.0f}% top 4</div>'
+        f'{_interval_caption(low, high)}'
+        '</div>'
+    )
+
+
+def _grid(tiles, columns):
+    count('html elements', len(tiles))
+    return (
+        f'<div class="tile-grid" style="grid-template-columns: repeat({columns}, minmax(0, 1fr));">'
+        + ''.join(tiles)
+        + '</div>'
+    )
+
+
+def _rows(rows):
+    count('html elements', len(rows))
+    return ''.join(rows)
+
+
+def render_item_grid(stats, registry, color, columns=3):
+    """Item tiles for a stats table indexed by raw item id"""
+    tiles = []
+    for item_id, games, avg_placement, top4_rate, (low, high) in zip(
+        stats.index, stats['games'], stats['avg_placement'], stats['top4_rate'], _bounds(stats)
+    ):
+        item = registry[item_id]
+        tiles.append(_tile(item_icon_html(item, registry, font_size=32, width=50), item.display_name,
+                           avg_placement, color, games, top4_rate, low, high))
+    return _grid(tiles, columns)
+
+
+def render_trait_grid(stats, trait_emojis, columns=3, default_emoji='🎯', color_column='avg_placement'):
+    """Trait tiles for a stats table with a 'trait' column, coloured by placement (or color_column)"""
+    tiles = []
+    for trait_name, games, avg_placement, top4_rate, color_value, (low, high) in zip(
+        stats['trait'], stats['games'], stats['avg_placement'], stats['top4_rate'], stats[color_column], _bounds(stats)
+    ):
+        icon_html = f'<div class="tile-emoji" style="font-size: 32px;">{trait_emojis.get(trait_name, default_emoji)}</div>'
+        tiles.append(_tile(icon_html, trait_name, avg_placement, placement_color(color_value), games, top4_rate,
+                           low, high))
+    return _grid(tiles, columns)
+
+
+def render_item_rows(stats, registry):
+    """Detailed item rows (icon, name, avg place, top 4 and top 2 rates, placement range if known)"""
+    rows = []
+    for item_id, games, avg_placement, top4_rate, top2_rate, (low, high) in zip(
+        stats.index, stats['games'], stats['avg_placement'], stats['top4_rate'], stats['top2_rate'], _bounds(stats)
+    ):
+        item = registry[item_id]
+        rows.append(
+            '<div class="item-row">'
+            f'<div>{item_icon_html(item, registry, font_size=40, width=64)}</div>'
+            '<div>'
+            f'<div class="tile-name">{escape(item.display_name)}</div>'
+            f'<div class="tile-caption">{games} games</div>'
+            f'{_interval_caption(low, high)}'
+            '<div class="item-row-stats">'
+            f'<div><b>Avg Place</b><br>{avg_placement:.2f}</div>'
+            f'<div><b>Top 4 Rate</b><br>{top4_rate:.0f}%</div>'
+            f'<div><b>Top 2 Rate</b><br>{top2_rate:.0f}%</div>'
+            '</div>'
+            '</div>'
+            '</div>'
+        )
+    return _rows(rows)
+
+
+def render_pair_rows(pairs, registry, trait_emojis=None, default_emoji='🎯'):
+    """Rows for an item-pair stats table; with trait_emojis the second column holds traits"""
+    rows = []
+    for first, second, games, avg_placement, top4_rate, top2_rate in zip(
+        pairs['first'], pairs['second'], pairs['games'], pairs['avg_placement'], pairs['top4_rate'], pairs['top2_rate']
+    ):
+        item = registry[first]
+        if trait_emojis is None:
+            other = registry[second]
+            other_icon, other_name = item_icon_html(other, registry, font_size=32, width=48), other.display_name
+        else:
+            other_icon = f'<div class="tile-emoji" style="font-size: 32px;">{trait_emojis.get(second, default_emoji)}</div>'
+            other_name = second
+        rows.append(
+            '<div class="item-row">'
+            f'<div class="pair-icons">{item_icon_html(item, registry, font_size=32, width=48)}{other_icon}</div>'
+            '<div>'
+            f'<div class="tile-name">{escape(item.display_name)} + {escape(other_name)}</div>'
+            f'<div class="tile-caption">{games} games together</div>'
+            '<div class="item-row-stats">'
+            f'<div><b>Avg Place</b><br><span style="color: {placement_color(avg_placement)};">{avg_placement:.2f}</span></div>'
+            f'<div><b>Top 4 Rate</b><br>{top4_rate:.0f}%</div>'
+            f'<div><b>Top 2 Rate</b><br>{top2_rate:.0f}%</div>'
+            '</div>'
+            '</div>'
+            '</div>'
+        )
+    return _rows(rows)
+
+
+def render_archetype_rows(stats, registry):
+    """Rows for an archetype summary: name, games, placement, top 4 rate and most used items"""
+    rows = []
+    for name, games, avg_placement, top4_rate, top_items in zip(
+        stats.index, stats['games'], stats['avg_placement'], stats['top4_rate'], stats['top_items']
+    ):
+        item_icons = ''.join(
+            item_icon_html(registry[item_id], registry, font_size=24, width=32) for item_id, _ in top_items
+        )
+        item_names = ', '.join(
+            f'{escape(registry[item_id].display_name)} ({share:.0%})' for item_id, share in top_items
+        )
+        rows.append(
+            '<div class="item-row">'
+            f'<div class="pair-icons">{item_icons}</div>'
+            '<div>'
+            f'<div class="tile-name">{escape(name)}</div>'
+            f'<div class="tile-caption">{games} games • {item_names or "no items"}</div>'
+            '<div class="item-row-stats">'
+            f'<div><b>Avg Place</b><br><span style="color: {placement_color(avg_placement)};">{avg_placement:.2f}</span></div>'
+            f'<div><b>Top 4 Rate</b><br>{top4_rate:.0f}%</div>'
+            '</div>'
+            '</div>'
+            '</div>'
+        )
+    return _rows(rows)
+
+
+def render_recent_games(games, registry, trait_labels, items_shown=2):
+    """Recent Games History rows; trait_labels maps a match's index to its trait labels"""
+    rows = []
+    for number, (match_idx, placement, level, damage, gold_left, items) in enumerate(zip(
+        games.index, games['placement'], games['level'], games['damage'], games['gold_left'], games['items']
+    ), start=1):
+        item_lines = ''.join(
+            f'<div class="tile-caption">• {escape(registry[item].display_name)}</div>'
+            for item in items[:items_shown]
+        )
+        labels = trait_labels.get(int(match_idx), [])
+        trait_lines = '<b>Traits:</b>' + ''.join(
+            f'<div class="tile-caption">• {escape(label)}</div>' for label in labels
+        ) if labels else ''
+        rows.append(
+            '<div class="game-row">'
+            f'<div><b>Game {number}</b><br>{placement_emoji(placement)} #{placement}</div>'
+            f'<div><b>Level {level}</b><div class="tile-caption">{damage} damage</div></div>'
+            f'<div><b>Gold: {gold_left}</b><div class="tile-caption">{len(items)} items</div></div>'
+            f'<div><b>Items:</b>{item_lines}</div>'
+            f'<div>{trait_lines}</div>'
+            '</div>'
+        )
+    return _rows(rows)
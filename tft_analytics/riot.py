@@ -0,0 +1,257 @@
+"""Riot API ingester: fetches TFT matches concurrently and writes them to a MatchStore
+
+Requests are issued from asyncio over one pooled requests.Session (each
+blocking call runs in a worker thread), gated by a RateLimiter so the app
+key's per-second and per-two-minute limits are never exceeded. Match ids
+already in the store are not fetched again.
+
+    RIOT_API_KEY=... python -m tft_analytics.riot "Beebo Prime#NA1"
+
+Point --base-url at a tft_analytics.mock_riot server to run offline.
+"""
+
+import argparse
+import asyncio
+import os
+from urllib.parse import quote
+
+from .ratelimit import RIOT_DEV_LIMITS, RateLimiter, format_rate_limits, parse_rate_limits
+from .store import MatchStore
+
+REGIONAL_URL = 'https://{region}.api.riotgames.com'
+ACCOUNT_PATH = '/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}'
+MATCH_IDS_PATH = '/tft/match/v1/matches/by-puuid/{puuid}/ids'
+MATCH_PATH = '/tft/match/v1/matches/{match_id}'
+
+# A 429 carries Retry-After, so it is retried more patiently than a 5xx
+MAX_THROTTLED_RETRIES = 10
+
+# TFT queue ids -> the dashboard's game modes
+QUEUE_GAME_MODES = {
+    1090: 'Solo',  # Normal
+    1100: 'Solo',  # Ranked
+    1130: 'Solo',  # Hyper Roll
+    1150: 'Double Up',  # Double Up (beta)
+    1160: 'Double Up',
+}
+
+
+def split_riot_id(riot_id):
+    """'Name#TAG' -> ('Name', 'TAG')"""
+    game_name, sep, tag_line = riot_id.rpartition('#')
+    if not sep or not game_name or not tag_line:
+        raise ValueError(f"Riot id must look like Name#TAG, got {riot_id!r}")
+    return game_name, tag_line
+
+
+def queue_game_mode(info):
+    """Dashboard game mode for a match's info block"""
+    game_mode = QUEUE_GAME_MODES.get(info.get('queue_id'))
+    if game_mode:
+        return game_mode
+    return 'Double Up' if info.get('tft_game_type') == 'pairs' else 'Solo'
+
+
+def match_to_row(match, puuid):
+    """One player's row of a match-v1 response, shaped like the dashboard export
+
+    Returns None when the player is not in the match.
+    """
+    info = match['info']
+    participant = next((p for p in info['participants'] if p.get('puuid') == puuid), None)
+    if participant is None:
+        return None
+
+    units = participant.get('units', [])
+    return {
+        'match_id': match['metadata']['match_id'],
+        'placement': participant['placement'],
+        'level': participant['level'],
+        'gold_left': participant.get('gold_left', 0),
+        'damage': participant.get('total_damage_to_players', 0),
+        'units_count': len(units),
+        'game_mode': queue_game_mode(info),
+        'game_datetime': info.get('game_datetime'),
+        'game_version': info.get('game_version'),
+        'traits': [
+            f"{trait['name']}_{trait['tier_current']}"
+            for trait in participant.get('traits', [])
+            if trait.get('tier_current', 0) > 0
+        ],
+        'items': [item for unit in units for item in unit.get('itemNames', [])],
+    }
+
+
+class RiotClient:
+    """Rate-limited, connection-pooled JSON client for the Riot regional API
+
+    At most max_connections requests are in flight at once. The limiter
+    adopts the limits reported in X-App-Rate-Limit. A 429 pauses the whole
+    limiter for its Retry-After and the request is retried; 5xx responses
+    are retried with exponential backoff.
+    """
+
+    def __init__(self, api_key, base_url=REGIONAL_URL.format(region='americas'), limiter=None,
+                 max_connections=10, timeout=10, max_retries=3):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip('/')
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.requests = 0
+        self.throttled = 0
+
+        self.session = requests.Session()
+        self.session.headers['X-Riot-Token'] = api_key
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._max_connections = max_connections
+        self._slots = None
+        self._slots_loop = None
+
+    def close(self):
+        self.session.close()
+
+    async def get_json(self, path, params=None):
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self._max_connections), loop
+
+        url = self.base_url + path
+        errors = throttled = 0
+        while True:
+            # Take the rate-limit token only once a connection is free, so
+            # the request goes out at the moment the limiter accounted for
+            async with self._slots:
+                await self.limiter.acquire()
+                response = await asyncio.to_thread(self.session.get, url, params=params, timeout=self.timeout)
+            self.requests += 1
+
+            # Follow the key's real limits if they differ from the configured ones
+            app_limits = response.headers.get('X-App-Rate-Limit')
+            if app_limits:
+                self.limiter.set_limits(parse_rate_limits(app_limits))
+
+            if response.status_code == 429 and throttled < MAX_THROTTLED_RETRIES:
+                throttled += 1
+                self.throttled += 1
+                self.limiter.backoff(float(response.headers.get('Retry-After', 1)))
+                continue
+            if response.status_code >= 500 and errors < self.max_retries:
+                await asyncio.sleep(0.5 * 2 ** errors)
+                errors += 1
+                continue
+            break
+
+        response.raise_for_status()
+        return response.json()
+
+    async def account_by_riot_id(self, riot_id):
+        game_name, tag_line = split_riot_id(riot_id)
+        return await self.get_json(ACCOUNT_PATH.format(game_name=quote(game_name, safe=''), tag_line=quote(tag_line, safe='')))
+
+    async def match_ids(self, puuid, count=20, start=0):
+        """A player's match ids, newest first"""
+        return await self.get_json(MATCH_IDS_PATH.format(puuid=quote(puuid, safe='')), params={'start': start, 'count': count})
+
+    async def match(self, match_id):
+        return await self.get_json(MATCH_PATH.format(match_id=quote(match_id, safe='')))
+
+
+class RiotIngester:
+    """Fetch players' recent matches through a RiotClient into a MatchStore
+
+    Pass a fixtures dict (see tft_analytics.mock_riot) as `recorder` to keep
+    every response for offline replay.
+    """
+
+    def __init__(self, client, store, recorder=None):
+        self.client = client
+        self.store = store
+        self.recorder = recorder
+
+    def _record(self, section, key, value):
+        if self.recorder is not None:
+            self.recorder.setdefault(section, {})[key] = value
+
+    async def resolve_player(self, riot_id):
+        """Look up a Riot id, register it as a tracked player and return its PUUID"""
+        account = await self.client.account_by_riot_id(riot_id)
+        self._record('accounts', riot_id.lower(), account)
+        puuid = account['puuid']
+        self.store.add_player(puuid, f"{account.get('gameName', '')}#{account.get('tagLine', '')}")
+        return puuid
+
+    async def ingest_player(self, puuid, count=20):
+        """Fetch a player's newest `count` matches that are not stored yet
+
+        Match details are fetched concurrently. Returns the number of
+        matches added to the store.
+        """
+        match_ids = await self.client.match_ids(puuid, count=count)
+        self._record('match_ids', puuid, match_ids)
+
+        known = self.store.known_match_ids(puuid, match_ids)
+        new_ids = [match_id for match_id in match_ids if match_id not in known]
+        matches = await asyncio.gather(*(self.client.match(match_id) for match_id in new_ids))
+        for match_id, match in zip(new_ids, matches):
+            self._record('matches', match_id, match)
+
+        # Ids come newest first; the store wants oldest first
+        rows = [match_to_row(match, puuid) for match in reversed(matches)]
+        return self.store.ingest(puuid, [row for row in rows if row is not None])
+
+    async def ingest_riot_ids(self, riot_ids, count=20):
+        """Resolve and ingest several players concurrently; returns {riot_id: added}"""
+        async def ingest_one(riot_id):
+            return await self.ingest_player(await self.resolve_player(riot_id), count=count)
+
+        added = await asyncio.gather(*(ingest_one(riot_id) for riot_id in riot_ids))
+        return dict(zip(riot_ids, added))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch recent TFT matches from the Riot API into the match store')
+    parser.add_argument('riot_ids', nargs='+', help='players as Name#TAG')
+    parser.add_argument('--api-key', default=os.environ.get('RIOT_API_KEY'), help='defaults to $RIOT_API_KEY')
+    parser.add_argument('--region', default='americas', help='regional routing value (americas, europe, asia, sea)')
+    parser.add_argument('--base-url', help='override the API host, e.g. a local mock_riot server')
+    parser.add_argument('--count', type=int, default=20, help='matches to check per player')
+    parser.add_argument('--db', default='tft_matches.db')
+    parser.add_argument('--limits', default=format_rate_limits(RIOT_DEV_LIMITS), help='app rate limits as Riot formats them')
+    parser.add_argument('--max-connections', type=int, default=10)
+    parser.add_argument('--record', metavar='DIR', help='save every response as mock_riot fixtures')
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error('no API key: pass --api-key or set RIOT_API_KEY')
+
+    from .mock_riot import save_fixtures
+
+    client = RiotClient(
+        args.api_key,
+        base_url=args.base_url or REGIONAL_URL.format(region=args.region),
+        limiter=RateLimiter(parse_rate_limits(args.limits)),
+        max_connections=args.max_connections,
+    )
+    store = MatchStore(args.db)
+    ingester = RiotIngester(client, store, recorder={} if args.record else None)
+    try:
+        added = asyncio.run(ingester.ingest_riot_ids(args.riot_ids, count=args.count))
+    finally:
+        client.close()
+        store.close()
+
+    for riot_id, count in added.items():
+        print(f"✅ {riot_id}: {count} new matches")
+    print(f"{client.requests} requests, {client.throttled} throttled")
+    if args.record:
+        save_fixtures(ingester.recorder, args.record)
+        print(f"📼 Recorded responses to {args.record}")
+
+
+if __name__ == '__main__':
+    main()
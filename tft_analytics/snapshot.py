@@ -0,0 +1,272 @@
+"""Versioned binary match snapshots that load by memory-mapping
+
+A snapshot is a directory of plain .npy files plus a manifest.json that
+records the format version, the player, the store watermark and the
+vocabularies. Every numeric array (scalar columns, CSR items and traits,
+the trait table and the precomputed prefix indexes per game mode) is
+opened with np.load(mmap_mode='r'), and the snapshot's scalar frame wraps
+those maps without copying them (game mode and patch as categoricals over
+the mapped codes). Loading then costs about the same whatever the match
+count, and several server processes reading one snapshot share its pages
+through the OS page cache. The one per-match copy is the patch codes of a
+snapshot with matches of unknown patch, remapped so they read as missing.
+(.npz members cannot be memory-mapped, hence one file per array.)
+
+Convert an export once with:
+
+    python -m tft_analytics.snapshot tft_dashboard_data.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .columnar import SCALAR_DTYPES, CompactMatches
+from .filters import filter_positions
+from .jsonstream import RaggedColumn
+from .prefix import PrefixIndex
+from .store import IncrementalMatchFrame, build_snapshot, derive_puuid
+from .timing import traced
+
+SNAPSHOT_FORMAT = 'tft-match-snapshot'
+SNAPSHOT_VERSION = 3
+SNAPSHOT_SUFFIX = '.tftsnap'
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_SNAPSHOT_DIR = 'snapshots'
+
+# Game modes whose PrefixIndex is built at save time and loaded with the data
+PRECOMPUTED_MODES = ('All', 'Solo', 'Double Up')
+
+
+def snapshot_path(snapshot_dir, puuid):
+    """Where a player's snapshot lives (puuids are hashed into safe file names)"""
+    digest = hashlib.sha1(puuid.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(snapshot_dir, digest + SNAPSHOT_SUFFIX)
+
+
+def _match_arrays(snapshot):
+    """Flat {file name: ndarray} for the matches and trait table, plus their vocabularies"""
+    matches = snapshot.matches
+    trait_table = snapshot.trait_table
+    arrays = {f'scalar_{field}': values for field, values in matches.scalars.items()}
+    arrays['game_mode_codes'] = matches.game_mode[0]
+    arrays['patch_codes'] = matches.patch[0]
+    for name, column in (('items', matches.items), ('traits', matches.traits)):
+        arrays[f'{name}_offsets'] = column.offsets
+        arrays[f'{name}_values'] = column.values
+    if matches.match_id is not None:
+        arrays['match_id'] = matches.match_id
+
+    arrays['trait_table_match_idx'] = trait_table['match_idx'].to_numpy()
+    arrays['trait_table_set_id'] = trait_table['set_id'].cat.codes.to_numpy()
+    arrays['trait_table_trait'] = trait_table['trait'].cat.codes.to_numpy()
+    arrays['trait_table_tier'] = trait_table['tier'].to_numpy()
+
+    vocabs = {
+        'game_mode': matches.game_mode[1].tolist(),
+        'patch': matches.patch[1].tolist(),
+        'items': matches.items.vocab.tolist(),
+        'traits': matches.traits.vocab.tolist(),
+        'trait_table_set_id': trait_table['set_id'].cat.categories.tolist(),
+        'trait_table_trait': trait_table['trait'].cat.categories.tolist(),
+    }
+    return arrays, vocabs
+
+
+def _replace_dir(staging, path):
+    """Swap a fully written staging directory into place
+
+    Processes that already mapped the old files keep reading them (the
+    inodes live on until unmapped); a reader arriving between the two
+    renames finds no snapshot and falls back to the store.
+    """
+    previous = None
+    if os.path.exists(path):
+        previous = f'{path}.old-{os.getpid()}-{threading.get_ident()}'
+        os.rename(path, previous)
+    os.rename(staging, path)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def save_snapshot(path, snapshot, player=None, modes=PRECOMPUTED_MODES):
+    """Write a MatchSnapshot (and a PrefixIndex per game mode) to a snapshot directory
+
+    player is the {'puuid', 'name'} the dashboard lists it under. Prefix
+    indexes already on the snapshot are reused; the others are built here.
+    Returns the manifest.
+    """
+    arrays, vocabs = _match_arrays(snapshot)
+    prefix_labels = {}
+    for mode in modes:
+        index = snapshot.prefix.get(mode)
+        if index is None:
+            positions = filter_positions(snapshot.df, mode)
+            if mode != 'All' and len(positions) == 0:
+                continue
+            index = PrefixIndex(snapshot.df, snapshot.trait_table, positions, items=snapshot.matches.items)
+        mode_arrays, prefix_labels[mode] = index.to_arrays()
+        number = len(prefix_labels) - 1
+        arrays.update({f'prefix{number}_{name}': values for name, values in mode_arrays.items()})
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'player': player or {},
+        'watermark': snapshot.watermark,
+        'n_matches': len(snapshot.matches),
+        'vocabs': vocabs,
+        'prefix': [{'mode': mode, 'labels': labels} for mode, labels in prefix_labels.items()],
+        'arrays': {name: {'dtype': values.dtype.str, 'shape': list(values.shape)} for name, values in arrays.items()},
+    }
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        for name, values in arrays.items():
+            np.save(os.path.join(staging, name + '.npy'), np.ascontiguousarray(values), allow_pickle=False)
+        # The manifest goes last: a directory without one is never read
+        with open(os.path.join(staging, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        _replace_dir(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def read_manifest(path):
+    """A snapshot's manifest; ValueError if it was written by another format version"""
+    with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != SNAPSHOT_FORMAT or manifest.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"{path} is {manifest.get('format')} v{manifest.get('version')}, "
+            f"expected {SNAPSHOT_FORMAT} v{SNAPSHOT_VERSION}"
+        )
+    return manifest
+
+
+@traced('load snapshot')
+def load_snapshot(path, mmap_mode='r'):
+    """Open a snapshot directory; returns (manifest, MatchSnapshot)
+
+    With the default mmap_mode every array is a read-only memory map, so
+    nothing is read from disk until a view touches it. Pass mmap_mode=None
+    to read everything into memory instead.
+    """
+    manifest = read_manifest(path)
+    arrays = {}
+    for name, spec in manifest['arrays'].items():
+        values = np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+        if values.dtype.str != spec['dtype'] or list(values.shape) != spec['shape']:
+            raise ValueError(f"{path}/{name}.npy does not match its manifest entry")
+        arrays[name] = values
+
+    vocabs = {name: np.asarray(vocab, dtype=object) for name, vocab in manifest['vocabs'].items()}
+    matches = CompactMatches(
+        {field: arrays[f'scalar_{field}'] for field in SCALAR_DTYPES},
+        (arrays['game_mode_codes'], vocabs['game_mode']),
+        RaggedColumn(arrays['items_offsets'], arrays['items_values'], vocabs['items']),
+        RaggedColumn(arrays['traits_offsets'], arrays['traits_values'], vocabs['traits']),
+        arrays.get('match_id'),
+        (arrays['patch_codes'], vocabs['patch']),
+    )
+    trait_table = pd.DataFrame({
+        'match_idx': arrays['trait_table_match_idx'],
+        'set_id': pd.Categorical.from_codes(arrays['trait_table_set_id'], categories=vocabs['trait_table_set_id']),
+        'trait': pd.Categorical.from_codes(arrays['trait_table_trait'], categories=vocabs['trait_table_trait']),
+        'tier': arrays['trait_table_tier'],
+    }, copy=False)
+    prefix = {
+        entry['mode']: PrefixIndex.from_arrays(
+            {name[len(f'prefix{number}_'):]: values for name, values in arrays.items()
+             if name.startswith(f'prefix{number}_')},
+            entry['labels'],
+        )
+        for number, entry in enumerate(manifest['prefix'])
+    }
+    return manifest, build_snapshot(manifest['watermark'], matches, trait_table, prefix)
+
+
+def list_snapshots(snapshot_dir):
+    """{puuid: (name, path)} for every readable snapshot in a directory"""
+    found = {}
+    if not os.path.isdir(snapshot_dir):
+        return found
+    for entry in sorted(os.listdir(snapshot_dir)):
+        if not entry.endswith(SNAPSHOT_SUFFIX):
+            continue
+        path = os.path.join(snapshot_dir, entry)
+        try:
+            player = read_manifest(path)['player']
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping snapshot {path}: {e}")
+            continue
+        if player.get('puuid'):
+            found[player['puuid']] = (player.get('name', 'Unknown player'), path)
+    return found
+
+
+def open_match_frame(store, puuid, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """IncrementalMatchFrame for a player, starting from their snapshot when one is usable
+
+    A snapshot ahead of the store (the store was rebuilt) or in an old
+    format is ignored. refresh() then only reads the rows that arrived
+    after the snapshot was written.
+    """
+    path = snapshot_path(snapshot_dir, puuid)
+    initial = None
+    if os.path.isdir(path):
+        try:
+            _, initial = load_snapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring snapshot {path}: {e}")
+        if initial is not None and initial.watermark is not None and initial.watermark > store.watermark(puuid):
+            initial = None
+
+    match_frame = IncrementalMatchFrame(store, puuid, initial)
+    match_frame.refresh()
+    return match_frame
+
+
+def convert_export(json_path, snapshot_dir=DEFAULT_SNAPSHOT_DIR, out_path=None):
+    """Stream a tft_dashboard_data.json export into a snapshot; returns its path
+
+    The result carries watermark None: it stands in for the player until
+    the match store has their matches.
+    """
+    player_info, matches = CompactMatches.load_json(json_path)
+    puuid = derive_puuid(player_info)
+    out_path = out_path or snapshot_path(snapshot_dir, puuid)
+    player = {'puuid': puuid, 'name': player_info.get('name', 'Unknown player')}
+    save_snapshot(out_path, build_snapshot(None, matches), player=player)
+    return out_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a tft_dashboard_data.json export into a binary snapshot")
+    parser.add_argument('export', help="Path to tft_dashboard_data.json")
+    parser.add_argument('--snapshot-dir', default=DEFAULT_SNAPSHOT_DIR,
+                        help="Directory the dashboard loads snapshots from")
+    parser.add_argument('--output', help="Explicit snapshot directory (overrides --snapshot-dir)")
+    args = parser.parse_args(argv)
+
+    path = convert_export(args.export, args.snapshot_dir, args.output)
+    manifest = read_manifest(path)
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    print(f"✅ Wrote {manifest['n_matches']} matches for {manifest['player']['name']} "
+          f"to {path} ({size / 1024 ** 2:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
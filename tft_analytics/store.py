@@ -0,0 +1,419 @@
+"""Append-only local match store and the incremental frame built on top of it"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from .jsonstream import MISSING_VALUE, iter_export
+from .columnar import CompactMatches, patch_from_version
+from .timing import traced
+from .traits import build_trait_table_from_ragged, concat_trait_tables
+
+# Scalar match fields persisted as their own columns; game_datetime is the
+# match start in epoch milliseconds and patch is derived from game_version
+MATCH_FIELDS = ['placement', 'level', 'gold_left', 'damage', 'units_count', 'game_mode',
+                'game_datetime', 'game_version', 'patch']
+# List-valued match fields persisted as JSON text
+LIST_FIELDS = ['traits', 'items']
+
+# Owner of rows written before the store was partitioned by player
+LEGACY_PUUID = ''
+
+SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    puuid TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    placement INTEGER,
+    level INTEGER,
+    gold_left INTEGER,
+    damage INTEGER,
+    units_count INTEGER,
+    game_mode TEXT,
+    traits TEXT NOT NULL DEFAULT '[]',
+    items TEXT NOT NULL DEFAULT '[]',
+    game_datetime INTEGER,
+    game_version TEXT,
+    patch TEXT,
+    UNIQUE (puuid, match_id)
+);
+CREATE INDEX IF NOT EXISTS matches_by_player ON matches (puuid, seq);
+CREATE TABLE IF NOT EXISTS players (
+    puuid TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    puuid TEXT NOT NULL,
+    game_mode TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    patch TEXT NOT NULL,
+    day TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    placed INTEGER NOT NULL,
+    placement_sum INTEGER NOT NULL,
+    top4 INTEGER NOT NULL,
+    damage_sum INTEGER NOT NULL,
+    PRIMARY KEY (puuid, game_mode, level, patch, day)
+) WITHOUT ROWID;
+"""
+# Columns v2 stores are missing
+_ADDED_IN_V3 = {'game_datetime': 'INTEGER', 'game_version': 'TEXT', 'patch': 'TEXT'}
+# v3 rollups had no placed count and summed missing placements as MISSING_VALUE;
+# they are dropped and rebuilt from the matches on the next read
+_DROP_V3_ROLLUPS = """
+DROP TABLE rollups;
+DELETE FROM meta WHERE key LIKE 'rollup_seq:%';
+"""
+
+# Per-connection scratch table an export is streamed into before it is copied
+# into matches in reverse (file) order
+_STAGING_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS import_staging (
+    pos INTEGER PRIMARY KEY,
+    match_id TEXT NOT NULL,
+    placement INTEGER,
+    level INTEGER,
+    gold_left INTEGER,
+    damage INTEGER,
+    units_count INTEGER,
+    game_mode TEXT,
+    game_datetime INTEGER,
+    game_version TEXT,
+    patch TEXT,
+    traits TEXT NOT NULL,
+    items TEXT NOT NULL
+)
+"""
+IMPORT_BATCH_SIZE = 5000
+
+# v1 kept a single player's matches with match_id globally unique
+_V1_FIELDS = ['placement', 'level', 'gold_left', 'damage', 'units_count', 'game_mode'] + LIST_FIELDS
+_MIGRATE_FROM_V1 = f"""
+ALTER TABLE matches RENAME TO matches_v1;
+{_SCHEMA}
+INSERT INTO matches (seq, puuid, match_id, {', '.join(_V1_FIELDS)})
+    SELECT seq, '{LEGACY_PUUID}', match_id, {', '.join(_V1_FIELDS)} FROM matches_v1;
+INSERT OR IGNORE INTO players (puuid, name) VALUES ('{LEGACY_PUUID}', 'Unknown player');
+DROP TABLE matches_v1;
+"""
+
+# Rollup dimensions and sums, in the column order MatchStore.rollups() returns
+ROLLUP_COLUMNS = ['game_mode', 'level', 'patch', 'day', 'games', 'placed', 'placement_sum', 'top4', 'damage_sum']
+
+# Fold a player's matches in (seq_from, seq_to] into their rollup rows. Unknown
+# modes, patches and days roll up under '', missing numbers as MISSING_VALUE
+# like CompactMatches stores them. Placement sums and top-4 counts only cover
+# placed games (placement 1 and up), which `placed` counts. (WHERE true keeps
+# SQLite from reading the upsert's ON as a join constraint.)
+_ROLLUP_SQL = f"""
+INSERT INTO rollups (puuid, {', '.join(ROLLUP_COLUMNS)})
+SELECT puuid, COALESCE(game_mode, ''), COALESCE(level, {MISSING_VALUE}), COALESCE(patch, ''),
+       COALESCE(date(game_datetime / 1000, 'unixepoch'), ''),
+       COUNT(*), COUNT(CASE WHEN placement >= 1 THEN 1 END),
+       COALESCE(SUM(CASE WHEN placement >= 1 THEN placement END), 0),
+       COUNT(CASE WHEN placement BETWEEN 1 AND 4 THEN 1 END), SUM(COALESCE(damage, {MISSING_VALUE}))
+FROM matches
+WHERE puuid = ? AND seq > ? AND seq <= ?
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (puuid, game_mode, level, patch, day) DO UPDATE SET
+    games = games + excluded.games,
+    placed = placed + excluded.placed,
+    placement_sum = placement_sum + excluded.placement_sum,
+    top4 = top4 + excluded.top4,
+    damage_sum = damage_sum + excluded.damage_sum
+"""
+
+
+def derive_match_id(match):
+    """Stable id for exports that carry no match_id (hash of the match content)"""
+    payload = json.dumps(match, sort_keys=True, separators=(',', ':'), default=str)
+    return 'local_' + hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def derive_puuid(player_info):
+    """PUUID for an export's player_info, falling back to its Riot id"""
+    return player_info.get('puuid') or f"local:{player_info.get('name', 'Unknown player')}"
+
+
+class MatchStore:
+    """SQLite-backed, append-only match store partitioned by player PUUID
+
+    Matches are keyed by (puuid, match_id), since one Riot match can belong
+    to several tracked players. Every accepted match gets a monotonically
+    increasing seq; the highest seq a reader has seen for a player is its
+    watermark, and load_since() returns only what arrived after it.
+
+    Every write also folds the new matches into per-player rollups by
+    (game_mode, level, patch, day), so whole-history comparisons read a
+    few hundred summed rows instead of scanning matches.
+    """
+
+    def __init__(self, path='tft_matches.db'):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._import_lock = threading.Lock()
+        with self._lock, self._conn:
+            self._migrate()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(matches)")}
+        rollup_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(rollups)")}
+        if rollup_columns and 'placed' not in rollup_columns:
+            self._conn.executescript(_DROP_V3_ROLLUPS)
+        if version < 2 and columns and 'puuid' not in columns:
+            self._conn.executescript(_MIGRATE_FROM_V1)
+        else:
+            self._conn.executescript(_SCHEMA)
+            # Older rows keep NULL time and patch; their rollups build on first read
+            for column, sql_type in _ADDED_IN_V3.items():
+                if columns and column not in columns:
+                    self._conn.execute(f"ALTER TABLE matches ADD COLUMN {column} {sql_type}")
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self._conn.close()
+
+    def add_player(self, puuid, name):
+        """Register (or rename) a tracked player"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO players (puuid, name) VALUES (?, ?)", (puuid, name))
+
+    def players(self):
+        """Tracked players as a {puuid: name} dict, ordered by name"""
+        with self._lock:
+            rows = self._conn.execute("SELECT puuid, name FROM players ORDER BY name").fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _row(match):
+        """[match_id, *MATCH_FIELDS, *LIST_FIELDS as JSON] for one export match"""
+        match = {'patch': patch_from_version(match.get('game_version')), **match}
+        return (
+            [match.get('match_id') or derive_match_id(match)]
+            + [match.get(field) for field in MATCH_FIELDS]
+            + [json.dumps(list(match.get(field) or [])) for field in LIST_FIELDS]
+        )
+
+    def _roll_up(self, puuid):
+        """Fold a player's matches above their rollup watermark into rollups
+
+        The caller holds the lock inside a transaction, so the rollups move
+        together with the rows they summarize. Returns the new watermark.
+        """
+        key = f'rollup_seq:{puuid}'
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        rolled_up = int(row[0]) if row else 0
+        latest = self._conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM matches WHERE puuid = ?", (puuid,)
+        ).fetchone()[0]
+        if latest > rolled_up:
+            self._conn.execute(_ROLLUP_SQL, (puuid, rolled_up, latest))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(latest)))
+        return latest
+
+    def ingest(self, puuid, matches):
+        """Append a player's matches oldest-first; ids already stored are skipped
+
+        Returns the number of matches actually added.
+        """
+        rows = [[puuid] + self._row(match) for match in matches]
+        columns = ['puuid', 'match_id'] + MATCH_FIELDS + LIST_FIELDS
+        sql = (
+            f"INSERT OR IGNORE INTO matches ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(sql, rows)
+            added = self._conn.total_changes - before
+            self._roll_up(puuid)
+            return added
+
+    def known_match_ids(self, puuid, match_ids):
+        """The subset of match_ids already stored for a player"""
+        match_ids = list(match_ids)
+        if not match_ids:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT match_id FROM matches WHERE puuid = ? AND match_id IN ({', '.join('?' * len(match_ids))})",
+                [puuid] + match_ids,
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def import_json(self, path, batch_size=IMPORT_BATCH_SIZE):
+        """Ingest a tft_dashboard_data.json export if it changed since the last import
+
+        The matches are filed under the export's player_info. The file is
+        streamed into a temporary table batch by batch, so memory stays
+        bounded however large the export is. Exports list matches newest
+        first, so they are copied into the store in reverse to keep seq in
+        chronological order. Returns the number of new matches.
+        """
+        stamp = str(os.path.getmtime(path))
+        if self.get_meta(f'json_mtime:{path}') == stamp:
+            return 0
+
+        columns = ['match_id'] + MATCH_FIELDS + LIST_FIELDS
+        staging_sql = (
+            f"INSERT INTO import_staging ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        with self._import_lock:
+            with self._lock, self._conn:
+                self._conn.execute(_STAGING_SCHEMA)
+                self._conn.execute("DELETE FROM import_staging")
+
+            player_info = {}
+            batch = []
+            for key, value in iter_export(path):
+                if key == 'player_info':
+                    player_info = value or {}
+                elif key == 'matches':
+                    batch.append(self._row(value))
+                    if len(batch) >= batch_size:
+                        with self._lock, self._conn:
+                            self._conn.executemany(staging_sql, batch)
+                        batch = []
+
+            puuid = derive_puuid(player_info)
+            self.add_player(puuid, player_info.get('name', 'Unknown player'))
+            with self._lock, self._conn:
+                self._conn.executemany(staging_sql, batch)
+                before = self._conn.total_changes
+                self._conn.execute(
+                    f"INSERT OR IGNORE INTO matches (puuid, {', '.join(columns)}) "
+                    f"SELECT ?, {', '.join(columns)} FROM import_staging ORDER BY pos DESC",
+                    (puuid,),
+                )
+                added = self._conn.total_changes - before
+                self._conn.execute("DELETE FROM import_staging")
+                self._roll_up(puuid)
+
+        self.set_meta(f'json_mtime:{path}', stamp)
+        return added
+
+    def watermark(self, puuid):
+        """Highest seq currently stored for a player (0 when none)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM matches WHERE puuid = ?", (puuid,)
+            ).fetchone()
+        return row[0]
+
+    def load_since(self, puuid, watermark=0):
+        """A player's matches with seq > watermark, newest first, plus the new watermark"""
+        columns = ['seq', 'match_id'] + MATCH_FIELDS + LIST_FIELDS
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM matches "
+                f"WHERE puuid = ? AND seq > ? ORDER BY seq DESC",
+                (puuid, watermark),
+            ).fetchall()
+
+        frame = pd.DataFrame.from_records(rows, columns=columns)
+        for field in LIST_FIELDS:
+            frame[field] = [json.loads(value) for value in frame[field]]
+        new_watermark = int(frame['seq'].iloc[0]) if len(frame) else watermark
+        return frame.drop(columns='seq'), new_watermark
+
+    def rollups(self, puuid):
+        """A player's rollup rows (ROLLUP_COLUMNS) and the watermark they are current to
+
+        Rows stored before rollups existed are folded in on the first call.
+        """
+        with self._lock, self._conn:
+            watermark = self._roll_up(puuid)
+            rows = self._conn.execute(
+                f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM rollups WHERE puuid = ?", (puuid,)
+            ).fetchall()
+        return pd.DataFrame.from_records(rows, columns=ROLLUP_COLUMNS), watermark
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+# One consistent view of a player's matches: readers grab the whole tuple at once.
+# df holds the scalar columns only; items and traits live interned in matches.
+# prefix maps game modes to PrefixIndexes loaded along with the data (may be empty)
+MatchSnapshot = namedtuple('MatchSnapshot', ['watermark', 'df', 'trait_table', 'matches', 'prefix'])
+
+
+@traced('build snapshot')
+def build_snapshot(watermark, matches, trait_table=None, prefix=None):
+    """MatchSnapshot around CompactMatches, deriving the scalar frame and trait table"""
+    if trait_table is None:
+        trait_table = build_trait_table_from_ragged(matches.traits)
+    return MatchSnapshot(watermark, matches.scalar_frame(), trait_table, matches, prefix or {})
+
+
+class IncrementalMatchFrame:
+    """Newest-first compact matches and trait table for one player, kept in sync with a MatchStore
+
+    refresh() only reads and parses rows above the cached watermark and then
+    publishes a new MatchSnapshot in a single assignment, so readers holding
+    the previous snapshot are never affected. It can start from a saved
+    snapshot; one with watermark None (converted from an export, not from
+    this store) is served until the store has rows for the player and is
+    then replaced by them.
+    """
+
+    def __init__(self, store, puuid, snapshot=None):
+        self.store = store
+        self.puuid = puuid
+        if snapshot is None:
+            empty = pd.DataFrame(columns=['match_id'] + MATCH_FIELDS + LIST_FIELDS)
+            snapshot = build_snapshot(0, CompactMatches.from_frame(empty))
+        self.snapshot = snapshot
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the current snapshot"""
+        snapshot = self.snapshot
+        return int(
+            snapshot.matches.nbytes
+            + snapshot.df.memory_usage(deep=True).sum()
+            + snapshot.trait_table.memory_usage(deep=True).sum()
+        )
+
+    def refresh(self):
+        """Pull matches newer than the watermark; returns how many were added"""
+        with self._lock:
+            current = self.snapshot
+            new_rows, watermark = self.store.load_since(self.puuid, current.watermark or 0)
+            if new_rows.empty:
+                return 0
+            if current.watermark is None:
+                new_matches = CompactMatches.from_frame(new_rows)
+                self.snapshot = build_snapshot(watermark, new_matches)
+                return len(new_matches)
+
+            # New matches go in front, so existing trait rows shift down
+            new_matches = CompactMatches.from_frame(new_rows)
+            trait_table = concat_trait_tables(
+                [build_trait_table_from_ragged(new_matches.traits), current.trait_table],
+                offsets=[0, len(new_matches)],
+            )
+            matches = CompactMatches.concat([new_matches, current.matches])
+            self.snapshot = build_snapshot(watermark, matches, trait_table)
+            return len(new_matches)
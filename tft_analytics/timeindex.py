@@ -0,0 +1,73 @@
+"""Binary-searchable match times and patches for date and patch filters"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+
+def day_start_ms(day):
+    """Epoch milliseconds of midnight UTC starting a 'YYYY-MM-DD' day"""
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time(), tzinfo=timezone.utc)
+    return int(start.timestamp() * 1000)
+
+
+def days_back(days, today=None):
+    """'YYYY-MM-DD' of the first of the last `days` UTC days, today included"""
+    today = today or datetime.now(timezone.utc).date()
+    return (today - timedelta(days=days - 1)).isoformat()
+
+
+class TimeIndex:
+    """Start times and patches of one game mode's matches in rank order
+
+    Ranks are the ones PrefixIndex uses (0 is the newest match), and
+    filter_positions orders a mode's matches by game_datetime, so times
+    never increase along rank. Any date range is then one contiguous rank
+    range found with two binary searches, which the PrefixIndex answers
+    like a "last N games" window. Patches ship one after another, so each
+    patch is a run of ranks too, located once at build time.
+    """
+
+    def __init__(self, df, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        self.n_matches = len(positions)
+        times = df['game_datetime'].to_numpy()[positions] if 'game_datetime' in df.columns else None
+        # Negated so the keys ascend for searchsorted; missing times (-1) sort last
+        self._keys = -np.asarray(times if times is not None else np.full(self.n_matches, -1), dtype=np.int64)
+        self.has_times = bool(self.n_matches and self._keys[0] < 0)
+
+        self._patches = {}
+        if 'patch' in df.columns and self.n_matches:
+            patches = df['patch']
+            if isinstance(patches.dtype, pd.CategoricalDtype):
+                codes, vocab = patches.array.codes[positions], patches.array.categories
+            else:
+                codes, vocab = pd.factorize(patches.to_numpy()[positions])
+            known = codes >= 0
+            ranks = np.flatnonzero(known)
+            seen, first = np.unique(codes[known], return_index=True)
+            _, last_from_end = np.unique(codes[known][::-1], return_index=True)
+            last = len(ranks) - 1 - last_from_end
+            self._patches = {
+                vocab[code]: (int(ranks[start]), int(ranks[end]) + 1)
+                for code, start, end in zip(seen.tolist(), first.tolist(), last.tolist())
+            }
+
+    @property
+    def nbytes(self):
+        return self._keys.nbytes
+
+    def range(self, since=None, until=None):
+        """(start, stop) ranks of the matches with since <= game_datetime < until (epoch ms)"""
+        start = 0 if until is None else int(np.searchsorted(self._keys, -until, side='right'))
+        stop = self.n_matches if since is None else int(np.searchsorted(self._keys, -since, side='right'))
+        return start, max(start, stop)
+
+    def patch_range(self, patch):
+        """(start, stop) ranks from a patch's newest match to its oldest; (0, 0) if absent"""
+        return self._patches.get(patch, (0, 0))
+
+    def patches(self):
+        """Patches present, newest first"""
+        return sorted(self._patches, key=lambda patch: self._patches[patch][0])
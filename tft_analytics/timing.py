@@ -0,0 +1,195 @@
+"""Per-section wall-clock timing and opt-in tracing for one dashboard run
+
+SectionTimer charges page time to sections. A Tracer additionally
+records nested spans (pipeline stages inside sections) and counters
+(rows processed, elements emitted) and exports them as a Chrome trace
+(chrome://tracing, Perfetto). Library code reports through the module
+level span(), traced() and count(), which find the active Tracer in a
+context variable: while none is active each call is one lookup and a
+shared no-op, so instrumentation can stay in hot paths.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+import pandas as pd
+
+_active = contextvars.ContextVar('tft_tracer', default=None)
+
+
+class _NullSpan:
+    """Context manager that does nothing; shared by every disabled span() call"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.depth = self.tracer._enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter(), self.depth, self.args)
+        self.tracer._exit()
+        return False
+
+
+class Tracer:
+    """Spans and counters of one run
+
+    A span is (name, start, end, depth, thread, args) with times in
+    perf_counter seconds; depth is the nesting level within its thread,
+    starting at base_depth.
+    """
+
+    def __init__(self, base_depth=0):
+        self.base_depth = base_depth
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.counters = Counter()
+        self._depth = threading.local()
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        depth = getattr(self._depth, 'value', self.base_depth)
+        self._depth.value = depth + 1
+        return depth
+
+    def _exit(self):
+        self._depth.value -= 1
+
+    def span(self, name, **args):
+        """Context manager timing the enclosed block as a span nested in the current one"""
+        return _Span(self, name, args)
+
+    def record(self, name, start, end, depth=0, args=None):
+        with self._lock:
+            self.spans.append((name, start, end, depth, threading.get_ident(), args or {}))
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def as_frame(self):
+        """Per-span totals in first-seen order: depth, calls, total ms and share of the run"""
+        if not self.spans:
+            return pd.DataFrame(columns=['span', 'depth', 'calls', 'ms', 'share'])
+        frame = pd.DataFrame(
+            [(name, depth, (end - start) * 1000) for name, start, end, depth, _, _ in self.spans],
+            columns=['span', 'depth', 'ms'],
+        )
+        # Spans are recorded as they close, so order rows by when each first opened
+        frame['opened'] = [start for _, start, _, _, _, _ in self.spans]
+        totals = frame.groupby(['span', 'depth'], sort=False).agg(
+            calls=('ms', 'size'), ms=('ms', 'sum'), opened=('opened', 'min')
+        ).reset_index().sort_values('opened', kind='stable')
+        run_ms = frame.loc[frame['depth'] == 0, 'ms'].sum() or frame['ms'].max()
+        totals['share'] = totals['ms'] / run_ms * 100
+        return totals.drop(columns='opened').reset_index(drop=True)
+
+    def counter_frame(self):
+        return pd.DataFrame({'counter': list(self.counters), 'value': list(self.counters.values())})
+
+    def chrome_trace(self, process_name='tft-dashboard'):
+        """The run as a Chrome trace event document (complete events plus final counter values)"""
+        to_us = lambda seconds: (seconds - self.origin) * 1e6
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': 0, 'args': {'name': process_name}}]
+        end = self.origin
+        for name, start, stop, _, thread, args in self.spans:
+            events.append({
+                'name': name, 'ph': 'X', 'ts': to_us(start), 'dur': (stop - start) * 1e6,
+                'pid': 0, 'tid': thread, 'args': args,
+            })
+            end = max(end, stop)
+        for name, value in self.counters.items():
+            events.append({'name': name, 'ph': 'C', 'ts': to_us(end), 'pid': 0, 'args': {name: value}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path, **options):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(**options), f, default=str)
+
+
+def activate(tracer):
+    """Make tracer (or None to disable tracing) the one span()/count() report to in this context"""
+    _active.set(tracer)
+    return tracer
+
+
+def active_tracer():
+    return _active.get()
+
+
+def span(name, **args):
+    """Span on the active Tracer, or a no-op when tracing is off"""
+    tracer = _active.get()
+    return _NULL_SPAN if tracer is None else tracer.span(name, **args)
+
+
+def count(name, n=1):
+    """Add n to a counter on the active Tracer, if any"""
+    tracer = _active.get()
+    if tracer is not None:
+        tracer.count(name, n)
+
+
+def traced(name):
+    """Decorator: run the function inside span(name) while tracing is on"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _active.get()
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class SectionTimer:
+    """Lap timer: each lap() charges the time since the previous lap to a section
+
+    Laps with the same name accumulate, so a section split across the page
+    still shows up as one row. With a tracer, each lap is also recorded as
+    a top-level span that encloses the stage spans opened during it.
+    """
+
+    def __init__(self, tracer=None):
+        self.timings = {}
+        self.tracer = tracer
+        if tracer is not None:
+            # Laps are the top level; spans opened inside them nest below
+            tracer.base_depth = 1
+        self._last = time.perf_counter()
+
+    def lap(self, section):
+        now = time.perf_counter()
+        self.timings[section] = self.timings.get(section, 0.0) + (now - self._last)
+        if self.tracer is not None:
+            self.tracer.record(section, self._last, now)
+        self._last = now
+
+    def as_frame(self):
+        """Section timings in milliseconds, in page order"""
+        return pd.DataFrame({
+            'section': list(self.timings),
+            'ms': [seconds * 1000 for seconds in self.timings.values()],
+        })
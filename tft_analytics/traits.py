@@ -0,0 +1,145 @@
+"""One-time trait normalization and grouped trait statistics"""
+
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .timing import count, traced
+
+# Any set prefix, not just the current one: TFT14_, TFT15_, ...
+SET_PREFIX = re.compile(r'^TFT\d+$')
+
+TRAIT_STAT_COLUMNS = ['games', 'avg_placement', 'top4_rate', 'top2_rate']
+
+
+def parse_trait(entry):
+    """Split 'TFT15_StarGuardian_2' into ('TFT15', 'StarGuardian', 2)
+
+    Also accepts 'Armorclad_2' and bare 'Armorclad' (tier 1, empty set id).
+    Returns None for entries that carry no usable trait name, such as a
+    bare 'TFT14'.
+    """
+    if not isinstance(entry, str):
+        return None
+
+    parts = entry.split('_')
+    set_id = parts.pop(0) if len(parts) > 1 and SET_PREFIX.match(parts[0]) else ''
+    tier = int(parts.pop()) if len(parts) > 1 and parts[-1].isdigit() else 1
+    trait_name = '_'.join(parts)
+
+    if len(trait_name) <= 2 or SET_PREFIX.match(trait_name):
+        return None
+    return set_id, trait_name, tier
+
+
+def _trait_table(match_idx, codes, raw_traits):
+    """Long-form trait table from per-occurrence match_idx and codes into raw_traits"""
+    parsed = [parse_trait(raw) for raw in raw_traits]
+    valid = np.array([p is not None for p in parsed] + [False], dtype=bool)
+    keep = valid[codes]  # code -1 (missing) indexes the trailing False
+
+    set_ids = np.array([p[0] if p else '' for p in parsed], dtype=object)
+    names = np.array([p[1] if p else '' for p in parsed], dtype=object)
+    tiers = np.array([p[2] if p else 0 for p in parsed], dtype=np.int8)
+    kept_codes = codes[keep]
+
+    return pd.DataFrame({
+        'match_idx': match_idx[keep],
+        'set_id': pd.Categorical(set_ids[kept_codes]),
+        'trait': pd.Categorical(names[kept_codes]),
+        'tier': tiers[kept_codes],
+    })
+
+
+@traced('trait parsing')
+def build_trait_table(df):
+    """Normalize every match's traits into a long-form table
+
+    Columns: match_idx (int32 position of the match in df), set_id and trait
+    (Categorical) and tier (int8). Rows keep each match's original trait
+    order. Parsing runs once per distinct trait string, not once per row.
+    """
+    trait_lists = [t if isinstance(t, (list, tuple)) else () for t in df['traits']] \
+        if 'traits' in df.columns else []
+    lengths = np.fromiter(map(len, trait_lists), dtype=np.int64, count=len(trait_lists))
+    match_idx = np.repeat(np.arange(len(trait_lists), dtype=np.int32), lengths)
+
+    codes, raw_traits = pd.factorize(pd.Series(list(chain.from_iterable(trait_lists)), dtype=object))
+    return _trait_table(match_idx, codes, raw_traits)
+
+
+@traced('trait parsing')
+def build_trait_table_from_ragged(traits):
+    """build_trait_table for interned traits (a RaggedColumn); parses each vocabulary entry once"""
+    lengths = np.diff(traits.offsets)
+    match_idx = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+    return _trait_table(match_idx, traits.values, traits.vocab)
+
+
+def concat_trait_tables(tables, offsets):
+    """Stack trait tables, shifting each one's match_idx by its offset
+
+    Categorical columns are unioned so the result keeps compact codes.
+    """
+    pairs = [(table, offset) for table, offset in zip(tables, offsets) if len(table)]
+    if not pairs:
+        return next(iter(tables))
+    tables, offsets = zip(*pairs)
+    match_idx = np.concatenate([
+        table['match_idx'].to_numpy() + np.int32(offset) for table, offset in zip(tables, offsets)
+    ]).astype(np.int32)
+
+    return pd.DataFrame({
+        'match_idx': match_idx,
+        'set_id': union_categoricals([table['set_id'].array for table in tables]),
+        'trait': union_categoricals([table['trait'].array for table in tables]),
+        'tier': np.concatenate([table['tier'].to_numpy() for table in tables]).astype(np.int8),
+    })
+
+
+def select_trait_rows(trait_table, match_idx):
+    """Rows of trait_table that belong to the given match positions"""
+    match_idx = np.asarray(match_idx, dtype=np.int64)
+    table_idx = trait_table['match_idx'].to_numpy()
+    size = max(table_idx.max(initial=-1), match_idx.max(initial=-1)) + 1
+
+    wanted = np.zeros(size, dtype=bool)
+    wanted[match_idx] = True
+    return trait_table[wanted[table_idx]]
+
+
+def analyze_trait_performance(trait_table, placements):
+    """Per-trait games, average placement and top-4/top-2 rates in one pass
+
+    placements is indexed by match_idx (the placement column of the frame
+    the table was built from). Only traits present in trait_table are
+    returned, indexed by trait name.
+    """
+    count('rows processed', len(trait_table))
+    if trait_table.empty:
+        return pd.DataFrame(columns=TRAIT_STAT_COLUMNS)
+
+    codes = trait_table['trait'].cat.codes.to_numpy()
+    placement = np.asarray(placements, dtype=np.float64)[trait_table['match_idx'].to_numpy()]
+    n_traits = len(trait_table['trait'].cat.categories)
+
+    # Missing placements (NaN or MISSING_VALUE) count as games but not in placement stats
+    placed = placement >= 1
+    games = np.bincount(codes, minlength=n_traits)
+    placed_games = np.bincount(codes, weights=placed, minlength=n_traits)
+    placement_sum = np.bincount(codes, weights=np.where(placed, placement, 0.0), minlength=n_traits)
+    top4 = np.bincount(codes, weights=placed & (placement <= 4), minlength=n_traits)
+    top2 = np.bincount(codes, weights=placed & (placement <= 2), minlength=n_traits)
+
+    seen = games > 0
+    games = games[seen]
+    placed_games = np.where(placed_games[seen] > 0, placed_games[seen], np.nan)
+    return pd.DataFrame({
+        'games': games,
+        'avg_placement': placement_sum[seen] / placed_games,
+        'top4_rate': top4[seen] / placed_games * 100,
+        'top2_rate': top2[seen] / placed_games * 100,
+    }, index=pd.Index(trait_table['trait'].cat.categories[seen], name='trait'))
@@ -0,0 +1,215 @@
+"""Streaming rolling placement statistics over a player's whole history
+
+RollingTrend folds in one match at a time in O(1): a ring buffer of the
+last `window` placements and running integer sums over the placed ones
+give the rolling mean, top-4 rate and (population) variance exactly, and
+the EWMA is one multiply-add. Each step's values are appended to the series it keeps, so
+the full history stays plottable; lttb_indices thins it to a few hundred
+points that keep its shape.
+
+TrendIndex keeps a player's trends per (game mode, window) and, as new
+matches are prepended to their snapshot, only pushes those.
+"""
+
+import threading
+from array import array
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+TREND_COLUMNS = ['rolling_avg', 'ewma', 'top4_rate', 'variance']
+# Rolling windows (games) the dashboard offers; the EWMA uses the same span
+TREND_WINDOWS = (5, 10, 20, 50, 100)
+# Points a plotted trend is downsampled to
+TREND_POINTS = 600
+# Batches at least this long are folded in vectorized rather than per match
+BATCH_MATCHES = 256
+
+
+class RollingTrend:
+    """Rolling mean, EWMA, top-4 rate and variance of placement, oldest match first
+
+    Early steps average over the games so far (min_periods=1). Matches
+    without a placement (MISSING_VALUE) take up a slot in the window but
+    add nothing to it; a window with no placed games reads NaN and the EWMA
+    carries over them. Series values are only ever appended, so a prefix
+    read earlier never changes.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self._recent = deque(maxlen=window)
+        self._placed = self._sum = self._sum_sq = self._top4 = 0
+        self._ewma = None
+        self._series = {name: array('d') for name in TREND_COLUMNS}
+
+    def __len__(self):
+        return len(self._series['rolling_avg'])
+
+    @property
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in self._series.values())
+
+    def _fold(self, placement, sign):
+        if placement >= 1:
+            self._placed += sign
+            self._sum += sign * placement
+            self._sum_sq += sign * placement * placement
+            self._top4 += sign * (placement <= 4)
+
+    def push(self, placement):
+        """Fold in the next match"""
+        placement = int(placement)
+        if len(self._recent) == self.window:
+            self._fold(self._recent[0], -1)
+        self._recent.append(placement)
+        self._fold(placement, 1)
+        if placement >= 1:
+            self._ewma = placement if self._ewma is None else self._ewma + self.alpha * (placement - self._ewma)
+
+        n = self._placed
+        mean = self._sum / n if n else np.nan
+        self._series['rolling_avg'].append(mean)
+        self._series['ewma'].append(np.nan if self._ewma is None else self._ewma)
+        self._series['top4_rate'].append(self._top4 / n * 100 if n else np.nan)
+        self._series['variance'].append(max(self._sum_sq / n - mean * mean, 0.0) if n else np.nan)
+
+    def extend(self, placements):
+        """Fold in matches oldest first; the same values as push() per match"""
+        placements = np.asarray(placements, dtype=np.int64)
+        if len(placements) < BATCH_MATCHES:
+            for placement in placements.tolist():
+                self.push(placement)
+            return
+
+        # Window sums from cumulative sums over the carried-over games plus the batch
+        values = np.concatenate((np.fromiter(self._recent, dtype=np.int64, count=len(self._recent)), placements))
+        placed = values >= 1
+        kept = np.where(placed, values, 0)
+        end = np.arange(len(self._recent) + 1, len(values) + 1)
+        start = np.maximum(end - self.window, 0)
+        sums = {
+            name: cum[end] - cum[start]
+            for name, cum in (
+                ('placed', np.concatenate(([0], np.cumsum(placed)))),
+                ('sum', np.concatenate(([0], np.cumsum(kept)))),
+                ('sum_sq', np.concatenate(([0], np.cumsum(kept * kept)))),
+                ('top4', np.concatenate(([0], np.cumsum(placed & (values <= 4))))),
+            )
+        }
+        n = np.where(sums['placed'] > 0, sums['placed'], np.nan)
+        mean = sums['sum'] / n
+        seeded = self._ewma is not None
+        batch = np.where(placements >= 1, placements, np.nan)
+        ewma = pd.Series(np.concatenate(([self._ewma], batch)) if seeded else batch, dtype=np.float64)
+        ewma = ewma.ewm(alpha=self.alpha, adjust=False, ignore_na=True).mean().to_numpy()[int(seeded):]
+
+        for name, column in (
+            ('rolling_avg', mean),
+            ('ewma', ewma),
+            ('top4_rate', sums['top4'] / n * 100),
+            ('variance', np.maximum(sums['sum_sq'] / n - mean * mean, 0.0)),
+        ):
+            self._series[name].frombytes(np.ascontiguousarray(column, dtype=np.float64).tobytes())
+
+        self._recent = deque(values[-self.window:].tolist(), maxlen=self.window)
+        self._placed = self._sum = self._sum_sq = self._top4 = 0
+        for placement in self._recent:
+            self._fold(placement, 1)
+        if not np.isnan(ewma[-1]):
+            self._ewma = float(ewma[-1])
+
+    def frame(self, start=0, stop=None):
+        """Steps [start, stop) as a DataFrame with a 1-based game_number, oldest first"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = max(0, min(start, stop))
+        frame = pd.DataFrame({name: np.array(column[start:stop]) for name, column in self._series.items()})
+        frame.insert(0, 'game_number', np.arange(start + 1, stop + 1))
+        return frame
+
+
+class TrendIndex:
+    """A player's RollingTrends per (game mode, window), extended as new matches are prepended
+
+    update() takes a newest-first MatchSnapshot and the mode's row
+    positions (newest first). When the snapshot only adds matches in front
+    of the ones already folded in, just those are pushed; otherwise (a
+    replaced snapshot, matches stored out of order) the trend is rebuilt.
+    """
+
+    def __init__(self):
+        self._trends = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return int(sum(trend.nbytes + positions.nbytes for trend, _, _, positions in self._trends.values()))
+
+    def update(self, snapshot, game_mode, positions, window):
+        """(trend, number of steps that belong to this snapshot)
+
+        Later updates only append to the trend, so its first steps stay
+        this snapshot's even after they do.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        placements = snapshot.df['placement'].to_numpy()
+        n_rows = len(snapshot.df)
+        with self._lock:
+            entry = self._trends.get((game_mode, window))
+            n_new = len(positions) - (len(entry[3]) if entry else 0)
+            extends = (
+                entry is not None and n_new >= 0
+                and snapshot.watermark is not None and entry[1] is not None
+                and snapshot.watermark >= entry[1]
+                # The old matches, shifted down by the rows added in front
+                and np.array_equal(positions[n_new:], entry[3] + (n_rows - entry[2]))
+            )
+            if extends:
+                trend = entry[0]
+                trend.extend(placements[positions[:n_new][::-1]])
+            else:
+                trend = RollingTrend(window)
+                trend.extend(placements[positions[::-1]])
+            self._trends[(game_mode, window)] = (trend, snapshot.watermark, n_rows, positions)
+            return trend, len(trend)
+
+
+def lttb_indices(x, y, n_out):
+    """Positions of the n_out points Largest-Triangle-Three-Buckets keeps of (x, y)
+
+    The first and last points are kept; every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and
+    the next bucket's average, so peaks and dips survive the thinning.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_hi = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[lo:hi] - y[previous]) - (x[previous] - x[lo:hi]) * (next_y - y[previous])
+        )
+        # Steps without a placed game (NaN) are only kept when nothing else in the bucket is comparable
+        previous = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def downsample_trend(frame, points=TREND_POINTS, column='rolling_avg'):
+    """The rows of a trend frame LTTB keeps for its column, all columns taken at them"""
+    if len(frame) <= points:
+        return frame
+    kept = lttb_indices(frame['game_number'].to_numpy(), frame[column].to_numpy(), points)
+    return frame.iloc[kept].reset_index(drop=True)
@@ -4,9 +4,57 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
+import os
+import time
 from collections import Counter
 import numpy as np
 
+from tft_analytics import (
+    BAD_COLOR,
+    GAME_MODES,
+    GOOD_COLOR,
+    TREND_POINTS,
+    TREND_WINDOWS,
+    AggregateCache,
+    ArchetypeIndex,
+    CompactMatches,
+    Dataset,
+    IconCache,
+    ItemRegistry,
+    MatchStore,
+    RefreshWorker,
+    SectionTimer,
+    Tracer,
+    TrendIndex,
+    activate,
+    apply_min_games,
+    build_snapshot,
+    days_back,
+    discard_stale_versions,
+    json_export_source,
+    list_snapshots,
+    open_match_frame,
+    render_archetype_rows,
+    render_item_grid,
+    render_item_rows,
+    render_pair_rows,
+    render_recent_games,
+    render_trait_grid,
+    riot_source,
+    save_snapshot,
+    select_trait_rows,
+    snapshot_path,
+    span,
+    use_webgl,
+)
+from tft_analytics import engine
+
+# Per-section timings for this run, shown in the sidebar. Profiling is opt-in (the
+# toggle under the timings): while it is off the spans and counters inside
+# tft_analytics are a context-variable lookup each
+tracer = activate(Tracer() if st.session_state.get('profiling') else None)
+section_timer = SectionTimer(tracer)
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="TFT Performance Dashboard",
@@ -35,6 +83,62 @@ st.markdown("""
         border-radius: 0.5rem;
         margin: 1rem 0;
     }
+    .tile-grid {
+        display: grid;
+        gap: 1rem;
+        margin: 0.5rem 0;
+    }
+    .tile-emoji {
+        text-align: center;
+        margin: 8px 0;
+    }
+    .tile-icon {
+        display: block;
+        margin: 8px auto;
+    }
+    .tile-name {
+        font-weight: bold;
+        margin: 4px 0;
+    }
+    .tile-badge {
+        text-align: center;
+        padding: 6px;
+        border-radius: 4px;
+        color: white;
+        font-weight: bold;
+        margin: 4px 0;
+        font-size: 14px;
+    }
+    .tile-caption {
+        opacity: 0.6;
+        font-size: 14px;
+    }
+    .item-row, .game-row {
+        display: grid;
+        gap: 1rem;
+        align-items: center;
+        padding: 0.75rem 0;
+        border-bottom: 1px solid rgba(255, 255, 255, 0.1);
+    }
+    .item-row {
+        grid-template-columns: 1fr 3fr;
+    }
+    .pair-icons {
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        gap: 4px;
+    }
+    .pair-icons .tile-icon, .pair-icons .tile-emoji {
+        margin: 0;
+    }
+    .item-row-stats {
+        display: grid;
+        grid-template-columns: repeat(3, 1fr);
+    }
+    .game-row {
+        grid-template-columns: 1fr 2fr 2fr 2fr 3fr;
+    }
     .success-box {
         padding: 1rem;
         background: linear-gradient(90deg, #00d2d3, #54a0ff);
@@ -47,218 +151,136 @@ st.markdown("""
 
 # Title and Header
 st.title("🎮 TFT Performance Dashboard")
-st.markdown("### Beebo Prime • Level 273 • Advanced Analytics")
 
-def clean_item_name(item_name):
-    """Convert TFT_Item_ItemName to readable format"""
-    # Remove various prefixes and clean up the name
-    cleaned = item_name.replace('TFT_Item_', '').replace('TFT4_Item_Ornn', '').replace('TFT14_', '')
-    
-    # Add spaces before capital letters for readability
-    import re
-    spaced = re.sub(r'(?<!^)(?=[A-Z])', ' ', cleaned)
-    
-    return spaced
-
-def get_item_icon_url(item_name):
-    """Get the official Riot Data Dragon icon URL for a TFT item"""
-    # Clean the item name and map to Riot's official item IDs
-    clean_name = item_name.replace(' ', '').replace("'", '').replace('-', '').replace('_', '').lower()
-    
-    # Map item names to official Riot Data Dragon item IDs for TFT Set 14
-    riot_item_mapping = {
-        'infinityedge': 'TFT_Item_InfinityEdge.png',
-        'guinsoosrageblade': 'TFT_Item_GuinsoosRageblade.png',
-        'spearofshojin': 'TFT_Item_SpearOfShojin.png',
-        'warmogsarmor': 'TFT_Item_WarmogsArmor.png',
-        'gargoylestoneplate': 'TFT_Item_GargoyleStoneplate.png',
-        'thiefsgloves': 'TFT_Item_ThiefsGloves.png',
-        'redbuff': 'TFT_Item_RedBuff.png',
-        'bluebuff': 'TFT_Item_BlueBuff.png',
-        'runaanshurricane': 'TFT_Item_RunaansHurricane.png',
-        'jeweledgauntlet': 'TFT_Item_JeweledGauntlet.png',
-        'morellonomicon': 'TFT_Item_Morellonomicon.png',
-        'dragonsclaw': 'TFT_Item_DragonsClaw.png',
-        'bramblevest': 'TFT_Item_BrambleVest.png',
-        'archangelsstaff': 'TFT_Item_ArchangelsStaff.png',
-        'hextechgunblade': 'TFT_Item_HextechGunblade.png',
-        'bloodthirster': 'TFT_Item_Bloodthirster.png',
-        'lastwhisper': 'TFT_Item_LastWhisper.png',
-        'ionicspark': 'TFT_Item_IonicSpark.png',
-        'quicksilver': 'TFT_Item_Quicksilver.png',
-        'zekesherald': 'TFT_Item_ZekesHerald.png',
-        'titansresolve': 'TFT_Item_TitansResolve.png',
-        'adaptivehelm': 'TFT_Item_AdaptiveHelm.png',
-        'statikkshiv': 'TFT_Item_StatikkShiv.png',
-        'rapidfirecannon': 'TFT_Item_RapidFirecannon.png',
-        'giantslayer': 'TFT_Item_GiantSlayer.png',
-        'deathblade': 'TFT_Item_Deathblade.png',
-        'rabadonsdeathcap': 'TFT_Item_RabadonsDeathcap.png',
-        'ludensecho': 'TFT_Item_LudensEcho.png',
-        'sunfirecape': 'TFT_Item_SunfireCape.png',
-        'thornmail': 'TFT_Item_Thornmail.png',
-        'frozenheart': 'TFT_Item_FrozenHeart.png',
-        'spiritvisage': 'TFT_Item_SpiritVisage.png',
-        'bansheesveil': 'TFT_Item_BansheesVeil.png',
-        'handofjustice': 'TFT_Item_HandOfJustice.png',
-        'forceofnature': 'TFT_Item_ForceOfNature.png',
-        'locketoftheironsolari': 'TFT_Item_LocketOfTheIronSolari.png',
-        'redemption': 'TFT_Item_Redemption.png',
-        'crownguard': 'TFT_Item_Crownguard.png',
-        'sterakskage': 'TFT_Item_SteraksGage.png',
-        'steraksgag': 'TFT_Item_SteraksGage.png',  # Alternative spelling
-        'edgeofnight': 'TFT_Item_EdgeOfNight.png',
-        'spectralcutlass': 'TFT_Item_SpectralCutlass.png',
-        'unstableconcoction': 'TFT_Item_UnstableConcoction.png',
-        'nightharvester': 'TFT_Item_NightHarvester.png',
-        'leviathan': 'TFT_Item_Leviathan.png',
-        'spectralGauntlet': 'TFT_Item_SpectralGauntlet.png',
-        'powerGauntlet': 'TFT_Item_PowerGauntlet.png',
-        'emptybag': 'TFT_Item_EmptyBag.png',
-        
-        # FIXES for the broken icons from your screenshot:
-        'needlesslylargerod': 'TFT_Item_NeedlesslyLargeRod.png',
-        'tearofthegoddess': 'TFT_Item_TearOfTheGoddess.png',
-        'thecollector': 'TFT_Item_TheCollector.png',
-        'bfsword': 'TFT_Item_BFSword.png',
-        'chainvest': 'TFT_Item_ChainVest.png',
-        'varuscyberneticitem': 'TFT_Item_VarusCyberneticAugment.png',  # TFT Set 14 specific
-        'itemarmorcladembleitem': 'TFT_Item_ArmorlcadEmblem.png',  # Set 14 emblem
-        'itemnitrochromecounter': 'TFT_Item_NitroChrome.png',  # Set 14 specific
-        'tft5itemgargolestoneplatradiant': 'TFT_Item_GargoyleStoneplate_Radiant.png',  # Radiant version
-        
-        # Additional common items that might be missing:
-        'giantsslayer': 'TFT_Item_GiantSlayer.png',  # Alternative spelling
-        'recurvebow': 'TFT_Item_RecurveBow.png',
-        'negatroncloak': 'TFT_Item_NegatronCloak.png',
-        'giantsbelt': 'TFT_Item_GiantsBelt.png',
-        'sparringgloves': 'TFT_Item_SparringGloves.png',
-        'spatula': 'TFT_Item_Spatula.png',
-    }
-    
-    # Get the official Riot filename
-    riot_filename = riot_item_mapping.get(clean_name, f'TFT_Item_{item_name.replace(" ", "").replace("_", "")}.png')
-    
-    # Use Riot's official Data Dragon CDN
-    return f"https://ddragon.leagueoflegends.com/cdn/14.24.1/img/tft-item/{riot_filename}"
-
-def display_item_with_icon(item_name, stats):
-    """Display item with icon and stats - UPDATED WITH EMOJI FALLBACKS"""
-    col1, col2 = st.columns([1, 3])
-    
-    # Clean the item name for display
-    clean_name = clean_item_name(item_name)
-    
-    with col1:
-        # COMPREHENSIVE EMOJI FALLBACK SYSTEM
-        icon_displayed = False
-        
-        # First, check for specific items that need custom emojis
-        special_item_emojis = {
-            'titans resolve': '🛡️💪',
-            'tear of the goddess': '💧✨', 
-            'tft5 item gargoyle stoneplate radiant': '🌟🛡️',
-            'gargoyle stoneplate radiant': '🌟🛡️',
-            'the collector': '💀⚔️',
-            'b f sword': '⚔️💥',
-            'bf sword': '⚔️💥',
-            'chain vest': '🦺',
-            'rapid fire cannon': '🏹⚡',
-            'rapidfire cannon': '🏹⚡',
-            'item armorclad emblem item': '⚔️🔰',
-            'armorclad emblem': '⚔️🔰',
-            'varus cybernetic item': '🤖🏹',
-            'item nitro chrome counter': '🏎️⚡',
-            'nitro chrome counter': '🏎️⚡',
-            'needlessly large rod': '🔮⚡',
-            'recurve bow': '🏹',
-            'negatron cloak': '🛡️🌙',
-            'giants belt': '🟫💪',
-            'sparring gloves': '🥊',
-            'spatula': '🍴✨'
-        }
-        
-        # Normalize the item name for comparison - USE ORIGINAL ITEM NAME  
-        normalized_name = item_name.lower().replace('_', ' ').replace('-', ' ').strip()
-        
-        # Check if we have a specific emoji for this item
-        if normalized_name in special_item_emojis:
-            st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">{special_item_emojis[normalized_name]}</div>', unsafe_allow_html=True)
-            icon_displayed = True
-        else:
-            # Try to load the actual icon from Riot
-            try:
-                icon_url = get_item_icon_url(clean_name)
-                st.image(icon_url, width=64)
-                icon_displayed = True
-            except:
-                pass
-        
-        # If no icon was displayed, use smart category fallbacks
-        if not icon_displayed:
-            if any(word in normalized_name for word in ['radiant', 'shimmer', 'prismatic']):
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">✨⚔️</div>', unsafe_allow_html=True)
-            elif any(word in normalized_name for word in ['emblem', 'crest']):
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">🔰</div>', unsafe_allow_html=True)
-            elif any(word in normalized_name for word in ['artifact', 'ornn', 'chosen']):
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">🏺</div>', unsafe_allow_html=True)
-            elif any(word in normalized_name for word in ['sword', 'blade', 'edge']):
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">⚔️</div>', unsafe_allow_html=True)
-            elif any(word in normalized_name for word in ['bow', 'cannon', 'gun']):
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">🏹</div>', unsafe_allow_html=True)
-            elif any(word in normalized_name for word in ['armor', 'vest', 'plate', 'cloak']):
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">🛡️</div>', unsafe_allow_html=True)
-            elif any(word in normalized_name for word in ['rod', 'staff', 'cap']):
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">🔮</div>', unsafe_allow_html=True)
-            else:
-                st.markdown(f'<div style="text-align: center; font-size: 40px; margin: 8px 0;">⚔️</div>', unsafe_allow_html=True)
+@st.cache_resource
+def get_icon_cache():
+    """Local item icon cache, resolved once per server process (no CDN requests)"""
+    return IconCache(ICON_ASSET_DIR)
+
+@st.cache_resource
+def get_item_registry():
+    """Display name, icon and emoji for every item id, built once per server process"""
+    return ItemRegistry(get_icon_cache())
+
+# Trait emoji/icon (you could map these to actual trait icons)
+TRAIT_EMOJIS = {
+    'Vanguard': '🛡️',
+    'Bruiser': '💪',
+    'Armorclad': '⚔️',
+    'Bastion': '🏰',
+    'Exotech': '🤖',
+    'Syndicate': '👤',
+    'AnimaSquad': '🚀',
+    'BoomBots': '💥',
+    'Cypher': '🔒',
+    'Slayer': '⚡',
+    'GodoftheNet': '🌐',
+    'StreetDemon': '😈',
+    'Techie': '🔧',
+    'Nitro': '🏎️',
+    'Dynamo': '⚡',
+    'SoulKiller': '💀',
+    'GoldenOx': '🐂'
+}
+
+DATA_FILE = 'tft_dashboard_data.json'
+MATCH_STORE_PATH = 'tft_matches.db'
+# Memory-mapped player snapshots (python -m tft_analytics.snapshot converts an export)
+SNAPSHOT_DIR = 'snapshots'
+ICON_ASSET_DIR = os.path.join('assets', 'tft-item')
+SAMPLE_PUUID = 'sample'
+
+# Memory budgets for the caches shared by every session
+PLAYER_FRAME_CACHE_BYTES = 1024 * 1024 ** 2
+AGGREGATE_CACHE_BYTES = 256 * 1024 ** 2
+
+# Background refresh: how often new matches are ingested, and how often an
+# open page checks whether a newer snapshot was published
+REFRESH_INTERVAL_SECONDS = 60
+REFRESH_POLL_SECONDS = 10
+# Profiled runs also write their trace here when set
+TRACE_DIR = os.environ.get('TFT_TRACE_DIR')
+# Players fetched from the Riot API on every refresh (comma-separated Riot ids)
+RIOT_API_KEY = os.environ.get('RIOT_API_KEY')
+TRACKED_RIOT_IDS = [riot_id.strip() for riot_id in os.environ.get('TFT_RIOT_IDS', '').split(',') if riot_id.strip()]
+
+@st.cache_resource
+def get_match_store():
+    """Open the local match store once per server process"""
+    return MatchStore(MATCH_STORE_PATH)
+
+@st.cache_resource
+def get_player_frames():
+    """Per-player incremental frames; evicted players are reloaded from the store"""
+    return AggregateCache(PLAYER_FRAME_CACHE_BYTES)
+
+@st.cache_resource
+def get_aggregate_cache():
+    """Item, trait and level aggregates shared across sessions and players"""
+    return AggregateCache(AGGREGATE_CACHE_BYTES)
+
+@st.cache_resource
+def get_refresh_worker():
+    """Start the background ingestion thread once per server process"""
+    sources = [json_export_source(DATA_FILE)]
+    if RIOT_API_KEY and TRACKED_RIOT_IDS:
+        sources.append(riot_source(TRACKED_RIOT_IDS, RIOT_API_KEY))
+    
+    def on_publish(puuid, snapshot):
+        # Free the superseded version's aggregates now rather than on LRU eviction
+        discard_stale_versions(get_aggregate_cache(), (puuid, snapshot.watermark))
+        # Persist it so the next server process starts from a memory map
+        try:
+            name = get_match_store().players().get(puuid, 'Unknown player')
+            save_snapshot(snapshot_path(SNAPSHOT_DIR, puuid), snapshot, player={'puuid': puuid, 'name': name})
+        except Exception as e:
+            print(f"⚠️ Could not save snapshot for {puuid}: {e}")
+    
+    worker = RefreshWorker(get_match_store(), get_player_frames(), sources,
+                           interval=REFRESH_INTERVAL_SECONDS, on_publish=on_publish)
+    return worker.start()
+
+def load_players():
+    """Tracked players in the match store and in saved snapshots as {puuid: name}"""
+    players = {puuid: name for puuid, (name, _) in list_snapshots(SNAPSHOT_DIR).items()}
+    try:
+        # Ingestion (JSON export, Riot API) happens on the refresh worker's thread
+        players.update(get_match_store().players())
+    except Exception as e:
+        print(f"❌ Error opening match store: {e}")
+    return players
+
+def load_player_frame(puuid):
+    """Map a player's snapshot (or build their frame from the store) on first use"""
+    match_frame = open_match_frame(get_match_store(), puuid, SNAPSHOT_DIR)
+    if not match_frame.snapshot.prefix and not match_frame.snapshot.df.empty:
+        # Built from the store: let the worker write its snapshot off the script thread
+        get_refresh_worker().request_publish(puuid)
+    return match_frame
+
+def load_data(puuid):
+    """A player's latest published snapshot; the refresh worker keeps it current"""
+    if puuid == SAMPLE_PUUID:
+        return load_sample_snapshot()
     
-    with col2:
-        st.markdown(f"**{clean_name}**")  # Use clean name for display
-        st.caption(f"{stats['games']} games")
-        
-        # Stats with clear headers
-        col_a, col_b, col_c = st.columns(3)
-        with col_a:
-            st.markdown("**Avg Place**")
-            st.markdown(f"{stats['avg_placement']:.2f}")
-        with col_b:
-            st.markdown("**Top 4 Rate**")
-            st.markdown(f"{stats['top4_rate']:.0f}%")
-        with col_c:
-            st.markdown("**Top 2 Rate**")
-            if 'placements' in stats and stats['placements']:
-                top2_count = sum(1 for p in stats['placements'] if p <= 2)
-                top2_rate = (top2_count / stats['games']) * 100 if stats['games'] > 0 else 0
-                st.markdown(f"{top2_rate:.0f}%")
-            else:
-                st.markdown("0%")
-
-# Sample data (replace with your actual data loading)
-@st.cache_data
-def load_data():
-    """Load data from JSON file created by your API script"""
     try:
-        # Try to load real data from your API script
-        with open('tft_dashboard_data.json', 'r') as f:
-            data = json.load(f)
-        
-        # Convert to DataFrame
-        matches_df = pd.DataFrame(data['matches'])
+        match_frame = get_player_frames().get_or_compute(puuid, lambda: load_player_frame(puuid))
         
-        # Add game mode detection (you can enhance this logic)
-        matches_df['game_mode'] = 'Solo'  # Default to Solo, update as needed
+        # One attribute read: the whole run sees a single consistent snapshot
+        snapshot = match_frame.snapshot
+        if snapshot.df.empty:
+            print("⚠️ No games stored for this player, using sample data")
+            return load_sample_snapshot()
+        return snapshot
         
-        print(f"✅ Loaded {len(matches_df)} games from API data")
-        return matches_df
-        
-    except FileNotFoundError:
-        print("⚠️ No API data found, using sample data")
-        # Fallback to sample data if no real data available
-        return load_sample_data()
     except Exception as e:
         print(f"❌ Error loading data: {e}")
-        return load_sample_data()
+        return load_sample_snapshot()
+
+def load_sample_snapshot():
+    """Wrap the sample data in the same snapshot shape as the match store"""
+    sample_df = load_sample_data()
+    return build_snapshot(0, CompactMatches.from_frame(sample_df))
 
 def load_sample_data():
     """Fallback sample data for testing"""
@@ -287,138 +309,183 @@ def load_sample_data():
     
     return pd.DataFrame(matches_data)
 
-def analyze_item_performance(df):
-    """Analyze item performance and correlations"""
-    item_stats = {}
-    
-    for _, match in df.iterrows():
-        placement = match['placement']
-        for item_name in match['items']:  # Items are already names, not IDs
-            
-            if item_name not in item_stats:
-                item_stats[item_name] = {
-                    'placements': [],
-                    'games': 0,
-                    'top4': 0
-                }
-            
-            item_stats[item_name]['placements'].append(placement)
-            item_stats[item_name]['games'] += 1
-            if placement <= 4:
-                item_stats[item_name]['top4'] += 1
-    
-    # Calculate averages and rates
-    for item_name, stats in item_stats.items():
-        if stats['games'] > 0:
-            stats['avg_placement'] = np.mean(stats['placements'])
-            stats['top4_rate'] = (stats['top4'] / stats['games']) * 100
-        else:
-            stats['avg_placement'] = 0
-            stats['top4_rate'] = 0
-    
-    return pd.DataFrame.from_dict(item_stats, orient='index')
+def show_section(label, key):
+    """In lazy mode a heavy section only computes while its toggle is on"""
+    if not lazy_sections:
+        return True
+    return st.toggle(label, value=False, key=key)
 
-# Load data and generate insights
-df = load_data()
+section_timer.lap("Setup")
 
 # Sidebar controls
 st.sidebar.header("🎛️ Dashboard Controls")
 
-# Game mode filter
-game_modes = ['All', 'Solo', 'Double Up']
-selected_mode = st.sidebar.selectbox("Game Mode", game_modes)
+# Note the data version this run renders; the status fragment reruns the
+# page once the worker publishes a newer one
+refresh_worker = get_refresh_worker()
+st.session_state['rendered_data_version'] = refresh_worker.version
 
-games_to_show = st.sidebar.slider("Games to Display", min_value=5, max_value=len(df), value=min(50, len(df)))
-min_item_games = st.sidebar.slider("Minimum Games for Item Analysis", min_value=1, max_value=10, value=3)
+@st.fragment(run_every=REFRESH_POLL_SECONDS)
+def refresh_status():
+    """Poll the refresh worker without rerunning the whole page"""
+    if refresh_worker.version != st.session_state.get('rendered_data_version'):
+        st.rerun()
+    
+    if refresh_worker.last_refresh is None:
+        st.caption("🔄 Loading matches in the background...")
+    else:
+        ago = time.time() - refresh_worker.last_refresh
+        st.caption(f"🔄 Data v{refresh_worker.version} • refreshed {ago:.0f}s ago")
+    if refresh_worker.last_error is not None:
+        st.caption(f"⚠️ Last refresh failed: {refresh_worker.last_error}")
+    if st.button("Refresh now", key="refresh_now"):
+        refresh_worker.wake()
+
+with st.sidebar:
+    refresh_status()
+
+# Player selection
+players = load_players() or {SAMPLE_PUUID: "Sample Player"}
+selected_puuid = st.sidebar.selectbox("Player", list(players), format_func=players.get)
+player_name = players[selected_puuid].split('#')[0]
+st.markdown(f"### {player_name} • Advanced Analytics")
+
+# Load data and generate insights; the engine memoizes its results in the shared
+# cache, versioned by the store watermark (sample data by a cheap fingerprint),
+# and reads whole-history level and mode summaries from the store's rollups
+snapshot = load_data(selected_puuid)
+dataset = Dataset(snapshot, selected_puuid, cache=get_aggregate_cache(),
+                  store=None if selected_puuid == SAMPLE_PUUID else get_match_store())
+df = snapshot.df
+trait_table = snapshot.trait_table
+item_registry = get_item_registry()
+section_timer.lap("Load data")
 
-# Filter data by game mode
-if selected_mode != 'All':
-    df_filtered = df[df['game_mode'] == selected_mode].head(games_to_show)
-else:
-    df_filtered = df.head(games_to_show)
+# Game mode filter
+selected_mode = st.sidebar.selectbox("Game Mode", GAME_MODES)
+
+# Period filter: date ranges and patches are rank ranges of the mode's time index,
+# found by binary search, so switching period never scans the history
+mode_times = engine.time_index(dataset, selected_mode)
+periods = {"All time": (None, None)}
+if mode_times.has_times:
+    periods["Last 7 days"] = (days_back(7), None)
+    periods["Last 30 days"] = (days_back(30), None)
+for i, patch in enumerate(mode_times.patches()):
+    periods[f"This patch ({patch})" if i == 0 else f"Patch {patch}"] = (None, patch)
+selected_period = st.sidebar.selectbox("Period", list(periods), disabled=len(periods) == 1,
+                                       help="Needs match times and patches, which Riot API ingestion records")
+since_day, period_patch = periods[selected_period]
+period_start, period_stop = engine.period_window(dataset, selected_mode, since_day, period_patch)
+period_games = period_stop - period_start
 
 # Check if we have enough data
-if len(df_filtered) == 0:
-    st.error(f"No {selected_mode} games found in your data!")
+if period_games == 0:
+    period_note = "" if selected_period == "All time" else f" for {selected_period.lower()}"
+    st.error(f"No {selected_mode} games found in your data{period_note}!")
     st.stop()
 
-# Update performance analysis with filtered data
-item_performance = analyze_item_performance(df_filtered)
-
-# Handle case where item_performance might be empty
-if not item_performance.empty and 'games' in item_performance.columns:
-    item_performance_filtered = item_performance[item_performance['games'] >= min_item_games]
+# A period of 5 games or fewer is shown whole
+if period_games > 5:
+    games_to_show = st.sidebar.slider("Games to Display", min_value=5, max_value=period_games,
+                                      value=min(50, period_games))
 else:
-    item_performance_filtered = pd.DataFrame()  # Empty DataFrame if no valid data
+    games_to_show = period_games
+min_item_games = st.sidebar.slider("Minimum Games for Item Analysis", min_value=1, max_value=10, value=3)
+lazy_sections = st.sidebar.toggle(
+    "Lazy sections", value=True,
+    help="Heavy sections (trait matrix, mode comparison, item tabs, history, trends) only compute while switched on"
+)
 
-# Main metrics
+# Filter data by game mode and period; the prefix index answers any window of
+# the mode's ranks (newest games_to_show of the period) in O(items)
+games_window = (period_start, min(period_stop, period_start + games_to_show))
+window = engine.window_positions(dataset, selected_mode, games_window)
+df_filtered = df.iloc[window]
+
+# Update performance analysis with filtered data (shared across sessions and players).
+# Each item gets a placement interval shrunk towards this window's overall placements,
+# and rankings use its pessimistic end so a few lucky games can't top them
+item_performance = engine.item_performance(dataset, selected_mode, games_window)
+
+# Minimum games is a cheap threshold over the cached stats
+item_performance_filtered = apply_min_games(item_performance, min_item_games)
+section_timer.lap("Analysis")
+
+# Main metrics (window totals come straight from the prefix index)
+window_summary = engine.window_summary(dataset, selected_mode, games_window)
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    top4_rate = (df_filtered['placement'] <= 4).mean() * 100
+    top4_rate = window_summary['top4_rate']
     st.metric("Top 4 Rate", f"{top4_rate:.1f}%", delta=f"{top4_rate-60:.1f}%")
 
 with col2:
-    avg_placement = df_filtered['placement'].mean()
+    avg_placement = window_summary['avg_placement']
     st.metric("Avg Placement", f"{avg_placement:.2f}", delta=f"{4.5-avg_placement:+.2f}")
 
 with col3:
-    avg_level = df_filtered['level'].mean()
+    avg_level = window_summary['avg_level']
     st.metric("Avg Level", f"{avg_level:.1f}", delta=f"{avg_level-7.5:+.1f}")
 
 with col4:
-    avg_damage = df_filtered['damage'].mean()
+    avg_damage = window_summary['avg_damage']
     st.metric("Avg Damage", f"{avg_damage:.0f}", delta=f"{avg_damage-100:+.0f}")
 
+section_timer.lap("Metrics")
+
 # Level vs Performance Analysis
 st.markdown("---")
 st.subheader("📊 Level vs Performance Analysis")
 
 # Calculate average placement by level
 if len(df_filtered) > 0:
-    level_summary = df_filtered.groupby('level').agg({
-        'placement': 'mean'
-    }).round(2)
-    level_summary['games'] = df_filtered.groupby('level').size()
-    level_summary = level_summary.reset_index()
-
-    # Invert the placement values so better performance = taller bars
-    level_summary['inverted_placement'] = 9 - level_summary['placement']
-
-    # Create bar chart with inverted values
-    fig_level = px.bar(
-        level_summary, 
-        x='level', 
-        y='inverted_placement',
-        title="Performance by Final Level Reached",
-        color='placement',
-        color_continuous_scale='RdYlGn_r',
-        text='games'
-    )
+    def level_figure():
+        level_summary = engine.level_performance(dataset, selected_mode, games_window).copy()
+
+        # Invert the placement values so better performance = taller bars
+        level_summary['inverted_placement'] = 9 - level_summary['placement']
+
+        # Create bar chart with inverted values (a span of its own when profiling)
+        with span('level chart figure'):
+            fig_level = px.bar(
+                level_summary, 
+                x='level', 
+                y='inverted_placement',
+                title="Performance by Final Level Reached",
+                color='placement',
+                color_continuous_scale='RdYlGn_r',
+                text='games'
+            )
 
-    # Update layout for better readability
-    fig_level.update_layout(
-        yaxis=dict(
-            title="Performance Score (Taller = Better)",
-            range=[0, 8]
-        ),
-        xaxis=dict(title="Final Level Reached"),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        showlegend=False
-    )
+            # Update layout for better readability
+            fig_level.update_layout(
+                yaxis=dict(
+                    title="Performance Score (Taller = Better)",
+                    range=[0, 8]
+                ),
+                xaxis=dict(title="Final Level Reached"),
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                showlegend=False
+            )
 
-    # Add game count labels on bars
-    fig_level.update_traces(
-        texttemplate='%{text} games', 
-        textposition='outside',
-        textfont_size=12
-    )
+            # Add game count labels on bars
+            fig_level.update_traces(
+                texttemplate='%{text} games', 
+                textposition='outside',
+                textfont_size=12
+            )
+        return fig_level
 
+    # Figures are cached like the aggregates they draw, so an unchanged chart is reused across reruns
+    fig_level = dataset.stages(selected_mode, games_window).get('figure:level', level_figure)
     st.plotly_chart(fig_level, use_container_width=True)
 else:
     st.info("No data available for level analysis")
 
+section_timer.lap("Level chart")
+
 # Charts Grid
 st.markdown("---")
 st.subheader("📊 Performance Analysis")
@@ -438,75 +505,11 @@ with perf_col1:
     st.markdown('<p style="color: #2ecc71; font-size: 14px;">Items with strong performance - build these more often!</p>', unsafe_allow_html=True)
     
     if not item_performance_filtered.empty and len(item_performance_filtered) > 0:
-        best_items = item_performance_filtered.nsmallest(9, 'avg_placement')
+        best_items = engine.best_items(item_performance_filtered)
         
         if len(best_items) > 0:
-            best_items_data = best_items.reset_index()
-            
-            # Create grid layout - 3 columns x 3 rows
-            cols_per_row = 3
-            items_to_show = best_items_data.head(9)
-            
-            for i in range(0, len(items_to_show), cols_per_row):
-                cols = st.columns(cols_per_row)
-                
-                for j, col in enumerate(cols):
-                    item_idx = i + j
-                    if item_idx < len(items_to_show):
-                        item_row = items_to_show.iloc[item_idx]
-                        item_name = item_row['index']
-                        clean_name = clean_item_name(item_name)
-                        
-                        with col:
-                            with st.container():
-                                # Try to load icon, fallback to custom emoji for special items
-                                try:
-                                    # Check if this is a special item that needs custom emoji
-                                    special_item_emojis = {
-                                        'TFT5_Item_Gargoyle Stoneplate Radiant': '🌟🛡️',
-                                        'Item_Armorclad Emblem Item': '⚔️🔰', 
-                                        'Varus Cybernetic Item': '🤖🏹',
-                                        'Item_Nitro_Chrome Counter': '🏎️⚡',
-                                        'The Collector': '💀⚔️',
-                                        'Rapid Fire Cannon': '🏹⚡',
-                                        'B F Sword': '⚔️',
-                                        'Chain Vest': '🦺',
-                                        'Titans Resolve': '🛡️💪',
-                                        'Tear Of The Goddess': '💧✨'
-                                    }
-                                    
-                                    if clean_name in [k.replace(' ', '').lower() for k in special_item_emojis.keys()]:
-                                        # Find the original key and use its emoji
-                                        for key, emoji in special_item_emojis.items():
-                                            if clean_name == key.replace(' ', '').lower():
-                                                st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">{emoji}</div>', unsafe_allow_html=True)
-                                                break
-                                    else:
-                                        # Try to load the actual icon
-                                        icon_url = get_item_icon_url(clean_name)
-                                        st.image(icon_url, width=50)
-                                except:
-                                    # Ultimate fallback - item type emoji
-                                    if any(word in item_name.lower() for word in ['radiant', 'shimmer', 'prismatic']):
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">✨⚔️</div>', unsafe_allow_html=True)
-                                    elif 'emblem' in item_name.lower():
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">🔰</div>', unsafe_allow_html=True)
-                                    elif 'artifact' in item_name.lower():
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">🏺</div>', unsafe_allow_html=True)
-                                    else:
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">⚔️</div>', unsafe_allow_html=True)
-                                
-                                st.markdown(f"**{clean_name}**")
-                                
-                                avg_place = item_row['avg_placement']
-                                games = item_row['games']
-                                top4_rate = item_row['top4_rate']
-                                
-                                # Always green for best items
-                                color = "#2ecc71"
-                                
-                                st.markdown(f'<div style="text-align: center; background-color: {color}; padding: 6px; border-radius: 4px; color: white; font-weight: bold; margin: 4px 0; font-size: 14px;">{avg_place:.2f} avg</div>', unsafe_allow_html=True)
-                                st.caption(f"{games} games • {top4_rate:.0f}% top 4")
+            # Whole 3x3 grid in one HTML block; always green for best items
+            st.markdown(render_item_grid(best_items, item_registry, color=GOOD_COLOR), unsafe_allow_html=True)
         else:
             st.info("Not enough data for top performing items")
     else:
@@ -518,85 +521,20 @@ with perf_col2:
     st.markdown('<p style="color: #e74c3c; font-size: 14px;">Items hurting your climb - consider building less often!</p>', unsafe_allow_html=True)
     
     if not item_performance_filtered.empty and len(item_performance_filtered) > 0:
-        # Filter for items with poor performance (avg placement > 4.5 OR low top4 rate)
-        poor_items = item_performance_filtered[
-            (item_performance_filtered['avg_placement'] > 4.5) | 
-            (item_performance_filtered['top4_rate'] < 45)
-        ].nlargest(9, 'avg_placement')  # Get the worst 9
+        # Worst 9 items whose whole interval sits below an average finish
+        poor_items = engine.underperforming_items(item_performance_filtered)
         
         if len(poor_items) > 0:
-            poor_items_data = poor_items.reset_index()
-            
-            # Create grid layout - 3 columns x 3 rows
-            cols_per_row = 3
-            items_to_show = poor_items_data.head(9)
-            
-            for i in range(0, len(items_to_show), cols_per_row):
-                cols = st.columns(cols_per_row)
-                
-                for j, col in enumerate(cols):
-                    item_idx = i + j
-                    if item_idx < len(items_to_show):
-                        item_row = items_to_show.iloc[item_idx]
-                        item_name = item_row['index']
-                        clean_name = clean_item_name(item_name)
-                        
-                        with col:
-                            with st.container():
-                                # Try to load icon, fallback to custom emoji for special items
-                                try:
-                                    # Check if this is a special item that needs custom emoji
-                                    special_item_emojis = {
-                                        'TFT5_Item_Gargoyle Stoneplate Radiant': '🌟🛡️',
-                                        'Item_Armorclad Emblem Item': '⚔️🔰', 
-                                        'Varus Cybernetic Item': '🤖🏹',
-                                        'Item_Nitro_Chrome Counter': '🏎️⚡',
-                                        'The Collector': '💀⚔️',
-                                        'Rapid Fire Cannon': '🏹⚡',
-                                        'B F Sword': '⚔️',
-                                        'Chain Vest': '🦺',
-                                        'Titans Resolve': '🛡️💪',
-                                        'Tear Of The Goddess': '💧✨'
-                                    }
-                                    
-                                    if clean_name in [k.replace(' ', '').lower() for k in special_item_emojis.keys()]:
-                                        # Find the original key and use its emoji
-                                        for key, emoji in special_item_emojis.items():
-                                            if clean_name == key.replace(' ', '').lower():
-                                                st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">{emoji}</div>', unsafe_allow_html=True)
-                                                break
-                                    else:
-                                        # Try to load the actual icon
-                                        icon_url = get_item_icon_url(clean_name)
-                                        st.image(icon_url, width=50)
-                                except:
-                                    # Ultimate fallback - item type emoji
-                                    if any(word in item_name.lower() for word in ['radiant', 'shimmer', 'prismatic']):
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">✨⚔️</div>', unsafe_allow_html=True)
-                                    elif 'emblem' in item_name.lower():
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">🔰</div>', unsafe_allow_html=True)
-                                    elif 'artifact' in item_name.lower():
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">🏺</div>', unsafe_allow_html=True)
-                                    else:
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">⚔️</div>', unsafe_allow_html=True)
-                                
-                                st.markdown(f"**{clean_name}**")
-                                
-                                avg_place = item_row['avg_placement']
-                                games = item_row['games']
-                                top4_rate = item_row['top4_rate']
-                                
-                                # Always red for poor items
-                                color = "#e74c3c"
-                                
-                                st.markdown(f'<div style="text-align: center; background-color: {color}; padding: 6px; border-radius: 4px; color: white; font-weight: bold; margin: 4px 0; font-size: 14px;">{avg_place:.2f} avg</div>', unsafe_allow_html=True)
-                                st.caption(f"{games} games • {top4_rate:.0f}% top 4")
+            # Whole 3x3 grid in one HTML block; always red for poor items
+            st.markdown(render_item_grid(poor_items, item_registry, color=BAD_COLOR), unsafe_allow_html=True)
         else:
             st.info("No significantly underperforming items found!")
             st.markdown("🎉 All your items are performing reasonably well!")
     else:
         st.info("No item performance data available")
 
+section_timer.lap("Item grids")
+
 # Original trait analysis section
 chart_col1, chart_col2 = st.columns(2)
 
@@ -608,175 +546,59 @@ with chart_col2:
     # Trait Performance Matrix (SAME FORMAT AS ITEMS)
     st.markdown("### 🎭 Trait Performance Matrix")
     
-    if len(df_filtered) > 0 and 'traits' in df_filtered.columns:
-        # Debug information in collapsible section
-        with st.expander("🔍 Debug Trait Data", expanded=False):
+    if not show_section("Show trait matrix", key="show_trait_matrix"):
+        st.caption("Switch on to compute the trait matrix")
+    elif len(df_filtered) > 0:
+        # Debug information, only gathered while switched on
+        if st.toggle("🔍 Debug Trait Data", value=False, key="show_trait_debug"):
             st.markdown(f"* Total games: {len(df_filtered)}")
-            st.markdown(f"* Columns available: {list(df_filtered.columns)}")
-            st.markdown(f"* 'traits' column exists {'✅' if 'traits' in df_filtered.columns else '❌'}")
+            st.markdown(f"* Distinct trait strings: {len(snapshot.matches.traits.vocab)}")
             
-            # Show first few games' trait data
+            # Decode only the first few games back to lists
             st.markdown("**First 5 games trait data:**")
-            for idx, (_, row) in enumerate(df_filtered.head(5).iterrows()):
-                trait_data = row['traits'] if 'traits' in row else []
-                st.markdown(f"Game {idx+1}: {trait_data} (type: {type(trait_data)})")
-            
-            # Count games with non-empty traits
-            non_empty_traits = df_filtered[df_filtered['traits'].apply(lambda x: len(x) > 0 if isinstance(x, list) else False)]
-            st.markdown(f"* Games with non-empty traits: {len(non_empty_traits)}/{len(df_filtered)}")
+            debug_games = snapshot.matches.take(window[:5]).to_frame()
+            for idx, trait_data in enumerate(debug_games['traits']):
+                st.markdown(f"Game {idx+1}: {trait_data}")
             
-            # Show some examples
-            if len(non_empty_traits) > 0:
-                examples = non_empty_traits['traits'].head(3).tolist()
-                st.markdown(f"* Trait examples: {examples}")
-        
-        # Extract trait-placement pairs with improved parsing
-        trait_placements = []
-        
-        for idx, (_, match) in enumerate(df_filtered.iterrows()):
-            if match['traits'] and len(match['traits']) > 0:
-                placement = match['placement']
-                
-                for trait_entry in match['traits']:
-                    if isinstance(trait_entry, str) and trait_entry != 'TFT14':
-                        # Handle different possible formats:
-                        # Format 1: 'TFT14_Armorclad_2'
-                        # Format 2: 'Armorclad_2' 
-                        # Format 3: Just 'Armorclad'
-                        
-                        if '_' in trait_entry:
-                            parts = trait_entry.split('_')
-                            
-                            if len(parts) >= 3 and parts[0] == 'TFT14':
-                                # Format: TFT14_Armorclad_2
-                                trait_name = parts[1]
-                                trait_tier = parts[2] if parts[2].isdigit() else '1'
-                            elif len(parts) >= 2:
-                                # Format: Armorclad_2 or similar
-                                trait_name = parts[0]
-                                trait_tier = parts[1] if parts[1].isdigit() else '1'
-                            else:
-                                # Format: Just trait name
-                                trait_name = trait_entry
-                                trait_tier = '1'
-                        else:
-                            # No underscores, just trait name
-                            trait_name = trait_entry
-                            trait_tier = '1'
-                        
-                        # Only add if we got a valid trait name that's not just 'TFT14'
-                        if trait_name and trait_name != 'TFT14' and len(trait_name) > 2:
-                            trait_placements.append({
-                                'trait': trait_name,
-                                'trait_with_tier': f"{trait_name} ({trait_tier})",
-                                'placement': placement,
-                                'tier': trait_tier
-                            })
+            # Count games with non-empty traits straight from the trait offsets
+            trait_counts = np.diff(snapshot.matches.traits.offsets)[window]
+            st.markdown(f"* Games with non-empty traits: {int((trait_counts > 0).sum())}/{len(df_filtered)}")
         
-        if trait_placements:
-            trait_df = pd.DataFrame(trait_placements)
-            
-            # Calculate average placement by trait (only show traits with 2+ games)
-            trait_summary = trait_df.groupby('trait').agg({
-                'placement': ['mean', 'count']
-            }).round(2)
-            trait_summary.columns = ['avg_placement', 'games']
-            trait_summary = trait_summary[trait_summary['games'] >= 2]  # Lowered threshold
+        # Trait stats come from the table normalized at load time
+        trait_summary = engine.trait_performance(dataset, selected_mode, games_window)
+
+        if not trait_summary.empty:
+            # Best 9 traits with 2+ games
+            best_traits = engine.best_traits(trait_summary)
             
-            if len(trait_summary) > 0:
-                trait_summary = trait_summary.reset_index()
-                
-                # Get best performing traits (top 9)
-                best_traits = trait_summary.nsmallest(9, 'avg_placement')
-                
-                if len(best_traits) > 0:
-                    st.markdown('<p style="color: #2ecc71; font-size: 14px;">Traits with strong performance - prioritize these synergies!</p>', unsafe_allow_html=True)
-                    
-                    # Create grid layout - 3 columns x 3 rows
-                    cols_per_row = 3
-                    traits_to_show = best_traits.head(9)
-                    
-                    for i in range(0, len(traits_to_show), cols_per_row):
-                        cols = st.columns(cols_per_row)
-                        
-                        for j, col in enumerate(cols):
-                            trait_idx = i + j
-                            if trait_idx < len(traits_to_show):
-                                trait_row = traits_to_show.iloc[trait_idx]
-                                trait_name = trait_row['trait']
-                                
-                                with col:
-                                    with st.container():
-                                        # Trait emoji/icon (you could map these to actual trait icons)
-                                        trait_emoji_map = {
-                                            'Vanguard': '🛡️',
-                                            'Bruiser': '💪',
-                                            'Armorclad': '⚔️',
-                                            'Bastion': '🏰',
-                                            'Exotech': '🤖',
-                                            'Syndicate': '👤',
-                                            'AnimaSquad': '🚀',
-                                            'BoomBots': '💥',
-                                            'Cypher': '🔒',
-                                            'Slayer': '⚡',
-                                            'GodoftheNet': '🌐',
-                                            'StreetDemon': '😈',
-                                            'Techie': '🔧',
-                                            'Nitro': '🏎️',
-                                            'Dynamo': '⚡',
-                                            'SoulKiller': '💀',
-                                            'GoldenOx': '🐂'
-                                        }
-                                        
-                                        trait_icon = trait_emoji_map.get(trait_name, '🎯')
-                                        st.markdown(f'<div style="text-align: center; font-size: 32px; margin: 8px 0;">{trait_icon}</div>', unsafe_allow_html=True)
-                                        
-                                        st.markdown(f"**{trait_name}**")
-                                        
-                                        avg_place = trait_row['avg_placement']
-                                        games = trait_row['games']
-                                        
-                                        # Calculate top4 rate for this trait
-                                        trait_games = trait_df[trait_df['trait'] == trait_name]
-                                        top4_rate = (trait_games['placement'] <= 4).mean() * 100
-                                        
-                                        # Color based on performance
-                                        if avg_place < 3.5:
-                                            color = "#2ecc71"  # Green
-                                        elif avg_place < 4.5:
-                                            color = "#f39c12"  # Orange  
-                                        else:
-                                            color = "#e74c3c"  # Red
-                                        
-                                        st.markdown(f'<div style="text-align: center; background-color: {color}; padding: 6px; border-radius: 4px; color: white; font-weight: bold; margin: 4px 0; font-size: 14px;">{avg_place:.2f} avg</div>', unsafe_allow_html=True)
-                                        st.caption(f"{games} games • {top4_rate:.0f}% top 4")
-                else:
-                    st.info("No traits with sufficient games (2+) for analysis")
+            if len(best_traits) > 0:
+                st.markdown('<p style="color: #2ecc71; font-size: 14px;">Traits with strong performance - prioritize these synergies!</p>', unsafe_allow_html=True)
                 
+                # Whole 3x3 grid in one HTML block, coloured by performance
+                st.markdown(render_trait_grid(best_traits, TRAIT_EMOJIS, color_column='placement_high'), unsafe_allow_html=True)
             else:
                 st.info("Need more games with each trait (2+ games) for analysis")
         else:
             st.error("❌ No valid trait data found! The API data extraction needs to be fixed.")
             st.markdown("**Possible issues:**")
             st.markdown("- API script isn't extracting trait names properly")
-            st.markdown("- Trait data is coming through as just 'TFT14' without actual trait names")
-            st.markdown("- Need to check the trait extraction in `clean_tft_analyzer.py`")
+            st.markdown("- Trait data is coming through as just a set prefix (e.g. 'TFT15') without actual trait names")
+            st.markdown("- Need to check the trait extraction in `tft_analytics/riot.py` (`match_to_row`)")
     else:
         st.info("No trait data available for analysis")
 
+section_timer.lap("Trait matrix")
+
 # Game Mode Comparison (NEW)
-if selected_mode == 'All' and len(df['game_mode'].unique()) > 1:
+if selected_mode == 'All' and show_section("Show Solo vs Double Up comparison", key="show_mode_comparison"):
+    mode_comparison = engine.mode_comparison(dataset, since_day, period_patch)
+else:
+    mode_comparison = pd.DataFrame()
+
+if len(mode_comparison) > 1:
     st.markdown("---")
     st.subheader("⚔️ Solo vs Double Up Performance")
     
-    mode_comparison = df.groupby('game_mode').agg({
-        'placement': 'mean',
-        'level': 'mean',
-        'damage': 'mean',
-        'game_mode': 'count'
-    }).round(2)
-    mode_comparison.columns = ['avg_placement', 'avg_level', 'avg_damage', 'games']
-    
     col1, col2, col3 = st.columns(3)
     
     for i, (mode, stats) in enumerate(mode_comparison.iterrows()):
@@ -788,236 +610,249 @@ if selected_mode == 'All' and len(df['game_mode'].unique()) > 1:
             )
             st.caption(f"Level {stats['avg_level']:.1f} • {stats['avg_damage']:.0f} damage")
 
+section_timer.lap("Mode comparison")
+
 # Key Takeaways Section - Dynamic based on actual data
 st.markdown("---")
 st.subheader("🎯 Key Takeaways")
 col1, col2 = st.columns(2)
 
-# Calculate actual performance metrics
-avg_placement = df_filtered['placement'].mean()
-top4_rate = (df_filtered['placement'] <= 4).mean() * 100
-top2_rate = (df_filtered['placement'] <= 2).mean() * 100
-avg_level = df_filtered['level'].mean()
+# Advice drawn from the window's summary, items and levels
+strengths, improvements = engine.key_takeaways(
+    window_summary, item_performance_filtered, engine.level_performance(dataset, selected_mode, games_window),
+    item_name=lambda item_id: item_registry[item_id].display_name,
+)
 
 with col1:
-    strengths = []
-    if top4_rate >= 65:
-        strengths.append(f"{top4_rate:.0f}% Top 4 rate is solid for climbing")
-    if avg_level >= 8:
-        strengths.append(f"Good level management ({avg_level:.1f} average)")
-    if top2_rate >= 20:
-        strengths.append(f"Strong top 2 rate ({top2_rate:.0f}%)")
-    
-    if not strengths:
-        strengths = ["Building a solid foundation", "Learning from each game", "Tracking performance data"]
-    
     st.markdown("#### ✅ **Strengths**")
-    for strength in strengths[:4]:
+    for strength in strengths:
         st.markdown(f"- {strength}")
 
 with col2:
-    improvements = []
-    
-    # Find worst performing frequent items
-    if not item_performance_filtered.empty:
-        frequent_bad_items = item_performance_filtered[
-            (item_performance_filtered['games'] >= 5) & 
-            (item_performance_filtered['avg_placement'] > 4.2)
-        ]
-        if not frequent_bad_items.empty:
-            worst_item = frequent_bad_items.loc[frequent_bad_items['avg_placement'].idxmax()]
-            improvements.append(f"Reduce {clean_item_name(worst_item.name)} usage")
-    
-    if avg_placement > 4.5:
-        improvements.append("Focus on early game economy")
-    if top4_rate < 60:
-        improvements.append("Work on consistent top 4 finishes")
-    if avg_level < 8:
-        improvements.append("Improve leveling timing")
-    
-    # Check for level 7 struggles
-    level_7_games = df_filtered[df_filtered['level'] == 7]
-    if len(level_7_games) > 3 and level_7_games['placement'].mean() > 5:
-        improvements.append("Push for level 8 more often")
-    
-    if not improvements:
-        improvements = ["Continue current strategy", "Fine-tune positioning", "Master meta comps"]
-    
     st.markdown("#### ⚠️ **Areas to Improve**")
-    for improvement in improvements[:4]:
+    for improvement in improvements:
         st.markdown(f"- {improvement}")
 
+section_timer.lap("Key takeaways")
+
 # Detailed Item Analysis
 st.markdown("---")
 st.subheader("⚔️ Detailed Item Statistics")
 
-# Create tabs for different item categories
-tab1, tab2, tab3 = st.tabs(["🏆 Best Performers", "⚠️ Needs Work", "📈 Most Used"])
 
-with tab1:
+def show_best_performers():
     st.markdown("""
     <div class="success-box">
         <h4>✨ Prioritize These Items</h4>
-        <p>Items with strong performance metrics that you should build more often.</p>
+        <p>Items that beat an average finish even at the pessimistic end of their 90% interval.</p>
     </div>
     """, unsafe_allow_html=True)
     
     if not item_performance_filtered.empty:
-        best_performers = item_performance_filtered[
-            (item_performance_filtered['avg_placement'] < 4.0) & 
-            (item_performance_filtered['top4_rate'] > 60)
-        ].sort_values('avg_placement')
+        best_performers = engine.best_performers(item_performance_filtered)
         
         if not best_performers.empty:
-            for item, stats in best_performers.iterrows():
-                # Convert stats to dictionary format
-                stats_dict = {
-                    'games': int(stats['games']),
-                    'avg_placement': float(stats['avg_placement']), 
-                    'top4_rate': float(stats['top4_rate']),
-                    'placements': stats.get('placements', [])
-                }
-                display_item_with_icon(item, stats_dict)
-                st.markdown("---")
+            st.markdown(render_item_rows(best_performers, item_registry), unsafe_allow_html=True)
         else:
             st.info("No items meet the criteria for best performers")
 
-with tab2:
+
+def show_problem_items():
     st.markdown("""
     <div class="highlight-box">
         <h4>🚨 Items Hurting Your Performance</h4>
-        <p>Consider building these items less frequently or only in optimal situations.</p>
+        <p>Items that finish below average even at the optimistic end of their 90% interval.</p>
     </div>
     """, unsafe_allow_html=True)
     
     if not item_performance_filtered.empty:
-        problem_items = item_performance_filtered[
-            (item_performance_filtered['avg_placement'] > 4.2) | 
-            (item_performance_filtered['top4_rate'] < 50)
-        ].sort_values('avg_placement', ascending=False)
+        problem_items = engine.problem_items(item_performance_filtered)
         
         if not problem_items.empty:
-            for item, stats in problem_items.iterrows():
-                # Convert stats to dictionary format
-                stats_dict = {
-                    'games': int(stats['games']),
-                    'avg_placement': float(stats['avg_placement']), 
-                    'top4_rate': float(stats['top4_rate']),
-                    'placements': stats.get('placements', [])
-                }
-                display_item_with_icon(item, stats_dict)
-                st.markdown("---")
+            st.markdown(render_item_rows(problem_items, item_registry), unsafe_allow_html=True)
         else:
             st.info("No items meet the criteria for problem items")
 
-with tab3:
+
+def show_best_pairs():
+    st.markdown("### 🤝 Best Item Pairs")
+    st.markdown("Items and traits that show up together in your games, ranked by average placement:")
+    
+    item_pairs = apply_min_games(engine.item_pairs(dataset, selected_mode, games_window), min_item_games)
+    item_traits = apply_min_games(engine.item_traits(dataset, selected_mode, games_window), min_item_games)
+    
+    pair_col, trait_col = st.columns(2)
+    with pair_col:
+        st.markdown("#### ⚔️ Item + Item")
+        if not item_pairs.empty:
+            st.markdown(render_pair_rows(item_pairs.nsmallest(8, 'avg_placement'), item_registry), unsafe_allow_html=True)
+        else:
+            st.info("No item pair has enough games yet")
+    with trait_col:
+        st.markdown("#### 🎭 Item + Trait")
+        if not item_traits.empty:
+            st.markdown(render_pair_rows(item_traits.nsmallest(8, 'avg_placement'), item_registry, trait_emojis=TRAIT_EMOJIS),
+                        unsafe_allow_html=True)
+        else:
+            st.info("No item and trait pairing has enough games yet")
+
+
+def show_most_used():
     st.markdown("### 📈 Most Used Items")
     st.markdown("Items you use most frequently, regardless of performance:")
     
     if not item_performance_filtered.empty:
         most_used_items = item_performance_filtered.nlargest(10, 'games')
         
-        for item, stats in most_used_items.iterrows():
-            # Convert stats to dictionary format - EXACTLY like other tabs
-            stats_dict = {
-                'games': int(stats['games']),
-                'avg_placement': float(stats['avg_placement']), 
-                'top4_rate': float(stats['top4_rate']),
-                'placements': stats.get('placements', [])
-            }
-            
-            # Use the same display function as other tabs
-            display_item_with_icon(item, stats_dict)
-            st.markdown("---")
+        # Same row layout as the other tabs
+        st.markdown(render_item_rows(most_used_items, item_registry), unsafe_allow_html=True)
     else:
         st.info("No item data available for the selected criteria.")
 
+
+item_views = {
+    "🏆 Best Performers": show_best_performers,
+    "⚠️ Needs Work": show_problem_items,
+    "🤝 Best Item Pairs": show_best_pairs,
+    "📈 Most Used": show_most_used,
+}
+
+if lazy_sections:
+    # Tabs render every body up front, so only the selected view is built
+    selected_view = st.radio("Item view", list(item_views), horizontal=True, label_visibility="collapsed")
+    item_views[selected_view]()
+else:
+    for tab, show_view in zip(st.tabs(list(item_views)), item_views.values()):
+        with tab:
+            show_view()
+
+section_timer.lap("Item tabs")
+
+# Composition Archetypes
+st.markdown("---")
+st.subheader("🧩 Composition Archetypes")
+
+if show_section("Show composition archetypes", key="show_archetypes"):
+    # One index per player outlives data versions: new matches are only assigned, not re-clustered
+    archetype_index = get_aggregate_cache().get_or_compute(('archetypes', selected_puuid), ArchetypeIndex)
+    archetypes = engine.archetype_report(dataset, archetype_index, selected_mode, games_window)
+    get_aggregate_cache().put(('archetypes', selected_puuid), archetype_index)  # re-account its grown size
+    if not archetypes.empty:
+        st.markdown("Your games grouped by the traits they ran, most played first:")
+        st.markdown(render_archetype_rows(archetypes.head(10), item_registry), unsafe_allow_html=True)
+    else:
+        st.info("No games to group into archetypes yet")
+
+section_timer.lap("Archetypes")
+
 # Recent Games History
 st.markdown("---")
 st.subheader("📋 Recent Games History")
 
-# Show last 10 games in a nice format
-recent_games = df_filtered.head(10).copy()
-recent_games['placement_emoji'] = recent_games['placement'].apply(
-    lambda x: "🥇" if x == 1 else "🥈" if x == 2 else "🥉" if x == 3 else "✅" if x <= 4 else "❌"
-)
-
-# Create columns for the recent games display
-for idx, (_, game) in enumerate(recent_games.iterrows()):
-    col1, col2, col3, col4, col5 = st.columns([1, 2, 2, 2, 3])
-    
-    with col1:
-        st.markdown(f"**Game {idx+1}**")
-        st.markdown(f"{game['placement_emoji']} #{game['placement']}")
-    
-    with col2:
-        st.markdown(f"**Level {game['level']}**")
-        st.caption(f"{game['damage']} damage")
-    
-    with col3:
-        st.markdown(f"**Gold: {game['gold_left']}**")
-        st.caption(f"{len(game['items'])} items")
+if show_section("Show recent games", key="show_recent_games"):
+    # Show last 10 games in a nice format, decoded back to item/trait lists
+    recent_positions = window[:10]
+    recent_games = snapshot.matches.take(recent_positions).to_frame(index=recent_positions)
     
-    with col4:
-        # Show top 2 items
-        top_items = game['items'][:2] if len(game['items']) >= 2 else game['items']
-        st.markdown("**Items:**")
-        for item in top_items:
-            st.caption(f"• {clean_item_name(item)}")
-    
-    with col5:
-        # Show top 2 traits
-        if game['traits'] and len(game['traits']) > 0:
-            st.markdown("**Traits:**")
-            traits_to_show = game['traits'][:2]
-            for trait in traits_to_show:
-                if isinstance(trait, str) and '_' in trait:
-                    parts = trait.split('_')
-                    if len(parts) >= 2:
-                        trait_name = parts[1] if parts[0] == 'TFT14' else parts[0]
-                        trait_tier = parts[2] if len(parts) >= 3 else parts[1]
-                        st.caption(f"• {trait_name} ({trait_tier})")
-                else:
-                    st.caption(f"• {trait}")
+    # First two normalized traits per recent game, in their original order
+    recent_traits = (
+        select_trait_rows(trait_table, recent_games.index)
+        .groupby('match_idx', sort=False)
+        .head(2)
+    )
+    recent_trait_labels = {}
+    for match_idx, trait_name, trait_tier in zip(recent_traits['match_idx'], recent_traits['trait'], recent_traits['tier']):
+        recent_trait_labels.setdefault(int(match_idx), []).append(f"{trait_name} ({trait_tier})")
     
-    if idx < len(recent_games) - 1:
-        st.markdown("---")
+    # All ten rows in one HTML block
+    st.markdown(render_recent_games(recent_games, item_registry, recent_trait_labels), unsafe_allow_html=True)
+
+section_timer.lap("Recent games")
 
 # Performance Trends
 st.markdown("---")
 st.subheader("📈 Performance Trends")
 
-if len(df_filtered) >= 10:
-    # Create a rolling average of placement - FIXED: Reverse order for chronological display
-    df_trends = df_filtered.head(20).copy()
-    # Reverse the dataframe so oldest games come first
-    df_trends = df_trends.iloc[::-1].reset_index(drop=True)
-    df_trends['game_number'] = range(1, len(df_trends) + 1)
-    df_trends['rolling_avg'] = df_trends['placement'].rolling(window=5, min_periods=1).mean()
-    
-    fig_trend = px.line(
-        df_trends,
-        x='game_number',
-        y='rolling_avg',
-        title="Placement Trend (5-game rolling average)",
-        markers=True
-    )
-    
-    # Add reference line at 4.5 (average placement)
-    fig_trend.add_hline(y=4.5, line_dash="dash", line_color="gray", 
-                       annotation_text="Average (4.5)")
-    
-    fig_trend.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(title="Average Placement (Lower = Better)", autorange="reversed"),
-        xaxis=dict(title="Game Number (Oldest → Most Recent)")
-    )
-    
-    st.plotly_chart(fig_trend, use_container_width=True)
-else:
+if period_stop - period_start < 10:
     st.info("Need at least 10 games for trend analysis")
+elif show_section("Show performance trends", key="show_trends"):
+    trend_window = st.select_slider("Rolling window (games)", options=TREND_WINDOWS, value=engine.TREND_WINDOW)
+    every_game = st.toggle("Plot every game", key="trend_every_game",
+                           help="Skip downsampling; long series are then drawn with WebGL")
+    trend_points = None if every_game else TREND_POINTS
+    # The whole period, oldest games first; the index only folds in matches it has not seen
+    trend_index = get_aggregate_cache().get_or_compute(('trends', selected_puuid), TrendIndex)
+    df_trends = engine.performance_trend(dataset, selected_mode, (period_start, period_stop), trend_window,
+                                         trend_points, trend_index=trend_index)
+    get_aggregate_cache().put(('trends', selected_puuid), trend_index)  # re-account its grown size
+
+    def trend_figure():
+        # Chart build (a span of its own when profiling)
+        with span('trend chart figure'):
+            # SVG traces get sluggish past a few thousand points
+            trace = go.Scattergl if use_webgl(len(df_trends)) else go.Scatter
+            spread = df_trends['variance'] ** 0.5
+            fig_trend = go.Figure()
+            fig_trend.add_trace(trace(x=df_trends['game_number'], y=df_trends['rolling_avg'] + spread,
+                                      line=dict(width=0), hoverinfo='skip', showlegend=False))
+            fig_trend.add_trace(trace(x=df_trends['game_number'], y=df_trends['rolling_avg'] - spread,
+                                      line=dict(width=0), fill='tonexty', fillcolor='rgba(99,110,250,0.15)',
+                                      name="±1 std dev", hoverinfo='skip'))
+            fig_trend.add_trace(trace(x=df_trends['game_number'], y=df_trends['rolling_avg'],
+                                      name=f"{trend_window}-game average", line=dict(color='#636EFA')))
+            fig_trend.add_trace(trace(x=df_trends['game_number'], y=df_trends['ewma'],
+                                      name="EWMA", line=dict(color='#FFA15A', dash='dot')))
+            fig_trend.add_trace(trace(x=df_trends['game_number'], y=df_trends['top4_rate'], yaxis='y2',
+                                      name="Top 4 rate", line=dict(color=GOOD_COLOR, width=1)))
+        
+            # Add reference line at 4.5 (average placement)
+            fig_trend.add_hline(y=4.5, line_dash="dash", line_color="gray", 
+                               annotation_text="Average (4.5)")
+        
+            fig_trend.update_layout(
+                title=f"Placement Trend ({trend_window}-game rolling window)",
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                yaxis=dict(title="Average Placement (Lower = Better)", autorange="reversed"),
+                yaxis2=dict(title="Top 4 rate (%)", overlaying='y', side='right', range=[0, 100], showgrid=False),
+                xaxis=dict(title="Game Number (Oldest → Most Recent)"),
+                legend=dict(orientation='h', y=-0.2)
+            )
+        return fig_trend
+
+    fig_trend = dataset.stages(selected_mode, (period_start, period_stop)).get(
+        f'figure:trend:{trend_window}:{trend_points}', trend_figure)
+    st.plotly_chart(fig_trend, use_container_width=True)
+    if len(df_trends) < period_stop - period_start:
+        st.caption(f"Showing {len(df_trends):,} of {period_stop - period_start:,} games (downsampled)")
+
+section_timer.lap("Trends")
+
+# Per-section timing readout for this run
+with st.sidebar.expander("⏱️ Section timings"):
+    st.toggle("Profile this page", key="profiling",
+              help="Time the analysis stages, chart builds and renderers inside each section on every rerun")
+    if tracer is None:
+        timings = section_timer.as_frame()
+        st.dataframe(timings, hide_index=True, use_container_width=True)
+        st.caption(f"Total: {timings['ms'].sum():.1f} ms")
+    else:
+        # Sections, with the stages that computed inside them indented below
+        spans = tracer.as_frame()
+        spans['span'] = [('\u2003' * (depth - 1) + '↳ ' if depth else '') + name
+                         for name, depth in zip(spans['span'], spans['depth'])]
+        st.dataframe(spans.drop(columns='depth'), hide_index=True, use_container_width=True,
+                     column_config={'ms': st.column_config.NumberColumn(format="%.1f"),
+                                    'share': st.column_config.NumberColumn("% of run", format="%.0f%%")})
+        st.dataframe(tracer.counter_frame(), hide_index=True, use_container_width=True)
+        st.caption(f"Total: {section_timer.as_frame()['ms'].sum():.1f} ms")
+        trace = tracer.chrome_trace()
+        st.download_button("Download trace (JSON)", json.dumps(trace, default=str), file_name="tft-dashboard-trace.json",
+                           mime="application/json", help="Open in chrome://tracing or ui.perfetto.dev")
+        if TRACE_DIR:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            tracer.save(os.path.join(TRACE_DIR, f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json"))
 
 # Footer
 st.markdown("---")
-st.markdown("*Dashboard updates automatically when you run new analysis. Data refreshes with each game session.*")
\ No newline at end of file
+st.markdown("*Dashboard updates automatically when new matches are stored. Fetch them with `python -m tft_analytics.riot \"Name#TAG\"`.*")